@@ -1,6 +1,9 @@
 """Audio device discovery and selection utilities."""
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+import logging
+import re
+import time
 import warnings
 
 import soundcard as sc
@@ -9,6 +12,8 @@ import soundcard as sc
 # BlackHole and other virtual audio devices work fine despite this warning
 warnings.filterwarnings('ignore', message='macOS does not support loopback recording functionality')
 
+log = logging.getLogger(__name__)
+
 
 # Well-known loopback device name patterns
 LOOPBACK_PATTERNS = [
@@ -26,23 +31,35 @@ LOOPBACK_PATTERNS = [
     'monitor',
 ]
 
+# Microphone name patterns
+MIC_PATTERNS = ['microphone', 'mic', 'input', 'built-in']
 
-def list_audio_devices(include_loopback: bool = True) -> List[Dict]:
-    """List all available audio input devices.
+# Compiled alternations so each device name is scanned once for all patterns
+_LOOPBACK_RE = re.compile('|'.join(re.escape(p) for p in LOOPBACK_PATTERNS), re.IGNORECASE)
+_MIC_RE = re.compile('|'.join(re.escape(p) for p in MIC_PATTERNS), re.IGNORECASE)
+
+# How long a device enumeration stays valid before soundcard is queried again
+ENUMERATION_CACHE_TTL = 5.0  # seconds
+
+# include_loopback -> (timestamp, microphones, devices, name_index)
+_enumeration_cache: Dict[bool, tuple] = {}
+
+
+def _build_device_list(microphones: List[Any]) -> List[Dict]:
+    """Build device info dictionaries aligned with a microphone list.
 
     Args:
-        include_loopback: Include loopback devices in the list.
+        microphones: List of soundcard Microphone objects.
 
     Returns:
-        List of device info dictionaries with keys: id, name, channels, is_loopback.
+        List of device info dictionaries; each 'id' indexes into microphones.
     """
-    microphones = sc.all_microphones(include_loopback=include_loopback)
-
     devices = []
     for idx, mic in enumerate(microphones):
         devices.append({
             'id': idx,
             'name': mic.name,
+            'name_lower': mic.name.lower(),
             'channels': mic.channels,
             'is_loopback': mic.isloopback if hasattr(mic, 'isloopback') else False
         })
@@ -50,6 +67,52 @@ def list_audio_devices(include_loopback: bool = True) -> List[Dict]:
     return devices
 
 
+def _enumerate(include_loopback: bool = True, refresh: bool = False) -> Tuple[List[Any], List[Dict], Dict[str, int]]:
+    """Enumerate soundcard microphones, reusing a recent result if available.
+
+    Enumeration is slow and can fail on Windows WASAPI when repeated in quick
+    succession, so results are cached for ENUMERATION_CACHE_TTL seconds.
+
+    Args:
+        include_loopback: Include loopback devices in the enumeration.
+        refresh: Bypass the cache and query soundcard again.
+
+    Returns:
+        Tuple of (microphones, devices, name_index) where devices is in
+        enumeration order and name_index maps lowercased names to device IDs.
+    """
+    now = time.monotonic()
+    cached = _enumeration_cache.get(include_loopback)
+    if not refresh and cached is not None and now - cached[0] < ENUMERATION_CACHE_TTL:
+        return cached[1:]
+
+    microphones = sc.all_microphones(include_loopback=include_loopback)
+    devices = _build_device_list(microphones)
+
+    # First enumerated device wins when several share a name
+    name_index: Dict[str, int] = {}
+    for device in devices:
+        name_index.setdefault(device['name_lower'], device['id'])
+
+    _enumeration_cache[include_loopback] = (now, microphones, devices, name_index)
+    return microphones, devices, name_index
+
+
+def list_audio_devices(include_loopback: bool = True, refresh: bool = False) -> List[Dict]:
+    """List all available audio input devices.
+
+    Args:
+        include_loopback: Include loopback devices in the list.
+        refresh: Force a fresh device enumeration instead of using the cache.
+
+    Returns:
+        List of device info dictionaries with keys: id, name, name_lower,
+        channels, is_loopback.
+    """
+    _, devices, _ = _enumerate(include_loopback=include_loopback, refresh=refresh)
+    return list(devices)
+
+
 def print_devices(devices: List[Dict]) -> None:
     """Print devices in human-readable format.
 
@@ -74,19 +137,16 @@ def find_loopback_device(devices: List[Dict]) -> Optional[Dict]:
     Returns:
         Device dictionary if found, None otherwise.
     """
-    # First, try devices marked as loopback
+    # Devices marked as loopback win; otherwise the first name pattern match.
+    # One pass, returning as soon as a marked device is seen.
+    pattern_match = None
     for device in devices:
         if device.get('is_loopback', False):
             return device
+        if pattern_match is None and _LOOPBACK_RE.search(device['name']):
+            pattern_match = device
 
-    # Fallback: search by name patterns
-    for device in devices:
-        device_name_lower = device['name'].lower()
-        for pattern in LOOPBACK_PATTERNS:
-            if pattern in device_name_lower:
-                return device
-
-    return None
+    return pattern_match
 
 
 def find_microphone_device(devices: List[Dict]) -> Optional[Dict]:
@@ -98,20 +158,14 @@ def find_microphone_device(devices: List[Dict]) -> Optional[Dict]:
     Returns:
         Device dictionary if found, None otherwise.
     """
-    # Microphone name patterns
-    mic_patterns = ['microphone', 'mic', 'input', 'built-in']
-
     for device in devices:
         # Skip if it's a loopback device
         if device.get('is_loopback', False):
             continue
 
-        device_name_lower = device['name'].lower()
-
         # Check for microphone patterns
-        for pattern in mic_patterns:
-            if pattern in device_name_lower:
-                return device
+        if _MIC_RE.search(device['name']):
+            return device
 
     # If no pattern match, return first non-loopback device
     for device in devices:
@@ -124,70 +178,83 @@ def find_microphone_device(devices: List[Dict]) -> Optional[Dict]:
 def select_device(device_id: Optional[int] = None,
                  device_name: Optional[str] = None,
                  auto_select_loopback: bool = True,
-                 prefer_microphone: bool = False) -> Optional[Any]:
+                 prefer_microphone: bool = False,
+                 refresh: bool = False) -> Optional[Any]:
     """Select audio device for recording.
 
     Args:
         device_id: Device ID from list_audio_devices().
-        device_name: Device name (substring match, case-insensitive).
+        device_name: Device name (case-insensitive; exact match preferred,
+            otherwise first substring match).
         auto_select_loopback: If no device specified, auto-select loopback device.
         prefer_microphone: If True, auto-select microphone instead of loopback.
+        refresh: Force a fresh device enumeration instead of using the cache.
+
+    Selection results are reported through the module logger; callers that
+    need user-facing output should print the returned device themselves.
 
     Returns:
         Microphone object if found, None otherwise.
     """
-    devices = list_audio_devices(include_loopback=True)
+    # Enumerate once; device['id'] indexes into microphones
+    microphones, devices, name_index = _enumerate(include_loopback=True, refresh=refresh)
 
     # Selection by ID
     if device_id is not None:
         if 0 <= device_id < len(devices):
-            microphones = sc.all_microphones(include_loopback=True)
             selected = microphones[device_id]
-            print(f"\nSelected device: {selected.name}")
+            log.info("Selected device: %s", selected.name)
             return selected
         else:
-            print(f"Error: Device ID {device_id} out of range (0-{len(devices)-1})")
+            log.warning("Device ID %d out of range (0-%d)", device_id, len(devices) - 1)
             return None
 
     # Selection by name
     if device_name is not None:
         device_name_lower = device_name.lower()
+
+        # Fast path: exact name match
+        idx = name_index.get(device_name_lower)
+        if idx is not None:
+            selected = microphones[idx]
+            log.info("Selected device: %s", selected.name)
+            return selected
+
         for device in devices:
-            if device_name_lower in device['name'].lower():
-                microphones = sc.all_microphones(include_loopback=True)
+            if device_name_lower in device['name_lower']:
                 selected = microphones[device['id']]
-                print(f"\nSelected device: {selected.name}")
+                log.info("Selected device: %s", selected.name)
                 return selected
 
-        print(f"Error: No device found matching '{device_name}'")
+        log.warning("No device found matching '%s'", device_name)
         return None
 
     # Auto-select microphone
     if prefer_microphone:
         mic_device = find_microphone_device(devices)
         if mic_device:
-            microphones = sc.all_microphones(include_loopback=True)
             selected = microphones[mic_device['id']]
-            print(f"\nAuto-selected microphone: {selected.name}")
+            log.info("Auto-selected microphone: %s", selected.name)
             return selected
         else:
-            print("\nWarning: No microphone device found.")
+            log.warning("No microphone device found.")
             return None
 
     # Auto-select loopback
     if auto_select_loopback:
         loopback_device = find_loopback_device(devices)
         if loopback_device:
-            microphones = sc.all_microphones(include_loopback=True)
             selected = microphones[loopback_device['id']]
-            print(f"\nAuto-selected loopback device: {selected.name}")
+            log.info("Auto-selected loopback device: %s", selected.name)
             return selected
         else:
-            print("\nWarning: No loopback device found.")
-            print("Please install a virtual audio device:")
-            print("  macOS: BlackHole (https://github.com/ExistentialAudio/BlackHole)")
-            print("  Windows: VB-CABLE or enable 'Stereo Mix'")
-            print("  Linux: PulseAudio monitor")
+            log.warning(
+                "No loopback device found.\n"
+                "Please install a virtual audio device:\n"
+                "  macOS: BlackHole (https://github.com/ExistentialAudio/BlackHole)\n"
+                "  Windows: VB-CABLE or enable 'Stereo Mix'\n"
+                "  Linux: PulseAudio monitor"
+            )
             return None
 
     return None
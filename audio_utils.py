@@ -7,20 +7,31 @@ This module provides utilities for:
 """
 
 import argparse
+import functools
 import json
+import os
+import re
 import subprocess
 import sys
+import tempfile
 import signal
+import struct
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
-import numpy as np
-import soundcard as sc
-import yaml
+try:
+    import soundfile
+    HAS_SOUNDFILE = True
+except (ImportError, OSError):
+    HAS_SOUNDFILE = False
 
-from audio_device import select_device, list_audio_devices, print_devices
+# numpy, yaml and audio_device (which initializes soundcard) are imported in
+# the functions that need them to keep CLI startup fast for info/convert
 
 
 # Optimal format for Dejavu fingerprinting
@@ -28,73 +39,467 @@ OPTIMAL_SAMPLE_RATE = 44100  # Hz (Dejavu DEFAULT_FS)
 OPTIMAL_CHANNELS = 1  # Mono
 OPTIMAL_FORMAT = 'wav'
 OPTIMAL_BIT_DEPTH = 16  # 16-bit PCM
+_OPTIMAL_SUFFIX = f'.{OPTIMAL_FORMAT}'
+
+# needs_conversion() reason for files whose header does not match their extension
+INVALID_HEADER_REASON = "Invalid header"
+
+# Formats whose headers libsndfile reads in-process (no ffprobe needed)
+SOUNDFILE_EXTENSIONS = frozenset({'.wav', '.flac', '.ogg', '.aiff'})
+
+# libsndfile subtype -> ffprobe codec_name (PCM gets an endianness suffix)
+_SOUNDFILE_CODECS = {
+    'PCM_16': 'pcm_s16',
+    'PCM_24': 'pcm_s24',
+    'PCM_32': 'pcm_s32',
+    'FLOAT': 'pcm_f32',
+    'DOUBLE': 'pcm_f64',
+    'PCM_U8': 'pcm_u8',
+    'PCM_S8': 'pcm_s8',
+    'VORBIS': 'vorbis',
+    'OPUS': 'opus',
+}
+
+# Parallel ffprobe calls when scanning a directory (I/O-bound subprocess waits)
+PROBE_WORKERS = 16
+
+# ffmpeg timeout: at least CONVERSION_TIMEOUT seconds, extended for long
+# inputs assuming decoding runs at least CONVERSION_MIN_SPEED x realtime
+CONVERSION_TIMEOUT = 60.0  # seconds
+CONVERSION_MIN_SPEED = 20.0
+
+# Bytes a conversion may hold in memory: in-place ffmpeg runs whose output
+# fits pipe it back instead of writing a temp file, and IN_PROCESS_EXTENSIONS
+# inputs are decoded without ffmpeg when frames x channels x 8 bytes (the
+# float decode and resampling intermediates) fit. Applies per worker.
+MEMORY_CONVERSION_LIMIT = 200 * 1024 * 1024
+
+# Formats converted in-process with soundfile + scipy (no ffmpeg spawn)
+IN_PROCESS_EXTENSIONS = frozenset({'.wav', '.flac', '.aiff'})
+
+# Parallel YAML scaffold writes
+YAML_WORKERS = 32
+
+# Seconds between progress output updates (recording, YAML batches)
+PROGRESS_INTERVAL = 0.25
+
+# Persistent ffprobe results, {absolute path: [size, mtime_ns, info]}; an entry
+# is only used while the file's size and mtime still match
+PROBE_CACHE_PATH = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'audio2mqtt' / 'probe.json'
+_probe_cache: Optional[Dict[str, list]] = None
+_probe_cache_dirty = False
+_probe_cache_lock = threading.Lock()
+
+# In-memory probe results, {(path, size, mtime_ns): info}; failed probes are
+# not stored, so a transient ffprobe error is retried on the next lookup
+PROBE_MEMO_SIZE = 4096
+_probe_memo: Dict[Tuple[str, int, int], Dict] = {}
 
 # Supported input formats
 SUPPORTED_EXTENSIONS = ['.mp3', '.m4a', '.ogg', '.flac', '.wav', '.aiff', '.aac', '.wma']
+_SUPPORTED_EXTENSION_SET = frozenset(SUPPORTED_EXTENSIONS)
+_SUPPORTED_EXTENSION_NAMES = frozenset(ext[1:] for ext in SUPPORTED_EXTENSIONS)
 
 
 def get_audio_info(file_path: Path) -> Optional[Dict]:
     """Get audio file information using ffprobe.
 
+    WAV/FLAC/OGG/AIFF headers are read in-process with soundfile when it is
+    available; other formats (or files soundfile rejects) use ffprobe.
+    Results are memoized per (path, size, mtime), so repeated lookups of an
+    unchanged file do not spawn ffprobe again; ffprobe results are also kept
+    on disk (see PROBE_CACHE_PATH) once _save_probe_cache() is called.
+
     Args:
         file_path: Path to audio file.
 
     Returns:
         Dictionary with sample_rate, channels, codec, duration, or None if error.
     """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    info = _probe_audio_info(str(file_path), stat.st_size, stat.st_mtime_ns)
+    return dict(info) if info is not None else None
+
+
+def get_audio_info_batch(paths: List[Path]) -> Dict[Path, Optional[Dict]]:
+    """Get audio file information for many files concurrently.
+
+    ffprobe runs out of process, so a thread pool keeps PROBE_WORKERS probes
+    in flight instead of paying each process spawn in turn.
+
+    Args:
+        paths: Paths to audio files.
+
+    Returns:
+        Dictionary mapping each path to its get_audio_info() result.
+    """
+    if not paths:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(paths))) as executor:
+        return dict(zip(paths, executor.map(get_audio_info, paths)))
+
+
+def _probe_audio_info(file_path: str, file_size: int, mtime_ns: int) -> Optional[Dict]:
+    """Memoized _read_audio_info(); size and mtime only serve as cache key.
+
+    Args:
+        file_path: Path to audio file.
+        file_size: File size in bytes.
+        mtime_ns: File modification time in nanoseconds.
+
+    Returns:
+        Dictionary with sample_rate, channels, codec, duration, or None if error.
+    """
+    key = (file_path, file_size, mtime_ns)
+    info = _probe_memo.get(key)
+    if info is not None:
+        return info
+
+    info = _read_audio_info(file_path, file_size, mtime_ns)
+    if info is not None:
+        with _probe_cache_lock:
+            if len(_probe_memo) >= PROBE_MEMO_SIZE:
+                # Evict the oldest entry
+                del _probe_memo[next(iter(_probe_memo))]
+            _probe_memo[key] = info
+    return info
+
+
+def _read_audio_info(file_path: str, file_size: int, mtime_ns: int) -> Optional[Dict]:
+    """Read a file's stream info from its header or with ffprobe.
+
+    Args:
+        file_path: Path to audio file.
+        file_size: File size in bytes.
+        mtime_ns: File modification time in nanoseconds.
+
+    Returns:
+        Dictionary with sample_rate, channels, codec, duration, or None if error.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == '.wav':
+        info = _read_wav_header_fast(file_path)
+        if info is not None:
+            return info
+
+    if HAS_SOUNDFILE and ext in SOUNDFILE_EXTENSIONS:
+        info = _soundfile_audio_info(file_path)
+        if info is not None:
+            return info
+
+    key = os.path.abspath(file_path)
+    with _probe_cache_lock:
+        cache = _load_probe_cache()
+        entry = cache.get(key)
+    if entry is not None and entry[0] == file_size and entry[1] == mtime_ns:
+        return entry[2]
+
     try:
         result = subprocess.run(
             [
                 'ffprobe',
                 '-v', 'error',
+                '-select_streams', 'a:0',  # First audio stream only
                 '-show_entries', 'stream=sample_rate,channels,codec_name,duration',
-                '-of', 'json',
-                str(file_path)
+                '-of', 'default=noprint_wrappers=1',  # key=value lines
+                file_path
             ],
             capture_output=True,
-            text=True,
             timeout=10
         )
 
         if result.returncode != 0:
             return None
 
-        data = json.loads(result.stdout)
-        streams = data.get('streams', [])
+        info = _parse_ffprobe_output(result.stdout)
 
-        if not streams:
-            return None
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError, ValueError):
+        # OSError: ffprobe not installed
+        return None
 
-        # Get first audio stream
-        audio_stream = next((s for s in streams if 'sample_rate' in s), None)
-        if not audio_stream:
-            return None
+    if info is not None:
+        global _probe_cache_dirty
+        with _probe_cache_lock:
+            cache[key] = [file_size, mtime_ns, info]
+            _probe_cache_dirty = True
+
+    return info
+
+
+def _load_probe_cache() -> Dict[str, list]:
+    """Return the persistent probe cache, reading it from disk on first use.
+
+    Must be called with _probe_cache_lock held. A missing, unreadable or
+    malformed cache file yields an empty cache.
+    """
+    global _probe_cache
+    if _probe_cache is None:
+        try:
+            with open(PROBE_CACHE_PATH, 'rb') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = None
+        if not (isinstance(cache, dict)
+                and all(isinstance(entry, list) and len(entry) == 3 for entry in cache.values())):
+            cache = {}
+        _probe_cache = cache
+    return _probe_cache
+
+
+def _save_probe_cache() -> None:
+    """Write new probe cache entries to disk.
+
+    The file is written to a temporary name and renamed over the old one, so
+    an interrupted run never leaves a truncated cache behind.
+    """
+    global _probe_cache_dirty
+    with _probe_cache_lock:
+        if not _probe_cache_dirty:
+            return
+
+        try:
+            PROBE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=PROBE_CACHE_PATH.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(_probe_cache, f)
+                os.replace(tmp_path, PROBE_CACHE_PATH)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            # Caching is best effort
+            return
+
+        _probe_cache_dirty = False
+
+
+def _parse_ffprobe_output(output: bytes) -> Optional[Dict]:
+    """Parse ffprobe key=value stream output.
+
+    ffprobe prints fields in its own order regardless of -show_entries, so
+    values are looked up by key. Unavailable values ('N/A') read as 0.
+
+    Args:
+        output: Raw ffprobe stdout in default=noprint_wrappers=1 format.
+
+    Returns:
+        Dictionary with sample_rate, channels, codec, duration, or None if no
+        audio stream was reported.
+
+    Raises:
+        ValueError: If a numeric field cannot be parsed.
+    """
+    fields = dict(line.split(b'=', 1) for line in output.splitlines() if b'=' in line)
+
+    if b'sample_rate' not in fields:
+        return None
+
+    def number(key: bytes, cast):
+        value = fields.get(key, b'N/A')
+        return cast(value) if value != b'N/A' else cast(0)
+
+    codec = fields.get(b'codec_name')
+
+    return {
+        'sample_rate': number(b'sample_rate', int),
+        'channels': number(b'channels', int),
+        'codec': codec.decode('ascii', errors='replace') if codec else 'unknown',
+        'duration': number(b'duration', float)
+    }
+
+
+# WAVE_FORMAT_* tags understood by _read_wav_header_fast
+_WAV_FORMAT_PCM = 0x0001
+_WAV_FORMAT_IEEE_FLOAT = 0x0003
+_WAV_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _read_wav_header_fast(file_path: str) -> Optional[Dict]:
+    """Read audio file information straight from a RIFF/WAVE header.
+
+    Parses the fmt and data chunks from the first few KB of the file with
+    struct, which is cheaper than going through libsndfile or ffprobe.
+    Anything unusual (RF64, compressed formats, streamed files with unknown
+    sizes, chunks beyond the read window) is left to the other probes.
+
+    Args:
+        file_path: Path to WAV file.
+
+    Returns:
+        Dictionary in the same shape as get_audio_info(), or None if the
+        header could not be parsed.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(4096)
+    except OSError:
+        return None
+
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size = struct.unpack_from('<I', header, offset + 4)[0]
+
+        if chunk_id == b'fmt ':
+            if chunk_size < 16 or offset + 24 > len(header):
+                return None
+            fmt = struct.unpack_from('<HHIIHH', header, offset + 8)
+            if fmt[0] == _WAV_FORMAT_EXTENSIBLE:
+                # Actual format tag is the start of the SubFormat GUID
+                if chunk_size < 40 or offset + 34 > len(header):
+                    return None
+                fmt = (struct.unpack_from('<H', header, offset + 32)[0],) + fmt[1:]
+
+        elif chunk_id == b'data':
+            if fmt is None or chunk_size in (0, 0xFFFFFFFF):
+                return None
+
+            format_tag, channels, sample_rate, _, block_align, bits = fmt
+            if format_tag == _WAV_FORMAT_PCM:
+                codec = 'pcm_u8' if bits == 8 else f'pcm_s{bits}le'
+            elif format_tag == _WAV_FORMAT_IEEE_FLOAT:
+                codec = f'pcm_f{bits}le'
+            else:
+                return None
+
+            if not channels or not sample_rate or not block_align:
+                return None
+
+            return {
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'codec': codec,
+                'duration': (chunk_size // block_align) / sample_rate
+            }
+
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+    return None
 
-        return {
-            'sample_rate': int(audio_stream.get('sample_rate', 0)),
-            'channels': int(audio_stream.get('channels', 0)),
-            'codec': audio_stream.get('codec_name', 'unknown'),
-            'duration': float(audio_stream.get('duration', 0))
-        }
 
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, json.JSONDecodeError, ValueError):
+def _soundfile_audio_info(file_path: str) -> Optional[Dict]:
+    """Read audio file information from the header using libsndfile.
+
+    Args:
+        file_path: Path to audio file.
+
+    Returns:
+        Dictionary in the same shape as get_audio_info(), or None if
+        libsndfile cannot read the file.
+    """
+    try:
+        si = soundfile.info(file_path)
+    except Exception:
         return None
 
+    if si.format == 'FLAC':
+        # libsndfile reports the decoded sample format as subtype
+        codec = 'flac'
+    else:
+        codec = _SOUNDFILE_CODECS.get(si.subtype, si.subtype.lower())
+        if codec.startswith('pcm_') and codec not in ('pcm_u8', 'pcm_s8'):
+            codec += 'be' if si.format == 'AIFF' else 'le'
+
+    return {
+        'sample_rate': int(si.samplerate),
+        'channels': int(si.channels),
+        'codec': codec,
+        'duration': float(si.duration)
+    }
+
+
+def has_valid_header(file_path: Path) -> bool:
+    """Cheaply check that a file starts with the signature of its format.
+
+    Only the first 16 bytes are read. Files with extensions that have no
+    known signature, or that cannot be opened, are not rejected here.
+
+    Args:
+        file_path: Path to audio file.
+
+    Returns:
+        False if the header clearly does not match the extension, True otherwise.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in _SUPPORTED_EXTENSION_SET:
+        return True
+
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(16)
+    except OSError:
+        return True
+
+    if len(header) < 4:
+        return False
+
+    if ext == '.wav':
+        return header[:4] in (b'RIFF', b'RF64', b'BW64') and header[8:12] == b'WAVE'
+    if ext == '.flac':
+        return header[:4] == b'fLaC' or header[:3] == b'ID3'
+    if ext == '.ogg':
+        return header[:4] == b'OggS'
+    if ext == '.aiff':
+        return header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC')
+    if ext == '.m4a':
+        return header[4:8] == b'ftyp'
+    if ext == '.wma':
+        return header[:4] == b'\x30\x26\xb2\x75'  # ASF header GUID
+    # .mp3 / .aac: ID3 tag, ADIF header or MPEG/ADTS frame sync
+    return header[:3] == b'ID3' or header[:4] == b'ADIF' or (header[0] == 0xFF and header[1] & 0xE0 == 0xE0)
+
+
+def _is_optimal(info: Dict, suffix: str) -> bool:
+    """Check audio info against the optimal fingerprinting format.
 
-def needs_conversion(file_path: Path) -> Tuple[bool, Optional[str]]:
+    Args:
+        info: Audio info from get_audio_info().
+        suffix: File extension including the dot.
+
+    Returns:
+        True if no conversion is needed.
+    """
+    return (info['sample_rate'] == OPTIMAL_SAMPLE_RATE
+            and info['channels'] == OPTIMAL_CHANNELS
+            and suffix.lower() == _OPTIMAL_SUFFIX)
+
+
+def needs_conversion(file_path: Path, info: Optional[Dict] = None) -> Tuple[bool, Optional[str]]:
     """Check if audio file needs conversion to optimal format.
 
     Args:
         file_path: Path to audio file.
+        info: Audio info already obtained from get_audio_info() or
+            get_audio_info_batch(); probed when not given.
 
     Returns:
         Tuple of (needs_conversion, reason).
     """
-    info = get_audio_info(file_path)
+    if info is None:
+        info = get_audio_info(file_path)
 
     if info is None:
+        # The header check is only a cheap filter; a file is called invalid
+        # when it also fails to probe (ffmpeg reads e.g. MP3s with leading junk)
+        if not has_valid_header(file_path):
+            return (True, INVALID_HEADER_REASON)
         return (True, "Unable to read audio info")
 
+    # Common case on re-runs; skip building the reason string
+    if _is_optimal(info, file_path.suffix):
+        return (False, "Already optimal")
+
     issues = []
 
     if info['sample_rate'] != OPTIMAL_SAMPLE_RATE:
@@ -103,7 +508,7 @@ def needs_conversion(file_path: Path) -> Tuple[bool, Optional[str]]:
     if info['channels'] != OPTIMAL_CHANNELS:
         issues.append(f"{info['channels']}ch → {OPTIMAL_CHANNELS}ch")
 
-    if file_path.suffix.lower() != f'.{OPTIMAL_FORMAT}':
+    if file_path.suffix.lower() != _OPTIMAL_SUFFIX:
         issues.append(f"{file_path.suffix} → .{OPTIMAL_FORMAT}")
 
     if issues:
@@ -115,14 +520,25 @@ def needs_conversion(file_path: Path) -> Tuple[bool, Optional[str]]:
 def convert_to_fingerprint_format(
     input_path: Path,
     output_path: Optional[Path] = None,
-    overwrite: bool = False
+    overwrite: bool = False,
+    threads: int = 0,
+    duration: Optional[float] = None
 ) -> Tuple[bool, str]:
     """Convert audio file to optimal fingerprinting format.
 
+    The input is not probed here; pass the duration from an earlier
+    get_audio_info() call to scale the ffmpeg timeout and allow in-memory
+    conversion.
+
     Args:
         input_path: Path to input audio file.
         output_path: Path to output file (defaults to input_path with .wav extension).
         overwrite: Whether to overwrite existing output file.
+        threads: ffmpeg thread count (0 = auto; use 1 when running many
+            conversions in parallel to avoid oversubscription).
+        duration: Input duration in seconds, if already known. Without it
+            the fixed CONVERSION_TIMEOUT applies and the output is written
+            through a temp file.
 
     Returns:
         Tuple of (success, message).
@@ -144,61 +560,269 @@ def convert_to_fingerprint_format(
     if output_path.exists() and not overwrite and not use_temp_file:
         return (False, f"Output file exists (use --overwrite): {output_path}")
 
-    # If converting to same file, use temp file as intermediate
-    # Use .tmp.wav so ffmpeg recognizes the format
-    if use_temp_file:
-        actual_output = output_path.parent / f"{output_path.stem}.tmp.wav"
+    # In-place conversions small enough to buffer are piped back from ffmpeg
+    # and swapped in for the original once ffmpeg has finished. Larger ones go
+    # to a uniquely named temp file next to the target (safe under parallel
+    # workers) that is atomically swapped in; it keeps a .wav suffix so ffmpeg
+    # recognizes the format.
+    duration = duration or 0.0
+    timeout = max(CONVERSION_TIMEOUT, duration / CONVERSION_MIN_SPEED)
+    fits_in_memory = _estimated_wav_size(duration) <= MEMORY_CONVERSION_LIMIT
+
+    # Simple containers are decoded and resampled in-process, saving the
+    # ffmpeg spawn; anything libsndfile can't read (or that is too large to
+    # decode in memory) falls through to ffmpeg
+    if HAS_SOUNDFILE and input_path.suffix.lower() in IN_PROCESS_EXTENSIONS:
+        wav = _convert_in_process(input_path)
+        if wav is not None:
+            try:
+                _write_replacing(output_path, wav)
+            except OSError as e:
+                return (False, f"Error writing output: {e}")
+            return (True, f"Converted: {output_path.name}")
+
+    pipe_output = use_temp_file and fits_in_memory
+    temp_output = None
+
+    if pipe_output:
+        actual_output = 'pipe:1'
+    elif use_temp_file:
+        with tempfile.NamedTemporaryFile(dir=output_path.parent, prefix=f".{output_path.stem}.",
+                                         suffix='.tmp.wav', delete=False) as tmp:
+            temp_output = Path(tmp.name)
+        actual_output = str(temp_output)
     else:
-        actual_output = output_path
+        actual_output = str(output_path)
 
-    # Convert using ffmpeg
-    temp_file_created = False
+    # Convert using ffmpeg (stdout unused unless piping; stderr kept as bytes
+    # and only the tail is decoded on failure)
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             [
                 'ffmpeg',
+                '-nostdin',                        # Never wait on stdin
+                '-hide_banner',
+                '-loglevel', 'error',              # Only errors on stderr
                 '-i', str(input_path),
+                '-vn',                             # Skip embedded cover art/video
+                '-map_metadata', '-1',             # Drop tags
                 '-ar', str(OPTIMAL_SAMPLE_RATE),  # Sample rate
                 '-ac', str(OPTIMAL_CHANNELS),     # Channels (mono)
                 '-sample_fmt', 's16',              # 16-bit PCM
+                '-threads', str(threads),
+                '-f', 'wav',
                 '-y' if (overwrite or use_temp_file) else '-n',  # Overwrite or not
-                str(actual_output)
+                actual_output
             ],
-            capture_output=True,
-            text=True,
-            timeout=60
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE if pipe_output else subprocess.DEVNULL,
+            stderr=subprocess.PIPE
         )
 
-        if result.returncode != 0:
-            error_msg = result.stderr.split('\n')[-2] if result.stderr else 'Unknown error'
-            # Clean up temp file on error
-            if use_temp_file and actual_output.exists():
-                actual_output.unlink()
-            return (False, f"ffmpeg error: {error_msg}")
-
-        temp_file_created = use_temp_file
-
-        # If using temp file, replace original with converted version
-        if use_temp_file:
-            actual_output.replace(output_path)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+
+        if proc.returncode != 0:
+            return (False, f"ffmpeg error: {_last_stderr_line(stderr)}")
+
+        if pipe_output:
+            # ffmpeg can't seek back on a pipe to fill in the chunk sizes
+            wav = bytearray(stdout)
+            _fix_wav_sizes(wav)
+            _write_replacing(output_path, wav)
+        elif temp_output is not None:
+            # Replace original with converted version, keeping its permissions
+            # rather than the temp file's 0600
+            os.chmod(temp_output, _output_file_mode(output_path))
+            os.replace(temp_output, output_path)
+            temp_output = None
 
         return (True, f"Converted: {output_path.name}")
 
     except subprocess.TimeoutExpired:
-        # Clean up temp file on timeout
-        if use_temp_file and actual_output.exists():
-            actual_output.unlink()
-        return (False, "Conversion timeout (>60s)")
+        return (False, f"Conversion timeout (>{timeout:.0f}s)")
     except subprocess.SubprocessError as e:
-        # Clean up temp file on error
-        if use_temp_file and actual_output.exists():
-            actual_output.unlink()
         return (False, f"Conversion error: {e}")
     except Exception as e:
-        # Clean up temp file on any unexpected error
-        if temp_file_created and actual_output.exists():
-            actual_output.unlink()
         return (False, f"Unexpected error: {e}")
+    finally:
+        # Clean up temp file if it was not moved into place
+        if temp_output is not None and temp_output.exists():
+            temp_output.unlink()
+
+
+def _convert_in_process(input_path: Path) -> Optional[bytes]:
+    """Convert a libsndfile-readable file to the optimal format in memory.
+
+    Args:
+        input_path: Path to input audio file.
+
+    Returns:
+        Complete WAV file contents, or None if libsndfile can't decode the
+        file or decoding it would exceed MEMORY_CONVERSION_LIMIT.
+    """
+    import io
+    from math import gcd
+
+    import numpy as np
+    from scipy.signal import resample_poly
+
+    try:
+        si = soundfile.info(str(input_path))
+        # Decoded float samples plus resample_poly's float64 intermediate
+        if si.frames * si.channels * 8 > MEMORY_CONVERSION_LIMIT:
+            return None
+        data, sample_rate = soundfile.read(str(input_path), dtype='float32', always_2d=True)
+    except Exception:
+        return None
+
+    mono = data[:, 0] if data.shape[1] == 1 else data.mean(axis=1, dtype=np.float32)
+
+    if sample_rate != OPTIMAL_SAMPLE_RATE:
+        g = gcd(OPTIMAL_SAMPLE_RATE, sample_rate)
+        mono = resample_poly(mono, OPTIMAL_SAMPLE_RATE // g, sample_rate // g).astype(np.float32)
+
+    # Resampling can overshoot full scale
+    np.clip(mono, -1.0, 1.0, out=mono)
+
+    buffer = io.BytesIO()
+    soundfile.write(buffer, mono, OPTIMAL_SAMPLE_RATE, subtype='PCM_16', format='WAV')
+    return buffer.getvalue()
+
+
+@functools.lru_cache(maxsize=None)
+def _umask() -> int:
+    """Return the process umask (read once; os.umask can only be read by setting it)."""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def _output_file_mode(output_path: Path) -> int:
+    """Return the permission bits a converted file should get.
+
+    Temp files are created 0600, so the mode is set explicitly before they
+    are renamed into place: an existing output keeps its mode, a new one
+    gets what open() would have given it under the current umask.
+
+    Args:
+        output_path: Destination path.
+
+    Returns:
+        Permission bits.
+    """
+    try:
+        return os.stat(output_path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_umask()
+
+
+def _write_replacing(output_path: Path, data: bytes) -> None:
+    """Write a file via a temp file in the same directory and rename it into place.
+
+    The original file (possibly the conversion's own input) stays intact
+    until the new contents are completely written.
+
+    Args:
+        output_path: Destination path.
+        data: File contents.
+
+    Raises:
+        OSError: If the file can't be written.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.stem}.",
+                                    suffix='.tmp.wav')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, _output_file_mode(output_path))
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _estimated_wav_size(duration: float) -> float:
+    """Estimate the size of audio once converted to the optimal WAV format.
+
+    Args:
+        duration: Audio duration in seconds (0 if unknown).
+
+    Returns:
+        Estimated size in bytes, or infinity if the duration is unknown.
+    """
+    if not duration:
+        return float('inf')
+    return 44 + duration * OPTIMAL_SAMPLE_RATE * OPTIMAL_CHANNELS * (OPTIMAL_BIT_DEPTH // 8)
+
+
+def _fix_wav_sizes(wav: bytearray) -> None:
+    """Fill in the RIFF and data chunk sizes of a WAV file written to a pipe.
+
+    Args:
+        wav: Complete WAV file contents, patched in place.
+    """
+    if len(wav) < 12 or wav[:4] != b'RIFF' or wav[8:12] != b'WAVE':
+        return
+
+    struct.pack_into('<I', wav, 4, len(wav) - 8)
+
+    offset = 12
+    while offset + 8 <= len(wav):
+        chunk_id = bytes(wav[offset:offset + 4])
+        if chunk_id == b'data':
+            struct.pack_into('<I', wav, offset + 4, len(wav) - offset - 8)
+            return
+        chunk_size = struct.unpack_from('<I', wav, offset + 4)[0]
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+
+def _last_stderr_line(stderr: bytes) -> str:
+    """Decode the last non-empty line of a subprocess's stderr.
+
+    Args:
+        stderr: Raw stderr bytes.
+
+    Returns:
+        Last non-empty line, or 'Unknown error' if there is none.
+    """
+    for line in reversed(stderr[-4096:].splitlines()):
+        if line.strip():
+            return line.decode('utf-8', errors='replace').strip()
+    return 'Unknown error'
+
+
+def _convert_worker(task: Tuple[Path, Path, bool, int, Optional[float]]) -> Tuple[bool, str]:
+    """Process pool entry point for convert_to_fingerprint_format.
+
+    Args:
+        task: Tuple of (input_path, output_path, overwrite, threads, duration).
+
+    Returns:
+        Tuple of (success, message).
+    """
+    input_path, output_path, overwrite, threads, duration = task
+    return convert_to_fingerprint_format(input_path, output_path, overwrite=overwrite,
+                                         threads=threads, duration=duration)
+
+
+def _conversion_check(file_path: Path) -> Tuple[bool, Optional[str], Optional[float]]:
+    """Run needs_conversion() and keep the probed duration for the converter.
+
+    Args:
+        file_path: Path to audio file.
+
+    Returns:
+        Tuple of (needs_conversion, reason, duration); duration is None if
+        the file could not be probed.
+    """
+    info = get_audio_info(file_path)
+    needs_conv, reason = needs_conversion(file_path, info=info)
+    return needs_conv, reason, info['duration'] if info is not None else None
 
 
 def find_audio_files(directory: Path, recursive: bool = True) -> List[Path]:
@@ -213,13 +837,41 @@ def find_audio_files(directory: Path, recursive: bool = True) -> List[Path]:
     """
     audio_files = []
 
-    pattern = '**/*' if recursive else '*'
+    # Single scandir pass with an explicit stack; DirEntry caches the file type
+    # so no extra stat calls are needed. Extension match is case-insensitive.
+    stack = [os.fspath(directory)]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            # Like os.walk, skip unreadable directories when recursing
+            if not recursive:
+                raise
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                    continue
 
-    for ext in SUPPORTED_EXTENSIONS:
-        audio_files.extend(directory.glob(f"{pattern}{ext}"))
-        audio_files.extend(directory.glob(f"{pattern}{ext.upper()}"))
+                _, dot, ext = entry.name.rpartition('.')
+                if dot and ext.lower() in _SUPPORTED_EXTENSION_NAMES and entry.is_file():
+                    audio_files.append(Path(entry.path))
 
-    return sorted(set(audio_files))
+    return sorted(audio_files)
+
+
+def _write_lines(lines: List[str]) -> None:
+    """Write several output lines to stdout in one call.
+
+    Args:
+        lines: Lines to write, without trailing newlines.
+    """
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
 
 
 def batch_convert_directory(
@@ -229,10 +881,14 @@ def batch_convert_directory(
     overwrite: bool = False,
     in_place: bool = False,
     dry_run: bool = False,
-    skip_optimal: bool = True
+    skip_optimal: bool = True,
+    max_workers: Optional[int] = None
 ) -> Dict:
     """Batch convert audio files in directory to optimal format.
 
+    Conversions run in a process pool so several ffmpeg instances work in
+    parallel; results are printed in file order.
+
     Args:
         directory: Directory containing audio files.
         output_dir: Output directory (if not in_place).
@@ -240,7 +896,9 @@ def batch_convert_directory(
         overwrite: Overwrite existing output files.
         in_place: Convert files in place (replace originals).
         dry_run: Preview changes without converting.
-        skip_optimal: Skip files already in optimal format.
+        skip_optimal: Skip files already in optimal format. When False (and
+            not a dry run) files are not probed with ffprobe at all.
+        max_workers: Number of parallel conversions (default: CPU count).
 
     Returns:
         Dictionary with conversion statistics.
@@ -270,47 +928,132 @@ def batch_convert_directory(
     else:
         print()
 
-    for i, input_file in enumerate(audio_files, 1):
-        # Check if needs conversion
-        needs_conv, reason = needs_conversion(input_file)
+    probe = skip_optimal or dry_run
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(audio_files)))
+    # One ffmpeg thread per job when several run at once
+    threads = 1 if workers > 1 else 0
 
-        prefix = f"[{i}/{len(audio_files)}]"
+    # Per file, in order: (action, input_file, reason, output_file)
+    entries: List[Tuple[str, Path, str, Optional[Path]]] = []
+    # Finished conversions (index -> (success, message)) awaiting ordered output
+    done: Dict[int, Tuple[bool, str]] = {}
+    next_index = 0
 
-        if not needs_conv and skip_optimal:
-            print(f"{prefix} SKIP: {input_file.name} ({reason})")
-            stats['skipped'] += 1
-            continue
-
-        # Determine output path
-        if in_place:
-            output_file = input_file.with_suffix('.wav')
-        elif output_dir:
-            # Preserve directory structure relative to input directory
-            relative_path = input_file.relative_to(directory)
-            output_file = output_dir / relative_path.with_suffix('.wav')
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-        else:
-            output_file = input_file.with_suffix('.wav')
+    def flush() -> None:
+        """Print every finished entry that is next in file order.
 
-        if dry_run:
-            print(f"{prefix} WOULD CONVERT: {input_file.name} ({reason})")
-            print(f"                 → {output_file.relative_to(directory.parent)}")
-            stats['converted'] += 1
-        else:
-            print(f"{prefix} CONVERTING: {input_file.name} ({reason})")
-            success, message = convert_to_fingerprint_format(
-                input_file,
-                output_file,
-                overwrite=overwrite
-            )
-
-            if success:
-                print(f"             ✓ {message}")
+        Lines are collected and written with a single stdout write per call
+        rather than one locked, flushed print() per line.
+        """
+        nonlocal next_index
+        lines = []
+        while next_index < len(entries):
+            action, input_file, reason, output_file = entries[next_index]
+            if action == 'convert' and next_index not in done:
+                break
+            next_index += 1
+            prefix = f"[{next_index}/{len(audio_files)}]"
+            suffix = f" ({reason})" if reason else ""
+
+            if action == 'skip':
+                lines.append(f"{prefix} SKIP: {input_file.name}{suffix}")
+                stats['skipped'] += 1
+            elif action == 'invalid':
+                lines.append(f"{prefix} INVALID: {input_file.name}{suffix}")
+                stats['failed'] += 1
+                stats['errors'].append(f"{input_file.name}: {reason}")
+            elif action == 'dry_run':
+                lines.append(f"{prefix} WOULD CONVERT: {input_file.name}{suffix}")
+                lines.append(f"                 → {output_file.relative_to(directory.parent)}")
                 stats['converted'] += 1
             else:
-                print(f"             ✗ {message}")
-                stats['failed'] += 1
-                stats['errors'].append(f"{input_file.name}: {message}")
+                success, message = done.pop(next_index - 1)
+                lines.append(f"{prefix} CONVERTING: {input_file.name}{suffix}")
+                if success:
+                    lines.append(f"             ✓ {message}")
+                    stats['converted'] += 1
+                else:
+                    lines.append(f"             ✗ {message}")
+                    stats['failed'] += 1
+                    stats['errors'].append(f"{input_file.name}: {message}")
+
+        if lines:
+            _write_lines(lines)
+
+    # Two-stage pipeline: probe threads run ahead (ffprobe is out of process)
+    # while each file is handed to the conversion pool as soon as its probe
+    # is in, so probe latency overlaps encoding instead of adding to it
+    converter = ProcessPoolExecutor(max_workers=workers) if workers > 1 and not dry_run else None
+    futures = {}
+    created_dirs = set()
+    outputs: Dict[Path, Path] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(audio_files))) as prober:
+            if probe:
+                checks = prober.map(_conversion_check, audio_files)
+            else:
+                # Every file gets converted anyway, so only files failing the
+                # cheap header check are probed before being called invalid
+                checks = ((True, "", None) if has_valid_header(f) else _conversion_check(f)
+                          for f in audio_files)
+
+            for index, (input_file, (needs_conv, reason, duration)) in enumerate(zip(audio_files, checks)):
+                reason = reason or ""
+
+                if not needs_conv and skip_optimal:
+                    entries.append(('skip', input_file, reason, None))
+                # Bad header and unreadable by ffprobe; don't spend an ffmpeg run on it
+                elif reason == INVALID_HEADER_REASON:
+                    entries.append(('invalid', input_file, reason, None))
+                else:
+                    # Determine output path
+                    if in_place:
+                        output_file = input_file.with_suffix('.wav')
+                    elif output_dir:
+                        # Preserve directory structure relative to input directory
+                        relative_path = input_file.relative_to(directory)
+                        output_file = output_dir / relative_path.with_suffix('.wav')
+                        # Create each output directory once, not once per file
+                        if not dry_run and output_file.parent not in created_dirs:
+                            output_file.parent.mkdir(parents=True, exist_ok=True)
+                            created_dirs.add(output_file.parent)
+                    else:
+                        output_file = input_file.with_suffix('.wav')
+
+                    # Inputs differing only in extension map to the same
+                    # output; only the first is converted so parallel jobs
+                    # never race on one file
+                    owner = outputs.setdefault(output_file, input_file)
+                    if owner != input_file:
+                        entries.append(('skip', input_file,
+                                        f"{output_file.name} already produced by {owner.name}", None))
+                    elif dry_run:
+                        entries.append(('dry_run', input_file, reason, output_file))
+                    else:
+                        entries.append(('convert', input_file, reason, output_file))
+                        # Workers reuse the probed duration rather than probing again
+                        task = (input_file, output_file, overwrite, threads, duration)
+                        if converter is None:
+                            done[index] = _convert_worker(task)
+                        else:
+                            try:
+                                futures[converter.submit(_convert_worker, task)] = index
+                            except BrokenProcessPool as e:
+                                done[index] = (False, f"Conversion error: {e}")
+
+                flush()
+
+        for future in as_completed(futures):
+            try:
+                done[futures[future]] = future.result()
+            except Exception as e:
+                # e.g. BrokenProcessPool after a worker was killed
+                done[futures[future]] = (False, f"Conversion error: {e}")
+            flush()
+    finally:
+        if converter is not None:
+            converter.shutdown()
+        _save_probe_cache()
 
     # Print summary
     print(f"\n{'='*60}")
@@ -328,6 +1071,108 @@ def batch_convert_directory(
     return stats
 
 
+@functools.lru_cache(maxsize=None)
+def _yaml_dumper():
+    """Return the libyaml-backed dumper when available (much faster than the
+    pure-Python one), falling back to SafeDumper."""
+    import yaml
+    return getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+# Strings PyYAML would emit unquoted: no indicators, quotes or leading/trailing
+# spaces (implicit types such as 'true' or '42' are checked separately)
+_PLAIN_SCALAR_RE = re.compile(r'[A-Za-z0-9_][A-Za-z0-9_ .()\-]*\Z')
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_resolver():
+    """Return a resolver for checking which plain scalars load as strings."""
+    import yaml
+    return yaml.resolver.Resolver()
+
+
+def _plain_yaml_string(value: str) -> bool:
+    """Check whether a string round-trips through YAML without quoting."""
+    if not _PLAIN_SCALAR_RE.match(value) or value.endswith(' '):
+        return False
+
+    import yaml
+    return _yaml_resolver().resolve(yaml.ScalarNode, value, (True, False)) == 'tag:yaml.org,2002:str'
+
+
+@functools.lru_cache(maxsize=64)
+def _yaml_scaffold_tail(metadata_items: Tuple, debounce_seconds: Optional[float]) -> str:
+    """Render the part of a scaffold that does not depend on the audio file.
+
+    Args:
+        metadata_items: Extra metadata fields as (key, value) pairs.
+        debounce_seconds: Optional MQTT debounce duration in seconds.
+
+    Returns:
+        YAML lines for the extra metadata fields (indented under 'metadata')
+        followed by the optional top-level debounce_seconds line.
+    """
+    import yaml
+    tail = ''
+    if metadata_items:
+        rendered = yaml.dump({'metadata': dict(metadata_items)}, Dumper=_yaml_dumper(),
+                             default_flow_style=False, sort_keys=False)
+        tail += rendered.split('\n', 1)[1]
+    if debounce_seconds is not None:
+        tail += yaml.dump({'debounce_seconds': debounce_seconds}, Dumper=_yaml_dumper(),
+                          default_flow_style=False)
+    return tail
+
+
+def _render_yaml_scaffold(scaffold: Dict, metadata: Optional[Dict],
+                          debounce_seconds: Optional[float]) -> str:
+    """Render a scaffold, emitting simple file names without the YAML emitter.
+
+    Only the source and song values vary between files in a batch, so when
+    both are plain strings they are formatted directly and the rest comes
+    from the cached _yaml_scaffold_tail(). Anything else goes through
+    yaml.dump.
+
+    Args:
+        scaffold: Scaffold dictionary as built by create_yaml_scaffold().
+        metadata: Extra metadata fields merged into the scaffold.
+        debounce_seconds: Optional MQTT debounce duration in seconds.
+
+    Returns:
+        YAML document text.
+    """
+    source = scaffold['source']
+    song = scaffold['metadata']['song']
+
+    if (not metadata or 'song' not in metadata) and _plain_yaml_string(source) and _plain_yaml_string(song):
+        try:
+            tail = _yaml_scaffold_tail(tuple(metadata.items()) if metadata else (), debounce_seconds)
+        except TypeError:
+            # Unhashable metadata values can't be cached
+            pass
+        else:
+            return f"source: {source}\nmetadata:\n  song: {song}\n{tail}"
+
+    import yaml
+    return yaml.dump(scaffold, Dumper=_yaml_dumper(), default_flow_style=False, sort_keys=False)
+
+
+def _write_file_bytes(path: Path, data: bytes) -> None:
+    """Write a small file with raw os calls, skipping Python's buffered IO layers.
+
+    Args:
+        path: File to create or truncate.
+        data: Complete file contents.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
 def create_yaml_scaffold(
     audio_file: Path,
     overwrite: bool = False,
@@ -373,10 +1218,10 @@ def create_yaml_scaffold(
     if debounce_seconds is not None:
         scaffold['debounce_seconds'] = debounce_seconds
 
-    # Write YAML file
+    # Write YAML file (render first, then write in one call)
     try:
-        with open(yaml_path, 'w') as f:
-            yaml.dump(scaffold, f, default_flow_style=False, sort_keys=False)
+        content = _render_yaml_scaffold(scaffold, metadata, debounce_seconds).encode('utf-8')
+        _write_file_bytes(yaml_path, content)
         return (True, f"Created: {yaml_path.name}")
     except Exception as e:
         return (False, f"Error writing YAML: {e}")
@@ -424,31 +1269,55 @@ def batch_create_yaml_scaffolds(
 
     print(f"\nFound {len(audio_files)} audio file(s) in {directory}\n")
 
-    for i, audio_file in enumerate(audio_files, 1):
-        prefix = f"[{i}/{len(audio_files)}]"
-
-        # Check if YAML already exists
-        yaml_path = audio_file.with_suffix('.yaml')
-        if yaml_path.exists() and skip_existing and not overwrite:
-            print(f"{prefix} SKIP: {audio_file.name} (YAML exists)")
-            stats['skipped'] += 1
-            continue
-
-        # Create YAML scaffold
-        success, message = create_yaml_scaffold(
+    def create(audio_file: Path) -> Tuple[bool, str]:
+        return create_yaml_scaffold(
             audio_file,
             overwrite=overwrite,
             metadata=metadata,
             debounce_seconds=debounce_seconds
         )
 
-        if success:
-            print(f"{prefix} ✓ {message}")
-            stats['created'] += 1
-        else:
-            print(f"{prefix} ✗ {message}")
-            stats['failed'] += 1
-            stats['errors'].append(f"{audio_file.name}: {message}")
+    # Writes are small and I/O-bound, so a thread pool overlaps them; results
+    # are reported in file order
+    with ThreadPoolExecutor(max_workers=YAML_WORKERS) as executor:
+        futures = []
+        for audio_file in audio_files:
+            # Check if YAML already exists
+            yaml_path = audio_file.with_suffix('.yaml')
+            if yaml_path.exists() and skip_existing and not overwrite:
+                futures.append(None)
+            else:
+                futures.append(executor.submit(create, audio_file))
+
+        # Scaffolds finish far faster than a terminal scrolls, so output is
+        # batched and written at most every PROGRESS_INTERVAL seconds
+        lines = []
+        last_write = time.monotonic()
+
+        for i, (audio_file, future) in enumerate(zip(audio_files, futures), 1):
+            prefix = f"[{i}/{len(audio_files)}]"
+
+            if future is None:
+                lines.append(f"{prefix} SKIP: {audio_file.name} (YAML exists)")
+                stats['skipped'] += 1
+            else:
+                success, message = future.result()
+                if success:
+                    lines.append(f"{prefix} ✓ {message}")
+                    stats['created'] += 1
+                else:
+                    lines.append(f"{prefix} ✗ {message}")
+                    stats['failed'] += 1
+                    stats['errors'].append(f"{audio_file.name}: {message}")
+
+            now = time.monotonic()
+            if now - last_write >= PROGRESS_INTERVAL:
+                _write_lines(lines)
+                lines.clear()
+                last_write = now
+
+        if lines:
+            _write_lines(lines)
 
     # Print summary
     print(f"\n{'='*60}")
@@ -466,6 +1335,9 @@ def batch_create_yaml_scaffolds(
     return stats
 
 
+# Frames per recorder.record() call (~93ms at 44.1kHz)
+RECORD_BLOCK_FRAMES = 4096
+
 # Global flag for handling interrupt signal
 _recording_active = False
 
@@ -501,6 +1373,9 @@ def record_audio(
     """
     global _recording_active
 
+    import numpy as np
+    from audio_device import select_device
+
     # Register signal handler for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
 
@@ -515,6 +1390,8 @@ def record_audio(
     if device is None:
         return (False, "No suitable device found")
 
+    print(f"\nSelected device: {device.name}")
+
     # Check if output file already exists
     if output_path.exists():
         return (False, f"Output file already exists: {output_path}")
@@ -534,23 +1411,41 @@ def record_audio(
     device_channels = device.channels
     print(f"Device channels: {device_channels}")
 
+    # Preallocate the capture buffer (full length when duration is known,
+    # otherwise one minute) and grow it geometrically if needed
+    capacity = int(duration * sample_rate) + sample_rate if duration else 60 * sample_rate
+    buffer = np.empty((capacity, device_channels), dtype=np.float32)
+    write_idx = 0
+
     # Start recording
     _recording_active = True
     start_time = time.time()
-    chunks = []
+    last_print = 0.0
 
     try:
         # Record at device's native channel count
         with device.recorder(samplerate=sample_rate, channels=device_channels) as recorder:
             while _recording_active:
-                # Record in 0.5s chunks
-                chunk = recorder.record(numframes=int(sample_rate * 0.5))
-                chunks.append(chunk)
+                # Record in small blocks; soundcard buffers between calls
+                chunk = recorder.record(numframes=RECORD_BLOCK_FRAMES)
+                chunk = chunk.reshape(len(chunk), -1)
+                n = len(chunk)
+
+                if write_idx + n > len(buffer):
+                    grown = np.empty((max(2 * len(buffer), write_idx + n), buffer.shape[1]), dtype=np.float32)
+                    grown[:write_idx] = buffer[:write_idx]
+                    buffer = grown
+
+                buffer[write_idx:write_idx + n] = chunk
+                write_idx += n
 
-                elapsed = time.time() - start_time
+                now = time.time()
+                elapsed = now - start_time
 
-                # Print progress
-                print(f"\rRecording... {elapsed:.1f}s", end='', flush=True)
+                # Print progress on a wall-clock cadence, not per block
+                if now - last_print >= PROGRESS_INTERVAL:
+                    print(f"\rRecording... {elapsed:.1f}s", end='', flush=True)
+                    last_print = now
 
                 # Check duration limit
                 if duration and elapsed >= duration:
@@ -559,17 +1454,20 @@ def record_audio(
     except Exception as e:
         return (False, f"Recording error: {e}")
 
-    # Concatenate all chunks
-    if not chunks:
+    if write_idx == 0:
         return (False, "No audio data recorded")
 
-    audio_data = np.concatenate(chunks, axis=0)
+    audio_data = buffer[:write_idx]
 
-    # Convert to mono if stereo/multi-channel
-    if audio_data.ndim > 1 and audio_data.shape[1] > 1:
+    # Convert to mono if stereo/multi-channel (stay in float32)
+    if audio_data.shape[1] == 2:
+        # Stereo: add the two column views, halve in place
+        audio_data = audio_data[:, 0] + audio_data[:, 1]
+        audio_data *= 0.5
+    elif audio_data.shape[1] > 2:
         # Average all channels to mono
-        audio_data = np.mean(audio_data, axis=1)
-    elif audio_data.ndim > 1:
+        audio_data = audio_data.mean(axis=1, dtype=np.float32)
+    else:
         # Single channel, flatten
         audio_data = audio_data[:, 0]
 
@@ -577,20 +1475,21 @@ def record_audio(
 
     # Save to WAV file
     try:
-        # Ensure audio is mono at this point
-        if audio_data.ndim > 1:
-            audio_data = audio_data.flatten()
-
-        # Write WAV file
-        import wave
-        with wave.open(str(output_path), 'w') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(sample_rate)
-
-            # Convert float32 to int16
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            wav_file.writeframes(audio_int16.tobytes())
+        # Convert float32 to int16, clipping to avoid wraparound
+        np.clip(audio_data, -1.0, 1.0, out=audio_data)
+        audio_data *= 32767.0
+        audio_int16 = audio_data.astype(np.int16)
+
+        # Write WAV file (libsndfile writes straight from the array)
+        if HAS_SOUNDFILE:
+            soundfile.write(str(output_path), audio_int16, sample_rate, subtype='PCM_16', format='WAV')
+        else:
+            import wave
+            with wave.open(str(output_path), 'w') as wav_file:
+                wav_file.setnchannels(1)  # Mono
+                wav_file.setsampwidth(2)  # 16-bit
+                wav_file.setframerate(sample_rate)
+                wav_file.writeframes(audio_int16.tobytes())
 
         print(f"\n\n✓ Recording saved: {output_path.name}")
         print(f"  Duration: {duration_actual:.2f}s")
@@ -604,6 +1503,141 @@ def record_audio(
         _recording_active = False
 
 
+def _cmd_info(args: argparse.Namespace) -> int:
+    """Handle the info command."""
+    if not args.path.exists():
+        print(f"Error: File not found: {args.path}")
+        return 1
+
+    info = get_audio_info(args.path)
+    if info is None:
+        print(f"Error: Unable to read audio info from {args.path}")
+        return 1
+
+    needs_conv, reason = needs_conversion(args.path, info=info)
+
+    print(f"\nAudio File: {args.path.name}")
+    print(f"  Sample rate:  {info['sample_rate']} Hz")
+    print(f"  Channels:     {info['channels']}")
+    print(f"  Codec:        {info['codec']}")
+    print(f"  Duration:     {info['duration']:.2f}s")
+    print(f"  Format:       {args.path.suffix}")
+    print(f"\nOptimal format: {OPTIMAL_SAMPLE_RATE}Hz, {OPTIMAL_CHANNELS}ch, .{OPTIMAL_FORMAT}")
+    print(f"Needs conversion: {needs_conv}")
+    if needs_conv:
+        print(f"  Changes: {reason}")
+
+    return 0
+
+
+def _cmd_convert(args: argparse.Namespace) -> int:
+    """Handle the convert command."""
+    if args.path.is_file():
+        # Single file conversion
+        info = get_audio_info(args.path)
+        success, message = convert_to_fingerprint_format(
+            args.path,
+            args.output,
+            overwrite=args.overwrite,
+            duration=info['duration'] if info is not None else None
+        )
+        print(message)
+        return 0 if success else 1
+
+    elif args.path.is_dir():
+        # Batch conversion
+        stats = batch_convert_directory(
+            args.path,
+            output_dir=args.output,
+            recursive=args.recursive,
+            overwrite=args.overwrite,
+            in_place=args.in_place,
+            dry_run=args.dry_run,
+            skip_optimal=not args.include_optimal,
+            max_workers=args.jobs
+        )
+        return 0 if stats.get('failed', 0) == 0 else 1
+
+    else:
+        print(f"Error: Path not found: {args.path}")
+        return 1
+
+
+def _cmd_create_yaml(args: argparse.Namespace) -> int:
+    """Handle the create-yaml command."""
+    # Build additional metadata from --meta KEY=VALUE arguments
+    additional_metadata = {}
+    if args.meta:
+        for item in args.meta:
+            if '=' not in item:
+                print(f"Error: Invalid --meta format: '{item}' (expected KEY=VALUE)")
+                return 1
+            key, value = item.split('=', 1)
+            additional_metadata[key] = value
+
+    if args.path.is_file():
+        # Single file YAML creation
+        success, message = create_yaml_scaffold(
+            args.path,
+            overwrite=args.overwrite,
+            metadata=additional_metadata if additional_metadata else None,
+            debounce_seconds=args.debounce
+        )
+        print(message)
+        return 0 if success else 1
+
+    elif args.path.is_dir():
+        # Batch YAML creation
+        stats = batch_create_yaml_scaffolds(
+            args.path,
+            recursive=args.recursive,
+            overwrite=args.overwrite,
+            skip_existing=not args.include_existing,
+            metadata=additional_metadata if additional_metadata else None,
+            debounce_seconds=args.debounce
+        )
+        return 0 if stats.get('failed', 0) == 0 else 1
+
+    else:
+        print(f"Error: Path not found: {args.path}")
+        return 1
+
+
+def _cmd_record(args: argparse.Namespace) -> int:
+    """Handle the record command."""
+    # List devices if requested
+    if args.list_devices:
+        from audio_device import list_audio_devices, print_devices
+        devices = list_audio_devices(include_loopback=True)
+        print_devices(devices)
+        return 0
+
+    # Record audio
+    success, message = record_audio(
+        output_path=args.output,
+        device_id=args.device_id,
+        device_name=args.device,
+        use_microphone=args.microphone,
+        duration=args.duration,
+        sample_rate=args.sample_rate
+    )
+
+    if not success:
+        print(f"Error: {message}")
+        return 1
+
+    return 0
+
+
+# Subcommand name -> handler
+_COMMANDS = {
+    'info': _cmd_info,
+    'convert': _cmd_convert,
+    'create-yaml': _cmd_create_yaml,
+    'record': _cmd_record,
+}
+
+
 def main():
     """CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -639,7 +1673,9 @@ Examples:
     convert_parser.add_argument('--overwrite', action='store_true', help='Overwrite existing output files')
     convert_parser.add_argument('--in-place', action='store_true', help='Convert files in place (replace originals)')
     convert_parser.add_argument('--dry-run', action='store_true', help='Preview changes without converting')
-    convert_parser.add_argument('--include-optimal', action='store_true', help='Include files already in optimal format')
+    convert_parser.add_argument('--include-optimal', action='store_true', help='Include files already in optimal format (skips the ffprobe pre-scan)')
+    convert_parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                              help='Number of parallel conversions (default: CPU count)')
 
     # Info command
     info_parser = subparsers.add_parser('info', help='Show audio file information')
@@ -673,119 +1709,7 @@ Examples:
         parser.print_help()
         return 1
 
-    if args.command == 'info':
-        if not args.path.exists():
-            print(f"Error: File not found: {args.path}")
-            return 1
-
-        info = get_audio_info(args.path)
-        if info is None:
-            print(f"Error: Unable to read audio info from {args.path}")
-            return 1
-
-        needs_conv, reason = needs_conversion(args.path)
-
-        print(f"\nAudio File: {args.path.name}")
-        print(f"  Sample rate:  {info['sample_rate']} Hz")
-        print(f"  Channels:     {info['channels']}")
-        print(f"  Codec:        {info['codec']}")
-        print(f"  Duration:     {info['duration']:.2f}s")
-        print(f"  Format:       {args.path.suffix}")
-        print(f"\nOptimal format: {OPTIMAL_SAMPLE_RATE}Hz, {OPTIMAL_CHANNELS}ch, .{OPTIMAL_FORMAT}")
-        print(f"Needs conversion: {needs_conv}")
-        if needs_conv:
-            print(f"  Changes: {reason}")
-
-        return 0
-
-    if args.command == 'convert':
-        if args.path.is_file():
-            # Single file conversion
-            success, message = convert_to_fingerprint_format(
-                args.path,
-                args.output,
-                overwrite=args.overwrite
-            )
-            print(message)
-            return 0 if success else 1
-
-        elif args.path.is_dir():
-            # Batch conversion
-            stats = batch_convert_directory(
-                args.path,
-                output_dir=args.output,
-                recursive=args.recursive,
-                overwrite=args.overwrite,
-                in_place=args.in_place,
-                dry_run=args.dry_run,
-                skip_optimal=not args.include_optimal
-            )
-            return 0 if stats.get('failed', 0) == 0 else 1
-
-        else:
-            print(f"Error: Path not found: {args.path}")
-            return 1
-
-    if args.command == 'create-yaml':
-        # Build additional metadata from --meta KEY=VALUE arguments
-        additional_metadata = {}
-        if args.meta:
-            for item in args.meta:
-                if '=' not in item:
-                    print(f"Error: Invalid --meta format: '{item}' (expected KEY=VALUE)")
-                    return 1
-                key, value = item.split('=', 1)
-                additional_metadata[key] = value
-
-        if args.path.is_file():
-            # Single file YAML creation
-            success, message = create_yaml_scaffold(
-                args.path,
-                overwrite=args.overwrite,
-                metadata=additional_metadata if additional_metadata else None,
-                debounce_seconds=args.debounce
-            )
-            print(message)
-            return 0 if success else 1
-
-        elif args.path.is_dir():
-            # Batch YAML creation
-            stats = batch_create_yaml_scaffolds(
-                args.path,
-                recursive=args.recursive,
-                overwrite=args.overwrite,
-                skip_existing=not args.include_existing,
-                metadata=additional_metadata if additional_metadata else None,
-                debounce_seconds=args.debounce
-            )
-            return 0 if stats.get('failed', 0) == 0 else 1
-
-        else:
-            print(f"Error: Path not found: {args.path}")
-            return 1
-
-    if args.command == 'record':
-        # List devices if requested
-        if args.list_devices:
-            devices = list_audio_devices(include_loopback=True)
-            print_devices(devices)
-            return 0
-
-        # Record audio
-        success, message = record_audio(
-            output_path=args.output,
-            device_id=args.device_id,
-            device_name=args.device,
-            use_microphone=args.microphone,
-            duration=args.duration,
-            sample_rate=args.sample_rate
-        )
-
-        if not success:
-            print(f"Error: {message}")
-            return 1
-
-        return 0
+    return _COMMANDS[args.command](args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,36 @@
+"""JSON serialization for payloads and stored metadata.
+
+Uses orjson when installed, otherwise the standard library json module.
+Output is UTF-8 without ASCII escaping in both cases.
+"""
+
+import json
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+if HAS_ORJSON:
+    # NumPy scalars (e.g. Dejavu's offset_seconds) and non-str keys are
+    # accepted by json.dumps, so allow them here as well
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        """Serialize obj to UTF-8 encoded JSON."""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        """Serialize obj to UTF-8 encoded JSON."""
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    loads = json.loads
+
+
+def dumps_text(obj) -> str:
+    """Serialize obj to a JSON string."""
+    return dumps(obj).decode('utf-8')
@@ -0,0 +1,65 @@
+"""Match expansion kernel for MemoryDatabase.return_matches.
+
+Uses a numba-compiled loop when numba is installed, otherwise an equivalent
+vectorized NumPy implementation.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _expand_matches_numpy(order, sids, offsets, lo, counts, query_offsets):
+    """Expand sorted-view hit ranges into (song_id, offset_difference) arrays.
+
+    Args:
+        order: Row numbers in hash order.
+        sids: Song ID per row.
+        offsets: Offset per row.
+        lo: Start of each query hash's range in the sorted view.
+        counts: Length of each query hash's range.
+        query_offsets: Offset of each query hash in the sample.
+
+    Returns:
+        Tuple of (song_ids, offset_differences) arrays, grouped by query hash.
+    """
+    total = int(counts.sum())
+    starts = np.cumsum(counts) - counts
+    rows = order[np.repeat(lo - starts, counts) + np.arange(total)]
+    return sids[rows], offsets[rows] - np.repeat(query_offsets, counts)
+
+
+if HAS_NUMBA:
+    @njit(cache=True, boundscheck=False)
+    def _expand_matches_numba(order, sids, offsets, lo, counts, query_offsets):
+        """Compiled single-pass version of _expand_matches_numpy."""
+        total = 0
+        for i in range(counts.size):
+            total += counts[i]
+
+        out_sids = np.empty(total, np.int32)
+        out_diffs = np.empty(total, np.int64)
+        n = 0
+        for i in range(counts.size):
+            query_offset = query_offsets[i]
+            for j in range(lo[i], lo[i] + counts[i]):
+                row = order[j]
+                out_sids[n] = sids[row]
+                out_diffs[n] = offsets[row] - query_offset
+                n += 1
+        return out_sids, out_diffs
+
+    expand_matches = _expand_matches_numba
+else:
+    expand_matches = _expand_matches_numpy
+
+
+def warm_up():
+    """Compile the numba kernel ahead of the first recognition (no-op without numba)."""
+    if HAS_NUMBA:
+        empty = np.zeros(0, np.int64)
+        expand_matches(empty, np.zeros(0, np.int32), np.zeros(0, np.int32), empty, empty, empty)
@@ -1,22 +1,116 @@
 """Fingerprint engine using Dejavu for audio recognition."""
 
+import collections
+import hashlib
+import operator
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Any
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union, Any
 
 import numpy as np
 
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
 # Import database adapters BEFORE importing Dejavu to register them
 from .memory_db import MemoryDatabase  # noqa: F401
 from .postgres_db import PostgreSQLDatabase  # noqa: F401
 
-from dejavu import Dejavu
+from dejavu import Dejavu, _fingerprint_worker, decoder
+from dejavu.database import Database
 from dejavu.recognize import FileRecognizer, MicrophoneRecognizer
 
 from .storage_config import get_database_config, DatabaseType
 from .metadata_db import MetadataDB
 
 
+# Number of recent recognize_audio() results kept, keyed by sample content
+RECOGNITION_CACHE_SIZE = 64
+
+
+def _file_sha1(file_path: str) -> str:
+    """Return the uppercase hex SHA-1 of a file, like dejavu.decoder.unique_hash.
+
+    hashlib.file_digest (Python 3.11+) reads straight into OpenSSL's SHA-1
+    (SHA-NI on CPUs that have it) instead of Dejavu's chunked Python read
+    loop; older Pythons use Dejavu's function. The digest is stored as
+    file_sha1 in SQL backends, so it must stay SHA-1 for duplicate detection.
+
+    Args:
+        file_path: Path to file.
+
+    Returns:
+        Uppercase hex digest.
+    """
+    if not hasattr(hashlib, 'file_digest'):
+        return decoder.unique_hash(file_path)
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha1').hexdigest().upper()
+
+
+def _song_row_adapter(db: Database) -> Callable[[Any], Dict]:
+    """Build a converter from a backend's song rows to {'id', 'name'} dicts.
+
+    MemoryDatabase and Dejavu's MySQL backend yield dict rows; psycopg2's
+    DictRow (PostgreSQL) is a list, so its fields are read by position.
+
+    Args:
+        db: Dejavu database instance.
+
+    Returns:
+        Function converting one song row.
+    """
+    if isinstance(db, PostgreSQLDatabase):
+        fields = operator.itemgetter(0, 1)
+    else:
+        fields = operator.itemgetter(Database.FIELD_SONG_ID, Database.FIELD_SONGNAME)
+
+    def song_row_to_dict(row) -> Dict:
+        song_id, name = fields(row)
+        return {'id': song_id, 'name': name}
+
+    return song_row_to_dict
+
+
+def _samples_key(samples: np.ndarray) -> bytes:
+    """Return a fast 64-bit content hash of a sample buffer."""
+    buffer = np.ascontiguousarray(samples)
+    if HAS_XXHASH:
+        return xxhash.xxh3_64_digest(buffer)
+    return hashlib.blake2b(buffer, digest_size=8).digest()
+
+
+def _iter_audio_files(root: str, extensions: List[str], recursive: bool = True) -> Iterator[str]:
+    """Yield paths of audio files under a directory in a single scan.
+
+    Args:
+        root: Directory to search.
+        extensions: File extensions to include (case-insensitive).
+        recursive: Search subdirectories.
+
+    Yields:
+        File paths as strings.
+    """
+    # One scandir pass matches every extension at once; DirEntry caches the
+    # file type, and symlinked directories are not followed
+    # endswith() tries suffixes in order, so put the usual format first
+    suffixes = tuple(sorted(dict.fromkeys(ext.lower() for ext in extensions),
+                            key=lambda ext: ext != '.wav'))
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                    yield entry.path
+
+
 class FingerprintEngine:
     """Wrapper for Dejavu audio fingerprinting engine with metadata support."""
 
@@ -37,6 +131,16 @@ class FingerprintEngine:
         self.dejavu = Dejavu(self.config)
         self.metadata_db = MetadataDB(self.config)
 
+        # (samples hash, sample rate) -> Dejavu match, most recent last
+        self._recog_cache = collections.OrderedDict()
+
+        # Bound methods for the per-recognition path
+        self._recognize = self.dejavu.recognize
+        self._find_matches = self.dejavu.find_matches
+        self._align_matches = self.dejavu.align_matches
+        self._get_meta = self.metadata_db.get_metadata
+        self._song_row_to_dict = _song_row_adapter(self.dejavu.db)
+
     def register_file(self,
                      file_path: str,
                      song_name: Optional[str] = None,
@@ -56,6 +160,7 @@ class FingerprintEngine:
 
         # Fingerprint the file
         self.dejavu.fingerprint_file(file_path, song_name=song_name)
+        self._recog_cache.clear()
 
         # Store metadata if provided
         if metadata:
@@ -72,44 +177,137 @@ class FingerprintEngine:
             'has_metadata': metadata is not None
         }
 
+    def _store_fingerprints(self, song_name: str, hashes, file_hash: str) -> None:
+        """Insert a fingerprinted song into the database.
+
+        Args:
+            song_name: Name to associate with fingerprint.
+            hashes: Iterable of (hash, offset) tuples.
+            file_hash: SHA-1 of the source file.
+        """
+        db = self.dejavu.db
+        sid = db.insert_song(song_name, file_hash)
+        db.insert_hashes(sid, hashes)
+        db.set_song_fingerprinted(sid)
+
+    def _register_file_fast(self, file_path: str, song_name: Optional[str] = None) -> None:
+        """Fingerprint and store one file without metadata or a result dict.
+
+        Used for batch registration; the caller handles duplicate detection,
+        error collection and refreshing Dejavu's list of fingerprinted songs.
+
+        Args:
+            file_path: Path to audio file.
+            song_name: Name to associate with fingerprint (defaults to filename).
+
+        Raises:
+            Exception: If the file cannot be decoded or stored.
+        """
+        if song_name is None:
+            song_name = os.path.splitext(os.path.basename(file_path))[0]
+
+        self._store_fingerprints(*_fingerprint_worker(file_path, self.dejavu.limit, song_name=song_name))
+
+    def _register_files(self,
+                        files: List[Tuple[str, str]],
+                        max_workers: Optional[int] = None) -> List[Dict]:
+        """Fingerprint files in parallel and store them in the database.
+
+        Fingerprinting (decoding, FFT, peak finding) is CPU-bound and
+        independent per file, so it runs in worker processes. Database
+        inserts stay in this process, in file order.
+
+        Args:
+            files: List of (file_path, song_name) tuples.
+            max_workers: Number of worker processes (default: CPU count).
+
+        Returns:
+            List of registration results, in the order of files.
+        """
+        results: List[Optional[Dict]] = [None] * len(files)
+        pending = []
+
+        # Skip files already fingerprinted (same check as Dejavu.fingerprint_file),
+        # including duplicates within this batch
+        seen_hashes = set(self.dejavu.songhashes_set)
+        for index, (file_path, song_name) in enumerate(files):
+            try:
+                file_hash = _file_sha1(file_path)
+            except Exception as e:
+                results[index] = {'file': file_path, 'song_name': song_name, 'status': 'error', 'error': str(e)}
+                continue
+
+            if file_hash in seen_hashes:
+                print(f"{song_name} already fingerprinted, continuing...")
+                results[index] = {'file': file_path, 'song_name': song_name,
+                                  'status': 'registered', 'has_metadata': False}
+                continue
+
+            seen_hashes.add(file_hash)
+            pending.append(index)
+
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(pending)))
+        errors = {}
+
+        if workers == 1:
+            for index in pending:
+                try:
+                    self._register_file_fast(*files[index])
+                except Exception as e:
+                    errors[index] = e
+        else:
+            limit = self.dejavu.limit
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [(index, executor.submit(_fingerprint_worker, files[index][0], limit,
+                                                   song_name=files[index][1]))
+                           for index in pending]
+                for index, future in futures:
+                    try:
+                        self._store_fingerprints(*future.result())
+                    except Exception as e:
+                        errors[index] = e
+
+        for index in pending:
+            file_path, song_name = files[index]
+            if index in errors:
+                results[index] = {'file': file_path, 'song_name': song_name,
+                                  'status': 'error', 'error': str(errors[index])}
+            else:
+                results[index] = {'file': file_path, 'song_name': song_name,
+                                  'status': 'registered', 'has_metadata': False}
+
+        if pending:
+            self.dejavu.get_fingerprinted_songs()
+            self._recog_cache.clear()
+
+        return results
+
     def register_directory(self,
                           directory: str,
                           extensions: List[str] = ['.wav', '.mp3', '.m4a', '.ogg', '.flac'],
-                          recursive: bool = True) -> List[Dict]:
+                          recursive: bool = True,
+                          max_workers: Optional[int] = None) -> List[Dict]:
         """Register all audio files in a directory.
 
         Args:
             directory: Path to directory.
             extensions: List of file extensions to include.
             recursive: Search subdirectories.
+            max_workers: Number of parallel fingerprinting processes
+                (default: CPU count).
 
         Returns:
             List of registration results.
         """
-        directory_path = Path(directory)
-        results = []
-
-        # Find all audio files
-        pattern = '**/*' if recursive else '*'
-        for ext in extensions:
-            for file_path in directory_path.glob(f"{pattern}{ext}"):
-                if file_path.is_file():
-                    try:
-                        result = self.register_file(str(file_path))
-                        results.append(result)
-                    except Exception as e:
-                        results.append({
-                            'file': str(file_path),
-                            'song_name': None,
-                            'status': 'error',
-                            'error': str(e)
-                        })
+        files = [(file_path, os.path.splitext(os.path.basename(file_path))[0])
+                 for file_path in sorted(_iter_audio_files(directory, extensions, recursive))]
 
-        return results
+        return self._register_files(files, max_workers=max_workers)
 
     def register_directory_by_class(self,
                                     training_dir: str,
-                                    extensions: List[str] = ['.wav', '.mp3', '.m4a', '.ogg', '.flac']) -> Dict:
+                                    extensions: List[str] = ['.wav', '.mp3', '.m4a', '.ogg', '.flac'],
+                                    max_workers: Optional[int] = None) -> Dict:
         """Register audio files organized by class folders.
 
         Expects structure: training_dir/class_name/*.wav
@@ -117,37 +315,32 @@ class FingerprintEngine:
         Args:
             training_dir: Path to training directory.
             extensions: List of file extensions to include.
+            max_workers: Number of parallel fingerprinting processes
+                (default: CPU count).
 
         Returns:
             Dictionary mapping class names to registration results.
         """
-        training_path = Path(training_dir)
         results_by_class = {}
+        files = []
+        classes = []
 
-        # Iterate over class directories
-        for class_dir in training_path.iterdir():
-            if class_dir.is_dir():
-                class_name = class_dir.name
-                class_results = []
-
-                # Register all files in class directory
-                for ext in extensions:
-                    for file_path in class_dir.glob(f"*{ext}"):
-                        if file_path.is_file():
-                            # Use class_name as song_name prefix
-                            song_name = f"{class_name}_{file_path.stem}"
-                            try:
-                                result = self.register_file(str(file_path), song_name=song_name)
-                                class_results.append(result)
-                            except Exception as e:
-                                class_results.append({
-                                    'file': str(file_path),
-                                    'song_name': song_name,
-                                    'status': 'error',
-                                    'error': str(e)
-                                })
-
-                results_by_class[class_name] = class_results
+        # Iterate over class directories; all classes are fingerprinted as one batch
+        with os.scandir(training_dir) as class_dirs:
+            class_dirs = sorted((entry.name, entry.path) for entry in class_dirs if entry.is_dir())
+
+        for class_name, class_path in class_dirs:
+            results_by_class[class_name] = []
+
+            for file_path in sorted(_iter_audio_files(class_path, extensions, recursive=False)):
+                # Use class_name as song_name prefix
+                stem = os.path.splitext(os.path.basename(file_path))[0]
+                files.append((file_path, f"{class_name}_{stem}"))
+                classes.append(class_name)
+
+        results = self._register_files(files, max_workers=max_workers)
+        for class_name, result in zip(classes, results):
+            results_by_class[class_name].append(result)
 
         return results_by_class
 
@@ -161,12 +354,23 @@ class FingerprintEngine:
         Returns:
             Match result or None if no match.
         """
-        results = self.dejavu.recognize(FileRecognizer, file_path)
+        results = self._recognize(FileRecognizer, file_path)
+        return self._format_match(results, include_metadata)
+
+    def _format_match(self, results: Optional[Dict], include_metadata: bool) -> Optional[Dict]:
+        """Build a match result from Dejavu's aligned match.
+
+        Args:
+            results: Dejavu match dictionary, or None if nothing matched.
+            include_metadata: Whether to include metadata in result.
 
+        Returns:
+            Match result or None if no match.
+        """
         if results:
             # Extract class name from song_name (format: class_name_filename)
             song_name = results.get('song_name', '')
-            class_name = song_name.split('_')[0] if '_' in song_name else song_name
+            class_name = song_name.partition('_')[0]
 
             # Dejavu returns 'confidence' as number of matched hashes
             matched_hashes = results.get('confidence', 0)
@@ -194,7 +398,7 @@ class FingerprintEngine:
 
             # Add metadata if requested
             if include_metadata:
-                metadata_entry = self.metadata_db.get_metadata(song_name)
+                metadata_entry = self._get_meta(song_name)
                 if metadata_entry:
                     result['metadata'] = metadata_entry['metadata']
 
@@ -208,6 +412,11 @@ class FingerprintEngine:
                        include_metadata: bool = True) -> Optional[Dict]:
         """Recognize audio from numpy array.
 
+        Matches for the last RECOGNITION_CACHE_SIZE distinct inputs are
+        cached by sample content until songs are registered or deleted.
+        Inputs without a match are not cached, so songs added to a shared
+        database by another process are found on the next attempt.
+
         Args:
             audio_data: Audio samples as numpy array.
             sample_rate: Sample rate in Hz.
@@ -216,28 +425,45 @@ class FingerprintEngine:
         Returns:
             Match result or None if no match.
         """
-        # Dejavu expects mono audio as 1D array
+        # Dejavu expects mono audio as 1D array; downmix without upcasting
+        # to float64 (integer samples are averaged in an int32 accumulator)
         if audio_data.ndim > 1:
-            audio_data = audio_data.mean(axis=1)
+            channels = audio_data.shape[1]
+            if audio_data.dtype.kind in 'iu':
+                mono = np.empty(audio_data.shape[0], dtype=np.int32)
+                np.sum(audio_data, axis=1, dtype=np.int32, out=mono)
+                mono //= channels
+                audio_data = mono.astype(np.int16, copy=False)
+            else:
+                audio_data = audio_data.mean(axis=1, dtype=audio_data.dtype)
 
         # Convert to int16 if float
-        if audio_data.dtype == np.float32 or audio_data.dtype == np.float64:
-            audio_data = (audio_data * 32767).astype(np.int16)
-
-        # Write to temporary WAV file (Dejavu limitation)
-        import tempfile
-        from scipy.io import wavfile
-
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-            wavfile.write(tmp_path, sample_rate, audio_data)
+        if audio_data.dtype.kind == 'f':
+            scaled = np.multiply(audio_data, 32767, out=np.empty_like(audio_data))
+            audio_data = scaled.astype(np.int16, copy=False)
+
+        # Fingerprint and match the samples directly, as FileRecognizer does
+        # after decoding a file (including its fingerprint_limit cut-off)
+        limit = self.dejavu.limit
+        if limit:
+            audio_data = audio_data[:int(limit * sample_rate)]
+
+        # Replayed audio (same alarm loop, repeated trigger) reuses the last match
+        key = (_samples_key(audio_data), sample_rate)
+        cache = self._recog_cache
+        if key in cache:
+            cache.move_to_end(key)
+            results = cache[key]
+        else:
+            matches = self._find_matches(audio_data, Fs=sample_rate)
+            results = self._align_matches(matches)
 
-        try:
-            result = self.recognize_file(tmp_path, include_metadata=include_metadata)
-        finally:
-            os.unlink(tmp_path)
+            if results:
+                cache[key] = results
+                if len(cache) > RECOGNITION_CACHE_SIZE:
+                    cache.popitem(last=False)
 
-        return result
+        return self._format_match(results, include_metadata)
 
     def get_songs(self) -> List[Dict]:
         """Get list of registered songs.
@@ -245,19 +471,9 @@ class FingerprintEngine:
         Returns:
             List of song dictionaries with id and name.
         """
-        db = self.dejavu.db
-        songs = db.get_songs()
-        result = []
-        for song in songs:
-            # Handle both dict (MemoryDatabase) and tuple (SQL databases) formats
-            if isinstance(song, dict):
-                result.append({
-                    'id': song.get(db.FIELD_SONG_ID) or song.get('song_id'),
-                    'name': song.get(db.FIELD_SONGNAME) or song.get('song_name')
-                })
-            else:
-                result.append({'id': song[0], 'name': song[1]})
-        return result
+        # Row format is fixed per backend; the adapter is chosen in __init__
+        to_dict = self._song_row_to_dict
+        return [to_dict(song) for song in self.dejavu.db.get_songs()]
 
     def get_song_count(self) -> int:
         """Get count of registered songs.
@@ -265,7 +481,18 @@ class FingerprintEngine:
         Returns:
             Number of songs in database.
         """
-        return len(self.get_songs())
+        return self.dejavu.db.get_num_songs()
+
+    def _song_ids_by_name(self) -> Dict[str, int]:
+        """Map song names to song IDs (first ID wins for duplicate names).
+
+        Returns:
+            Dictionary of song name to song ID.
+        """
+        name_to_id = {}
+        for song in self.get_songs():
+            name_to_id.setdefault(song['name'], song['id'])
+        return name_to_id
 
     def delete_songs(self, song_names: List[str]) -> int:
         """Delete songs by name.
@@ -279,15 +506,15 @@ class FingerprintEngine:
         db = self.dejavu.db
         deleted_count = 0
 
+        # Look songs up by name once instead of rescanning per name
+        name_to_id = self._song_ids_by_name()
         for song_name in song_names:
-            # Get song info
-            songs = db.get_songs()
-            for song_id, name in songs:
-                if name == song_name:
-                    db.delete_unfingerprinted_song(song_id)
-                    deleted_count += 1
-                    break
+            song_id = name_to_id.get(song_name)
+            if song_id is not None:
+                db.delete_unfingerprinted_song(song_id)
+                deleted_count += 1
 
+        self._recog_cache.clear()
         return deleted_count
 
     def clear_database(self) -> None:
@@ -296,6 +523,7 @@ class FingerprintEngine:
         songs = db.get_songs()
         for song_id, _ in songs:
             db.delete_unfingerprinted_song(song_id)
+        self._recog_cache.clear()
 
         # Clear metadata as well
         self.metadata_db.clear_all_metadata()
@@ -341,14 +569,7 @@ class FingerprintEngine:
             Dictionary with fingerprints and metadata or None if not found.
         """
         # Get song info
-        db = self.dejavu.db
-        songs = db.get_songs()
-        song_id = None
-        for sid, name in songs:
-            if name == song_name:
-                song_id = sid
-                break
-
+        song_id = self._song_ids_by_name().get(song_name)
         if song_id is None:
             return None
 
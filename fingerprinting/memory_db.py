@@ -1,13 +1,37 @@
 """In-memory database implementation for Dejavu (PyDejavu 0.1.3 compatible)."""
 
+import numpy as np
 from dejavu.database import Database
 
+from . import _match_kernel
+
+
+# Dejavu hashes are SHA-1 hex digests truncated to FINGERPRINT_REDUCTION chars
+HASH_BYTES = 20
+
+# Initial row capacity of the fingerprint arrays (doubled as needed)
+INITIAL_CAPACITY = 1024
+
+# Song ID marking a deleted row until the arrays are compacted
+TOMBSTONE = -1
+
 
 class MemoryDatabase(Database):
     """Simple in-memory database for Dejavu fingerprinting.
 
     Compatible with PyDejavu 0.1.3 Database interface.
     Not persistent - data lost when process exits.
+
+    Fingerprints are stored column-wise in three parallel NumPy arrays
+    (hash, song_id, offset) rather than as a list of tuples, which takes a
+    fraction of the memory and lets per-song queries run vectorized. Hash
+    lookups use a hash-sorted view of the rows that is built on first use
+    after a change, so a whole query is matched with np.searchsorted.
+
+    Each song's rows are tracked as a list of contiguous row ranges, so
+    per-song counts, hash exports and deletions touch only that song's rows.
+    Deleted rows are tombstoned and reclaimed once they make up half of the
+    arrays.
     """
 
     type = "memory"
@@ -15,34 +39,149 @@ class MemoryDatabase(Database):
     def __init__(self, **options):
         super(MemoryDatabase, self).__init__()
         self.songs = {}  # song_id -> {song_name, file_sha1, fingerprinted}
-        self.fingerprints = []  # list of (hash, song_id, offset)
         self.next_song_id = 1
+        self._num_fingerprinted = 0  # songs with fingerprinted=True
+        self._reset_fingerprints()
+
+    def _reset_fingerprints(self):
+        """Allocate empty fingerprint storage."""
+        self._hashes = np.empty(INITIAL_CAPACITY, dtype=f'S{HASH_BYTES}')
+        self._sids = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self._offsets = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self._n = 0
+        self._num_tombstones = 0
+        self.songs_to_positions = {}  # song_id -> [range of rows, ...]
+        self._invalidate()
+
+    def _invalidate(self):
+        """Drop the hash-sorted view after the fingerprints changed."""
+        self._order = None  # rows in hash order
+        self._sorted_hashes = None  # self._hashes[self._order]
+
+    def _ensure_sorted(self):
+        """Build the hash-sorted view of the stored rows if needed."""
+        if self._order is None:
+            rows = self._live_rows()
+            hashes = self._hashes[rows]
+            order = np.argsort(hashes, kind='stable')
+            self._order = order if isinstance(rows, slice) else rows[order]
+            self._sorted_hashes = hashes[order]
+
+    def _search(self, hashes):
+        """Find where several hashes are stored in the sorted view.
+
+        Args:
+            hashes: Array of encoded query hashes.
+
+        Returns:
+            Tuple of (lo, counts): for each query hash, the start of its
+            range in the sorted view and the number of stored rows.
+        """
+        self._ensure_sorted()
+        lo = np.searchsorted(self._sorted_hashes, hashes, side='left')
+        hi = np.searchsorted(self._sorted_hashes, hashes, side='right')
+        return lo, hi - lo
+
+    def _reserve(self, count):
+        """Grow the fingerprint arrays to hold count more rows.
+
+        Capacity doubles, so appending one row at a time stays amortized O(1).
+        """
+        needed = self._n + count
+        capacity = len(self._sids)
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+
+        for name in ('_hashes', '_sids', '_offsets'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def _live_rows(self):
+        """Return an index selecting the stored rows that are not tombstoned."""
+        if not self._num_tombstones:
+            return slice(0, self._n)
+        return np.flatnonzero(self._sids[:self._n] != TOMBSTONE)
+
+    def _song_rows(self, song_id):
+        """Return the row numbers holding a song's fingerprints."""
+        ranges = self.songs_to_positions.get(song_id, ())
+        if len(ranges) == 1:
+            return np.arange(ranges[0].start, ranges[0].stop)
+        return np.concatenate([np.arange(r.start, r.stop) for r in ranges] or [np.zeros(0, np.intp)])
+
+    def _add_positions(self, sid, start, count):
+        """Record that rows [start, start + count) belong to a song."""
+        ranges = self.songs_to_positions.setdefault(sid, [])
+        if ranges and ranges[-1].stop == start:
+            ranges[-1] = range(ranges[-1].start, start + count)
+        else:
+            ranges.append(range(start, start + count))
+
+    def _compact(self):
+        """Drop tombstoned rows and renumber the remaining song ranges."""
+        n = self._n
+        keep = self._sids[:n] != TOMBSTONE
+        new_index = np.cumsum(keep) - 1
+        count = int(new_index[-1]) + 1 if n else 0
+
+        self._hashes[:count] = self._hashes[:n][keep]
+        self._sids[:count] = self._sids[:n][keep]
+        self._offsets[:count] = self._offsets[:n][keep]
+        self._n = count
+        self._num_tombstones = 0
+
+        # Surviving ranges hold no tombstones, so each stays contiguous
+        for ranges in self.songs_to_positions.values():
+            for i, r in enumerate(ranges):
+                start = int(new_index[r.start])
+                ranges[i] = range(start, start + len(r))
+
+    def _decoded_hashes(self, rows):
+        """Return stored hashes for the given rows as a list of str."""
+        return np.char.decode(self._hashes[rows], 'ascii').tolist()
 
     def setup(self):
-        """Initialize database (no-op for in-memory)."""
-        pass
+        """Initialize database (compiles the match kernel if numba is available)."""
+        _match_kernel.warm_up()
 
     def empty(self):
         """Clear all data."""
         self.songs = {}
-        self.fingerprints = []
         self.next_song_id = 1
+        self._num_fingerprinted = 0
+        self._reset_fingerprints()
 
     def delete_unfingerprinted_songs(self):
         """Remove songs without fingerprints."""
         to_delete = [sid for sid, song in self.songs.items()
                      if not song.get('fingerprinted', False)]
+        if not to_delete:
+            return
+
+        # Tombstone each song's rows in place
         for sid in to_delete:
             del self.songs[sid]
-            self.fingerprints = [(h, s, o) for h, s, o in self.fingerprints if s != sid]
+            rows = self._song_rows(sid)
+            self._sids[rows] = TOMBSTONE
+            self._num_tombstones += len(rows)
+            self.songs_to_positions.pop(sid, None)
+
+        if self._num_tombstones * 2 > self._n:
+            self._compact()
+        self._invalidate()
 
     def get_num_songs(self):
         """Return number of fingerprinted songs."""
-        return sum(1 for song in self.songs.values() if song.get('fingerprinted', False))
+        return self._num_fingerprinted
 
     def get_num_fingerprints(self):
         """Return total number of fingerprints."""
-        return len(self.fingerprints)
+        return self._n - self._num_tombstones
 
     def get_song_fingerprint_count(self, song_id):
         """Return number of fingerprints for a specific song.
@@ -53,12 +192,14 @@ class MemoryDatabase(Database):
         Returns:
             Number of fingerprints for the song.
         """
-        return sum(1 for h, s, o in self.fingerprints if s == song_id)
+        return sum(len(r) for r in self.songs_to_positions.get(song_id, ()))
 
     def set_song_fingerprinted(self, sid):
         """Mark song as fingerprinted."""
-        if sid in self.songs:
-            self.songs[sid]['fingerprinted'] = True
+        song = self.songs.get(sid)
+        if song is not None and not song['fingerprinted']:
+            song['fingerprinted'] = True
+            self._num_fingerprinted += 1
 
     def get_songs(self):
         """Return all fingerprinted songs (yields dicts like DictCursor)."""
@@ -83,7 +224,18 @@ class MemoryDatabase(Database):
 
     def insert(self, hash, sid, offset):
         """Insert a single fingerprint."""
-        self.fingerprints.append((hash, sid, offset))
+        encoded = hash.encode('ascii')
+        if len(encoded) > HASH_BYTES:
+            raise ValueError(f"Hash longer than {HASH_BYTES} characters: {hash}")
+
+        self._reserve(1)
+        row = self._n
+        self._hashes[row] = encoded
+        self._sids[row] = sid
+        self._offsets[row] = offset
+        self._add_positions(sid, row, 1)
+        self._n += 1
+        self._invalidate()
 
     def insert_song(self, song_name, file_hash):
         """Insert a song and return its ID."""
@@ -97,37 +249,88 @@ class MemoryDatabase(Database):
         return sid
 
     def query(self, hash):
-        """Query fingerprints by hash."""
+        """Query fingerprints by hash (None returns all fingerprints).
+
+        Returns:
+            Iterator of (song_id, offset) tuples.
+        """
         if hash is None:
             # Return all fingerprints
-            for h, sid, offset in self.fingerprints:
-                yield (sid, offset)
+            sids, offsets = self.query_all()
         else:
             # Return matching fingerprints
-            for h, sid, offset in self.fingerprints:
-                if h == hash:
-                    yield (sid, offset)
+            encoded = hash.encode('ascii')
+            if len(encoded) > HASH_BYTES:
+                return iter(())
+            lo, counts = self._search(np.array([encoded], dtype=f'S{HASH_BYTES}'))
+            rows = self._order[lo[0]:lo[0] + counts[0]]
+            sids, offsets = self._sids[rows], self._offsets[rows]
+
+        # tolist() converts in C; zip then pairs plain Python ints
+        return iter(zip(sids.tolist(), offsets.tolist()))
+
+    def query_all(self):
+        """Return all fingerprints as arrays, for callers that consume arrays.
+
+        Returns:
+            Tuple of (song_ids, offsets) ndarrays. These may be views of the
+            internal storage and must not be modified.
+        """
+        rows = self._live_rows()
+        return self._sids[rows], self._offsets[rows]
 
     def get_iterable_kv_pairs(self):
         """Return all fingerprints as list (for JSON serialization)."""
-        return [(h, sid, offset) for h, sid, offset in self.fingerprints]
+        rows = self._live_rows()
+        return list(zip(self._decoded_hashes(rows),
+                        self._sids[rows].tolist(),
+                        self._offsets[rows].tolist()))
 
     def get_song_hashes(self, song_id):
         """Get all hashes for a specific song."""
-        return [(h, offset) for h, sid, offset in self.fingerprints if sid == song_id]
+        rows = self._song_rows(song_id)
+        return list(zip(self._decoded_hashes(rows), self._offsets[rows].tolist()))
 
     def insert_hashes(self, sid, hashes):
         """Insert multiple fingerprints."""
-        for hash, offset in hashes:
-            self.insert(hash, sid, offset)
+        hashes = list(hashes)
+        if not hashes:
+            return
+
+        encoded = np.array([h for h, _ in hashes], dtype='S')
+        if encoded.dtype.itemsize > HASH_BYTES:
+            raise ValueError(f"Hashes longer than {HASH_BYTES} characters")
+
+        # Fill the new rows column-wise in one go
+        count = len(hashes)
+        self._reserve(count)
+        start = self._n
+        self._hashes[start:start + count] = encoded
+        self._sids[start:start + count] = sid
+        self._offsets[start:start + count] = [offset for _, offset in hashes]
+        self._add_positions(sid, start, count)
+        self._n += count
+        self._invalidate()
 
     def return_matches(self, hashes):
         """Return matches for a list of hashes."""
         # Create hash -> offset mapping
         hash_dict = {h: offset for h, offset in hashes}
+        if not hash_dict or not self._n:
+            return
+
+        query_hashes = np.array(list(hash_dict), dtype='S')
+        query_offsets = np.fromiter(hash_dict.values(), dtype=np.int64, count=len(hash_dict))
+        if query_hashes.dtype.itemsize > HASH_BYTES:
+            # Longer hashes can't be stored, so they can't match either
+            fits = np.char.str_len(query_hashes) <= HASH_BYTES
+            query_hashes, query_offsets = query_hashes[fits], query_offsets[fits]
+        query_hashes = query_hashes.astype(f'S{HASH_BYTES}')
+
+        # Match the whole query against the sorted view in one pass
+        lo, counts = self._search(query_hashes)
+        sids, diffs = _match_kernel.expand_matches(
+            self._order, self._sids, self._offsets, lo, counts, query_offsets)
 
-        # Find matches
-        for hash, sid, db_offset in self.fingerprints:
-            if hash in hash_dict:
-                # Return (sid, offset_difference)
-                yield (sid, db_offset - hash_dict[hash])
+        # Return (sid, offset_difference)
+        yield from zip(sids.tolist(), diffs.tolist())
@@ -1,10 +1,13 @@
 """Metadata database manager for song fingerprints."""
 
-import json
+import functools
+import hashlib
+import io
+import re
 import sqlite3
-from datetime import datetime
+import uuid
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
 
 try:
     import psycopg2
@@ -15,13 +18,103 @@ except ImportError:
 
 try:
     import MySQLdb
+    import MySQLdb.cursors
     HAS_MYSQL = True
 except ImportError:
     HAS_MYSQL = False
 
+from ._json import dumps_text, loads
 from .storage_config import DatabaseType
 
 
+# Connection settings for the SQLite (memory) backend: WAL with relaxed fsync
+# for file-backed databases, temp tables and a 256 MB mmap / 64 MB page cache
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+]
+
+# Rows per multi-row INSERT when bulk loading into MySQL (bounded by the
+# server's max_allowed_packet rather than by round-trips)
+MYSQL_BULK_PAGE_SIZE = 10000
+
+
+def _sqlite_json_path(field_path: str) -> str:
+    """Build a quoted SQLite JSON path literal from a dot-notation field path.
+
+    Args:
+        field_path: Field path, e.g. 'artist.name'.
+
+    Returns:
+        SQL string literal, e.g. '$."artist"."name"'.
+
+    Raises:
+        ValueError: If the field path contains a double quote, which SQLite
+            JSON paths cannot escape inside a quoted key.
+    """
+    if '"' in field_path:
+        raise ValueError(f"Field path may not contain '\"': {field_path}")
+    json_path = '$' + ''.join('."{}"'.format(part) for part in field_path.split('.'))
+    return "'" + json_path.replace("'", "''") + "'"
+
+
+@functools.lru_cache(maxsize=256)
+def _sqlite_field_queries(field_path: str) -> Tuple[str, str]:
+    """Build the SQLite query_by_field() statements for a field path.
+
+    Callers tend to query the same few fields repeatedly, so the statements
+    are cached per path.
+
+    Args:
+        field_path: Field path, e.g. 'artist.name'.
+
+    Returns:
+        Tuple of (scalar_sql, container_sql). scalar_sql takes the value as
+        its one parameter; container_sql selects rows whose field is an
+        object or array, returned as a fourth column for comparison.
+    """
+    # The path is inlined (not bound) so an expression index on the same
+    # json_extract() call can be used; IS also matches a missing field
+    # when value is None
+    json_path = _sqlite_json_path(field_path)
+    scalar_sql = f"""
+        SELECT song_name, metadata, source_file
+        FROM song_metadata
+        WHERE json_extract(metadata, {json_path}) IS ?
+    """
+    container_sql = f"""
+        SELECT song_name, metadata, source_file, json_extract(metadata, {json_path})
+        FROM song_metadata
+        WHERE json_type(metadata, {json_path}) IN ('object', 'array')
+    """
+    return scalar_sql, container_sql
+
+
+def _decoded(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Return metadata the driver has already decoded (PostgreSQL JSONB)."""
+    return metadata
+
+
+def _decode_json_column(value: Any) -> Dict[str, Any]:
+    """Decode a JSON/TEXT metadata column (SQLite/MySQL).
+
+    Some MySQL drivers and connectors return JSON columns already decoded,
+    others as str or bytes.
+    """
+    return value if isinstance(value, dict) else loads(value)
+
+
+def _copy_escape(value: str) -> str:
+    """Escape a value for PostgreSQL COPY text format."""
+    return (value.replace('\\', '\\\\')
+                 .replace('\t', '\\t')
+                 .replace('\n', '\\n')
+                 .replace('\r', '\\r'))
+
+
 class MetadataDB:
     """Database manager for song metadata with JSONB support."""
 
@@ -47,41 +140,55 @@ class MetadataDB:
         self.conn = None
         self._init_connection()
         self._create_table()
+        self._prepare_statements()
 
     def _init_connection(self):
         """Initialize database connection."""
+        if self.db_type in (DatabaseType.POSTGRESQL, DatabaseType.MYSQL):
+            self.conn = self._connect_server()
+        else:  # Memory/SQLite
+            # In-memory SQLite database unless a file is configured
+            self.conn = sqlite3.connect(self.db_config.get('sqlite_path') or ':memory:')
+            self.conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                self.conn.execute(pragma)
+
+    def _connect_server(self):
+        """Open a new autocommit PostgreSQL or MySQL connection.
+
+        Returns:
+            The driver connection.
+        """
         if self.db_type == DatabaseType.POSTGRESQL:
             if not HAS_PSYCOPG2:
                 raise ImportError("psycopg2 required for PostgreSQL support")
 
             db_info = self.db_config['database']
-            self.conn = psycopg2.connect(
+            conn = psycopg2.connect(
                 host=db_info['host'],
                 port=db_info['port'],
                 database=db_info['database'],
                 user=db_info['user'],
                 password=db_info['password']
             )
-            self.conn.autocommit = True
-
-        elif self.db_type == DatabaseType.MYSQL:
-            if not HAS_MYSQL:
-                raise ImportError("MySQLdb required for MySQL support")
-
-            db_info = self.db_config['database']
-            self.conn = MySQLdb.connect(
-                host=db_info['host'],
-                port=db_info['port'],
-                db=db_info['database'],
-                user=db_info['user'],
-                passwd=db_info['password']
-            )
-            self.conn.autocommit(True)
-
-        else:  # Memory/SQLite
-            # Use in-memory SQLite database
-            self.conn = sqlite3.connect(':memory:')
-            self.conn.row_factory = sqlite3.Row
+            conn.autocommit = True
+            # Have the driver decode JSONB columns, so reads get dicts directly
+            psycopg2.extras.register_default_jsonb(conn_or_curs=conn, loads=loads)
+            return conn
+
+        if not HAS_MYSQL:
+            raise ImportError("MySQLdb required for MySQL support")
+
+        db_info = self.db_config['database']
+        conn = MySQLdb.connect(
+            host=db_info['host'],
+            port=db_info['port'],
+            db=db_info['database'],
+            user=db_info['user'],
+            passwd=db_info['password']
+        )
+        conn.autocommit(True)
+        return conn
 
     def _create_table(self):
         """Create metadata table if it doesn't exist."""
@@ -123,8 +230,118 @@ class MetadataDB:
                     cursor.execute(statement)
         else:
             cursor.execute(create_sql)
+
+        if self.db_type == DatabaseType.MEMORY:
+            # Expression indexes for fields looked up with query_by_field
+            for field_path in self.db_config.get('indexed_fields', []):
+                # The path hash keeps e.g. 'a.b' and 'a_b' from sharing a name
+                path_hash = hashlib.sha1(field_path.encode('utf-8')).hexdigest()[:8]
+                index_name = 'idx_md_' + re.sub(r'\W', '_', field_path) + '_' + path_hash
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} "
+                    f"ON song_metadata(json_extract(metadata, {_sqlite_json_path(field_path)}))"
+                )
         cursor.close()
 
+    def _prepare_statements(self):
+        """Build the per-operation SQL for this backend and open a shared cursor."""
+        p = '?' if self.db_type == DatabaseType.MEMORY else '%s'
+
+        if self.db_type == DatabaseType.POSTGRESQL:
+            self._sql_insert = """
+                INSERT INTO song_metadata (song_name, metadata, source_file)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (song_name)
+                DO UPDATE SET metadata = EXCLUDED.metadata,
+                             source_file = EXCLUDED.source_file,
+                             date_added = CURRENT_TIMESTAMP;
+            """
+        elif self.db_type == DatabaseType.MYSQL:
+            self._sql_insert = """
+                INSERT INTO song_metadata (song_name, metadata, source_file)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    metadata = VALUES(metadata),
+                    source_file = VALUES(source_file),
+                    date_added = CURRENT_TIMESTAMP;
+            """
+        else:  # SQLite
+            self._sql_insert = """
+                INSERT OR REPLACE INTO song_metadata
+                (song_name, metadata, source_file)
+                VALUES (?, ?, ?);
+            """
+
+        self._param_style = p
+
+        # psycopg2's Json adapter binds metadata as a JSON parameter, so no
+        # ::jsonb cast is needed; SQLite/MySQL store serialized text,
+        # and reads get back JSONB already decoded by the registered loader
+        if self.db_type == DatabaseType.POSTGRESQL:
+            self._encode_metadata = functools.partial(psycopg2.extras.Json, dumps=dumps_text)
+            self._decode_metadata = _decoded
+        else:
+            self._encode_metadata = dumps_text
+            self._decode_metadata = _decode_json_column
+        self._sql_get = f"SELECT metadata, source_file FROM song_metadata WHERE song_name = {p}"
+        self._sql_get_all = "SELECT song_name, metadata, source_file FROM song_metadata"
+        self._sql_delete = f"DELETE FROM song_metadata WHERE song_name = {p}"
+        self._sql_clear = "DELETE FROM song_metadata"
+        self._sql_count = "SELECT COUNT(*) FROM song_metadata"
+
+        # Driver errors raised when the shared cursor is closed or the server
+        # connection dropped; server errors only warrant a retry once
+        # _connection_lost() confirms the connection is gone. SQLite's
+        # OperationalError (locked database, schema problems) is never retried.
+        if self.db_type == DatabaseType.POSTGRESQL:
+            self._cursor_errors = (psycopg2.InterfaceError, psycopg2.OperationalError)
+            self._server_errors = (psycopg2.OperationalError,)
+        elif self.db_type == DatabaseType.MYSQL:
+            self._cursor_errors = (MySQLdb.InterfaceError, MySQLdb.OperationalError)
+            self._server_errors = (MySQLdb.OperationalError,)
+        else:
+            self._cursor_errors = (sqlite3.ProgrammingError,)
+            self._server_errors = ()
+
+        self._cursor = self.conn.cursor()
+
+    def _connection_lost(self, error: Exception) -> bool:
+        """Return whether a driver error means the server connection is gone.
+
+        Args:
+            error: Error raised by the driver.
+
+        Returns:
+            True if the connection must be re-established.
+        """
+        if self.db_type == DatabaseType.POSTGRESQL:
+            return bool(self.conn.closed)
+        if self.db_type == DatabaseType.MYSQL:
+            # 2006: server has gone away, 2013: lost connection during query
+            return isinstance(error, MySQLdb.InterfaceError) or error.args[:1] in ((2006,), (2013,))
+        return False
+
+    def _execute(self, sql: str, params: tuple = ()):
+        """Execute a statement on the shared cursor.
+
+        A closed cursor is replaced, or a dropped server connection opened
+        again, and the statement retried once; any other error propagates
+        without re-running the statement.
+
+        Returns:
+            The cursor, for fetching results.
+        """
+        try:
+            self._cursor.execute(sql, params)
+        except self._cursor_errors as e:
+            if self._connection_lost(e):
+                self._init_connection()
+            elif isinstance(e, self._server_errors):
+                raise
+            self._cursor = self.conn.cursor()
+            self._cursor.execute(sql, params)
+        return self._cursor
+
     def insert_metadata(self,
                        song_name: str,
                        metadata: Dict[str, Any],
@@ -136,49 +353,141 @@ class MetadataDB:
             metadata: Dictionary of metadata fields.
             source_file: Original source file path.
         """
-        cursor = self.conn.cursor()
+        self._execute(self._sql_insert, (song_name, self._encode_metadata(metadata), source_file))
+        self.flush()
 
-        # Serialize metadata based on database type
-        if self.db_type in [DatabaseType.POSTGRESQL, DatabaseType.MYSQL]:
-            # PostgreSQL and MySQL handle JSON natively
-            metadata_value = json.dumps(metadata)
-        else:
-            # SQLite stores as TEXT
-            metadata_value = json.dumps(metadata)
+    @staticmethod
+    def _metadata_rows(items: List[Tuple[str, Dict[str, Any], Optional[str]]],
+                       encode: Callable[[Dict[str, Any]], Any] = dumps_text) -> List[tuple]:
+        """Build (song_name, encoded_metadata, source_file) rows for a batch.
+
+        One upsert statement can't touch the same key twice, so only the last
+        entry per song name is kept.
+        """
+        latest = {song_name: (metadata, source_file) for song_name, metadata, source_file in items}
+        return [(song_name, encode(metadata), source_file)
+                for song_name, (metadata, source_file) in latest.items()]
+
+    def insert_metadata_many(self,
+                             items: List[Tuple[str, Dict[str, Any], Optional[str]]],
+                             page_size: int = 1000) -> None:
+        """Insert or update metadata for many songs in as few round-trips as possible.
+
+        PostgreSQL uses execute_values, MySQL multi-row INSERT statements of up
+        to page_size rows, and SQLite a single executemany in one transaction.
+
+        Args:
+            items: List of (song_name, metadata, source_file) tuples. If a song
+                appears more than once, the last entry wins.
+            page_size: Maximum rows per statement (PostgreSQL/MySQL).
+        """
+        rows = self._metadata_rows(items, self._encode_metadata)
+        if not rows:
+            return
+
+        cursor = self.conn.cursor()
 
         if self.db_type == DatabaseType.POSTGRESQL:
             sql = """
-                INSERT INTO song_metadata (song_name, metadata, source_file, date_added)
-                VALUES (%s, %s::jsonb, %s, %s)
+                INSERT INTO song_metadata (song_name, metadata, source_file)
+                VALUES %s
                 ON CONFLICT (song_name)
                 DO UPDATE SET metadata = EXCLUDED.metadata,
                              source_file = EXCLUDED.source_file,
-                             date_added = EXCLUDED.date_added;
+                             date_added = CURRENT_TIMESTAMP;
             """
-            cursor.execute(sql, (song_name, metadata_value, source_file, datetime.now()))
+            psycopg2.extras.execute_values(cursor, sql, rows,
+                                           template="(%s, %s, %s)",
+                                           page_size=page_size)
 
         elif self.db_type == DatabaseType.MYSQL:
-            sql = """
-                INSERT INTO song_metadata (song_name, metadata, source_file, date_added)
-                VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    metadata = VALUES(metadata),
-                    source_file = VALUES(source_file),
-                    date_added = VALUES(date_added);
-            """
-            cursor.execute(sql, (song_name, metadata_value, source_file, datetime.now()))
+            for start in range(0, len(rows), page_size):
+                chunk = rows[start:start + page_size]
+                values = ", ".join(["(%s, %s, %s)"] * len(chunk))
+                sql = f"""
+                    INSERT INTO song_metadata (song_name, metadata, source_file)
+                    VALUES {values}
+                    ON DUPLICATE KEY UPDATE
+                        metadata = VALUES(metadata),
+                        source_file = VALUES(source_file),
+                        date_added = CURRENT_TIMESTAMP;
+                """
+                cursor.execute(sql, [value for row in chunk for value in row])
 
         else:  # SQLite
             sql = """
                 INSERT OR REPLACE INTO song_metadata
-                (song_name, metadata, source_file, date_added)
-                VALUES (?, ?, ?, ?);
+                (song_name, metadata, source_file)
+                VALUES (?, ?, ?);
             """
-            cursor.execute(sql, (song_name, metadata_value, source_file, datetime.now()))
+            cursor.executemany(sql, rows)
             self.conn.commit()
 
         cursor.close()
 
+    def bulk_copy_metadata(self, items: List[Tuple[str, Dict[str, Any], Optional[str]]]) -> None:
+        """Insert or update metadata for many songs via PostgreSQL COPY.
+
+        Rows are streamed into a temporary staging table with COPY and
+        upserted with a single INSERT ... SELECT, which avoids per-row SQL
+        parsing for large initial imports. MySQL falls back to
+        insert_metadata_many() with MYSQL_BULK_PAGE_SIZE rows per INSERT, and
+        SQLite to its single-transaction executemany.
+
+        Args:
+            items: List of (song_name, metadata, source_file) tuples. If a song
+                appears more than once, the last entry wins.
+        """
+        if self.db_type == DatabaseType.MYSQL:
+            self.insert_metadata_many(items, page_size=MYSQL_BULK_PAGE_SIZE)
+            return
+        if self.db_type != DatabaseType.POSTGRESQL:
+            self.insert_metadata_many(items)
+            return
+
+        rows = self._metadata_rows(items)
+        if not rows:
+            return
+
+        # COPY text format: tab-separated, backslash escapes, \N for NULL
+        buffer = io.StringIO()
+        for song_name, metadata_value, source_file in rows:
+            buffer.write('\t'.join((
+                _copy_escape(song_name),
+                _copy_escape(metadata_value),
+                '\\N' if source_file is None else _copy_escape(source_file),
+            )))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        cursor = self.conn.cursor()
+        # The connection is in autocommit mode; the staging table lives for
+        # one explicit transaction
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute("""
+                CREATE TEMP TABLE _stage_song_metadata (
+                    song_name VARCHAR(250),
+                    metadata JSONB,
+                    source_file VARCHAR(500)
+                ) ON COMMIT DROP
+            """)
+            cursor.copy_expert("COPY _stage_song_metadata FROM STDIN WITH (FORMAT text)", buffer)
+            cursor.execute("""
+                INSERT INTO song_metadata (song_name, metadata, source_file)
+                SELECT song_name, metadata, source_file FROM _stage_song_metadata
+                ON CONFLICT (song_name)
+                DO UPDATE SET metadata = EXCLUDED.metadata,
+                             source_file = EXCLUDED.source_file,
+                             date_added = CURRENT_TIMESTAMP
+            """)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.close()
+
     def get_metadata(self, song_name: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a song.
 
@@ -188,35 +497,11 @@ class MetadataDB:
         Returns:
             Metadata dictionary or None if not found.
         """
-        cursor = self.conn.cursor()
-
-        if self.db_type == DatabaseType.POSTGRESQL:
-            cursor.execute(
-                "SELECT metadata, source_file FROM song_metadata WHERE song_name = %s",
-                (song_name,)
-            )
-        elif self.db_type == DatabaseType.MYSQL:
-            cursor.execute(
-                "SELECT metadata, source_file FROM song_metadata WHERE song_name = %s",
-                (song_name,)
-            )
-        else:  # SQLite
-            cursor.execute(
-                "SELECT metadata, source_file FROM song_metadata WHERE song_name = ?",
-                (song_name,)
-            )
-
-        row = cursor.fetchone()
-        cursor.close()
+        row = self._execute(self._sql_get, (song_name,)).fetchone()
 
         if row:
-            if self.db_type in [DatabaseType.POSTGRESQL, DatabaseType.MYSQL]:
-                metadata = row[0] if isinstance(row[0], dict) else json.loads(row[0])
-            else:  # SQLite
-                metadata = json.loads(row[0])
-
             return {
-                'metadata': metadata,
+                'metadata': self._decode_metadata(row[0]),
                 'source_file': row[1]
             }
 
@@ -231,41 +516,32 @@ class MetadataDB:
 
         Returns:
             List of matching songs with metadata.
+
+        Raises:
+            ValueError: If field_path contains a double quote (SQLite).
         """
         cursor = self.conn.cursor()
         results = []
 
         if self.db_type == DatabaseType.POSTGRESQL:
-            # PostgreSQL JSONB query
-            if '.' in field_path:
-                # Nested field: metadata->'artist'->>'name'
-                parts = field_path.split('.')
-                json_path = "->".join(f"'{p}'" for p in parts[:-1])
-                last_key = parts[-1]
-                sql = f"""
-                    SELECT song_name, metadata, source_file
-                    FROM song_metadata
-                    WHERE metadata->{json_path}->>{last_key} = %s
-                """
-            else:
-                # Top-level field: metadata->>'game'
-                sql = f"""
-                    SELECT song_name, metadata, source_file
-                    FROM song_metadata
-                    WHERE metadata->>%s = %s
+            # JSONB containment ({"artist": {"name": value}} for 'artist.name')
+            # is type-aware and can use the GIN index on metadata
+            containment = functools.reduce(lambda inner, key: {key: inner},
+                                           reversed(field_path.split('.')), value)
+            cursor.execute(
                 """
-                cursor.execute(sql, (field_path, str(value)))
-
-            if '.' not in field_path:
-                cursor.execute(sql, (field_path, str(value)))
-            else:
-                cursor.execute(sql, (str(value),))
+                SELECT song_name, metadata, source_file
+                FROM song_metadata
+                WHERE metadata @> %s::jsonb
+                """,
+                (dumps_text(containment),)
+            )
 
             rows = cursor.fetchall()
             for row in rows:
                 results.append({
                     'song_name': row[0],
-                    'metadata': row[1] if isinstance(row[1], dict) else json.loads(row[1]),
+                    'metadata': row[1],
                     'source_file': row[2]
                 })
 
@@ -277,70 +553,89 @@ class MetadataDB:
                 WHERE JSON_EXTRACT(metadata, %s) = %s
             """
             json_path = f'$.{field_path}'
-            cursor.execute(sql, (json_path, json.dumps(value)))
+            cursor.execute(sql, (json_path, dumps_text(value)))
 
             rows = cursor.fetchall()
             for row in rows:
                 results.append({
                     'song_name': row[0],
-                    'metadata': json.loads(row[1]) if isinstance(row[1], str) else row[1],
+                    'metadata': _decode_json_column(row[1]),
                     'source_file': row[2]
                 })
 
-        else:  # SQLite - requires full scan
-            cursor.execute("SELECT song_name, metadata, source_file FROM song_metadata")
-            rows = cursor.fetchall()
+        else:  # SQLite (JSON1)
+            scalar_sql, container_sql = _sqlite_field_queries(field_path)
+            if isinstance(value, (dict, list)):
+                # Objects/arrays come back as JSON text; compare them decoded
+                cursor.execute(container_sql)
+                rows = [row for row in cursor.fetchall() if loads(row[3]) == value]
+            else:
+                cursor.execute(scalar_sql, (value,))
+                rows = cursor.fetchall()
+
             for row in rows:
-                metadata = json.loads(row[1])
-                # Navigate field path
-                field_value = metadata
-                for part in field_path.split('.'):
-                    if isinstance(field_value, dict) and part in field_value:
-                        field_value = field_value[part]
-                    else:
-                        field_value = None
-                        break
-
-                if field_value == value:
-                    results.append({
-                        'song_name': row[0],
-                        'metadata': metadata,
-                        'source_file': row[2]
-                    })
+                results.append({
+                    'song_name': row[0],
+                    'metadata': _decode_json_column(row[1]),
+                    'source_file': row[2]
+                })
 
         cursor.close()
         return results
 
-    def get_all_metadata(self) -> List[Dict[str, Any]]:
-        """Get all song metadata.
+    def iter_all_metadata(self, batch: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Iterate over all song metadata without loading it all at once.
 
-        Returns:
-            List of all metadata entries.
-        """
-        cursor = self.conn.cursor()
-
-        if self.db_type in [DatabaseType.POSTGRESQL, DatabaseType.MYSQL]:
-            cursor.execute("SELECT song_name, metadata, source_file FROM song_metadata")
-        else:
-            cursor.execute("SELECT song_name, metadata, source_file FROM song_metadata")
+        PostgreSQL (named cursor in a transaction) and MySQL (unbuffered
+        cursor) stream rows from the server over a connection of their own;
+        SQLite fetches from a separate cursor in batches. The shared cursor
+        stays free for other calls while iterating.
 
-        rows = cursor.fetchall()
-        cursor.close()
+        Args:
+            batch: Number of rows fetched from the database at a time.
 
-        results = []
-        for row in rows:
-            if self.db_type in [DatabaseType.POSTGRESQL, DatabaseType.MYSQL]:
-                metadata = row[1] if isinstance(row[1], dict) else json.loads(row[1])
-            else:
-                metadata = json.loads(row[1])
+        Yields:
+            Metadata entries with keys: song_name, metadata, source_file.
+        """
+        if self.db_type == DatabaseType.POSTGRESQL:
+            # Not WITH HOLD, which would make the server materialize the
+            # whole result; the cursor lives in the connection's transaction
+            conn = self._connect_server()
+            conn.autocommit = False
+            cursor = conn.cursor(name=f'md_scan_{uuid.uuid4().hex}')
+            cursor.itersize = batch
+        elif self.db_type == DatabaseType.MYSQL:
+            conn = self._connect_server()
+            cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+        else:
+            conn = self.conn
+            cursor = conn.cursor()
+
+        decode = self._decode_metadata
+        try:
+            cursor.execute(self._sql_get_all)
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'song_name': row[0],
+                        'metadata': decode(row[1]),
+                        'source_file': row[2]
+                    }
+        finally:
+            cursor.close()
+            if conn is not self.conn:
+                conn.close()
 
-            results.append({
-                'song_name': row[0],
-                'metadata': metadata,
-                'source_file': row[2]
-            })
+    def get_all_metadata(self) -> List[Dict[str, Any]]:
+        """Get all song metadata.
 
-        return results
+        Returns:
+            List of all metadata entries (see iter_all_metadata() for large catalogs).
+        """
+        return list(self.iter_all_metadata())
 
     def delete_metadata(self, song_name: str) -> bool:
         """Delete metadata for a song.
@@ -351,27 +646,14 @@ class MetadataDB:
         Returns:
             True if deleted, False if not found.
         """
-        cursor = self.conn.cursor()
-
-        if self.db_type == DatabaseType.POSTGRESQL:
-            cursor.execute("DELETE FROM song_metadata WHERE song_name = %s", (song_name,))
-        elif self.db_type == DatabaseType.MYSQL:
-            cursor.execute("DELETE FROM song_metadata WHERE song_name = %s", (song_name,))
-        else:
-            cursor.execute("DELETE FROM song_metadata WHERE song_name = ?", (song_name,))
-            self.conn.commit()
-
-        deleted = cursor.rowcount > 0
-        cursor.close()
+        deleted = self._execute(self._sql_delete, (song_name,)).rowcount > 0
+        self.flush()
         return deleted
 
     def clear_all_metadata(self) -> None:
         """Clear all metadata from database."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM song_metadata")
-        if self.db_type == DatabaseType.MEMORY:
-            self.conn.commit()
-        cursor.close()
+        self._execute(self._sql_clear)
+        self.flush()
 
     def count_metadata(self) -> int:
         """Get count of metadata entries.
@@ -379,14 +661,24 @@ class MetadataDB:
         Returns:
             Number of metadata entries.
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM song_metadata")
-        count = cursor.fetchone()[0]
-        cursor.close()
-        return count
+        return self._execute(self._sql_count).fetchone()[0]
+
+    def flush(self) -> None:
+        """Commit pending SQLite writes.
+
+        Every public write method calls this before returning, so other
+        connections and later processes see the change. PostgreSQL/MySQL
+        connections autocommit.
+        """
+        if self.db_type == DatabaseType.MEMORY and self.conn:
+            self.conn.commit()
 
     def close(self):
         """Close database connection."""
+        self.flush()
+        if getattr(self, '_cursor', None) is not None:
+            self._cursor.close()
+            self._cursor = None
         if self.conn:
             self.conn.close()
 
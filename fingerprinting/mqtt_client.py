@@ -1,17 +1,28 @@
 """MQTT client for publishing audio recognition events."""
 
-import json
 import logging
 import os
+import threading
 import uuid
 from typing import Dict, Optional, Any
 
 try:
     import paho.mqtt.client as mqtt
     MQTT_AVAILABLE = True
+    _OK = mqtt.MQTT_ERR_SUCCESS
 except ImportError:
     MQTT_AVAILABLE = False
 
+from ._json import dumps
+
+
+# Seconds connect() waits for the broker to acknowledge the connection
+CONNECT_TIMEOUT = 5.0
+
+# Event payload with a fixed key order; each value is JSON-encoded separately
+_EVENT_TMPL = (b'{"song_name":%b,"confidence":%b,"timestamp":%b,"metadata":%b,'
+               b'"offset":%b,"hashes_matched":%b,"total_hashes":%b}')
+
 
 class MQTTPublisher:
     """MQTT client for publishing audio recognition events."""
@@ -51,6 +62,16 @@ class MQTTPublisher:
         self.retain = retain
         self.connected = False
 
+        # Set by _on_connect once the broker answers (accepted or refused)
+        self._connected_evt = threading.Event()
+
+        # Topics are fixed per publisher, so build them once
+        self._topic_event = f"{topic_prefix}/event"
+        self._topic_last_song = f"{topic_prefix}/event/last_song"
+        self._topic_details = f"{topic_prefix}/system/details"
+        self._topic_running = f"{topic_prefix}/system/running"
+        self._topic_version = f"{topic_prefix}/system/version"
+
         # Create MQTT client
         self.client = mqtt.Client(client_id=client_id)
 
@@ -83,6 +104,9 @@ class MQTTPublisher:
             error_msg = error_messages.get(rc, f"Connection refused - unknown error ({rc})")
             self.logger.error(f"Failed to connect to MQTT broker: {error_msg}")
 
+        # Wake connect() either way so a refused connection doesn't wait out the timeout
+        self._connected_evt.set()
+
     def _on_disconnect(self, client, userdata, rc):
         """Callback for when the client disconnects from the broker."""
         self.connected = False
@@ -102,15 +126,12 @@ class MQTTPublisher:
             True if connection successful, False otherwise.
         """
         try:
+            self._connected_evt.clear()
             self.client.connect(self.broker, self.port, keepalive=60)
             self.client.loop_start()
 
             # Wait for async connection to complete (with timeout)
-            import time
-            timeout = 5.0
-            start = time.time()
-            while not self.connected and (time.time() - start) < timeout:
-                time.sleep(0.1)
+            self._connected_evt.wait(timeout=CONNECT_TIMEOUT)
 
             return self.connected
         except Exception as e:
@@ -137,8 +158,8 @@ class MQTTPublisher:
             return False
 
         try:
-            topic = f"{self.topic_prefix}/system/details"
-            payload_json = json.dumps(details, ensure_ascii=False)
+            topic = self._topic_details
+            payload_json = dumps(details)
 
             result = self.client.publish(
                 topic=topic,
@@ -147,7 +168,7 @@ class MQTTPublisher:
                 retain=retain
             )
 
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            if result.rc == _OK:
                 self.logger.info(f"Published system details to {topic}")
                 return True
             else:
@@ -172,7 +193,7 @@ class MQTTPublisher:
             return False
 
         try:
-            topic = f"{self.topic_prefix}/system/running"
+            topic = self._topic_running
 
             result = self.client.publish(
                 topic=topic,
@@ -181,7 +202,7 @@ class MQTTPublisher:
                 retain=True  # Retain so status survives broker restarts
             )
 
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            if result.rc == _OK:
                 self.logger.info(f"Published running status to {topic}: {status}")
                 return True
             else:
@@ -206,7 +227,7 @@ class MQTTPublisher:
             return False
 
         try:
-            topic = f"{self.topic_prefix}/system/version"
+            topic = self._topic_version
             result = self.client.publish(
                 topic=topic,
                 payload=version,
@@ -214,7 +235,7 @@ class MQTTPublisher:
                 retain=True
             )
 
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            if result.rc == _OK:
                 self.logger.info(f"Published version to {topic}: {version}")
                 return True
             else:
@@ -243,21 +264,20 @@ class MQTTPublisher:
             song_name = event.get('song_name', 'unknown')
 
             # Construct topic: audio2mqtt/event (single topic for all events)
-            topic = f"{self.topic_prefix}/event"
-
-            # Prepare payload with all event data
-            payload = {
-                'song_name': song_name,
-                'confidence': event.get('confidence', 0.0),
-                'timestamp': event.get('timestamp'),
-                'metadata': event.get('metadata', {}),
-                'offset': event.get('offset', 0),
-                'hashes_matched': event.get('hashes_matched_in_input', 0),
-                'total_hashes': event.get('input_total_hashes', 0)
-            }
-
-            # Serialize to JSON
-            payload_json = json.dumps(payload, ensure_ascii=False)
+            topic = self._topic_event
+
+            # Fill the payload template rather than building and serializing
+            # a dict (UTF-8 bytes, published as-is)
+            confidence = event.get('confidence', 0.0)
+            payload_json = _EVENT_TMPL % (
+                dumps(song_name),
+                dumps(confidence),
+                dumps(event.get('timestamp')),
+                dumps(event.get('metadata', {})),
+                dumps(event.get('offset', 0)),
+                dumps(event.get('hashes_matched_in_input', 0)),
+                dumps(event.get('input_total_hashes', 0)),
+            )
 
             # Publish
             result = self.client.publish(
@@ -267,13 +287,13 @@ class MQTTPublisher:
                 retain=self.retain
             )
 
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                self.logger.debug(f"Published event to {topic}: {song_name} ({payload['confidence']:.2f})")
+            if result.rc == _OK:
+                self.logger.debug(f"Published event to {topic}: {song_name} ({confidence:.2f})")
 
                 # Also publish song name to last_song topic
                 metadata = event.get('metadata', {})
                 last_song_name = metadata.get('song', song_name)
-                last_song_topic = f"{self.topic_prefix}/event/last_song"
+                last_song_topic = self._topic_last_song
 
                 self.client.publish(
                     topic=last_song_topic,
@@ -261,16 +261,18 @@ class PostgreSQLDatabase(Database):
         Returns:
             List of (song_id, offset_difference) tuples
         """
-        if not hashes:
+        # Build hash -> offset first; hashes may be a one-shot generator
+        hash_dict = dict(hashes)
+        if not hash_dict:
             return []
 
         # Prepare hash values for query
-        hash_values = [h for h, _ in hashes]
-        hash_dict = {h: offset for h, offset in hashes}
+        hash_values = list(hash_dict)
 
         # Debug logging (disabled by default)
         import os
-        if os.environ.get('DEBUG_FINGERPRINT'):
+        debug = os.environ.get('DEBUG_FINGERPRINT')
+        if debug:
             print(f"[DEBUG] return_matches() called with {len(hash_values)} hashes")
             if len(hash_values) > 0:
                 print(f"[DEBUG] First 3 hashes: {hash_values[:3]}")
@@ -288,6 +290,7 @@ class PostgreSQLDatabase(Database):
 
             matches = []
             row_count = 0
+            hash_dict_get = hash_dict.get
             for row in cur:
                 row_count += 1
                 # Get hash, song_id, db_offset from result
@@ -302,17 +305,16 @@ class PostgreSQLDatabase(Database):
                 db_offset = row[2]
 
                 # Debug first row
-                if row_count == 1 and os.environ.get('DEBUG_FINGERPRINT'):
+                if row_count == 1 and debug:
                     print(f"[DEBUG] First DB row: hash_hex={hash_hex}, type={type(hash_hex)}, in_dict={hash_hex in hash_dict}")
                     print(f"[DEBUG] First query hash: {list(hash_dict.keys())[0]}, type={type(list(hash_dict.keys())[0])}")
 
                 # Calculate offset difference
-                if hash_hex in hash_dict:
-                    query_offset = hash_dict[hash_hex]
-                    offset_diff = query_offset - db_offset
-                    matches.append((song_id, offset_diff))
+                query_offset = hash_dict_get(hash_hex)
+                if query_offset is not None:
+                    matches.append((song_id, query_offset - db_offset))
 
-            if os.environ.get('DEBUG_FINGERPRINT'):
+            if debug:
                 print(f"[DEBUG] Query returned {row_count} rows, extracted {len(matches)} matches")
 
             return matches
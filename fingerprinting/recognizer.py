@@ -1,7 +1,6 @@
 """Real-time audio stream recognizer using fingerprinting."""
 
 import time
-from collections import deque
 from datetime import datetime
 from typing import List, Dict, Optional
 
@@ -48,8 +47,10 @@ class StreamRecognizer:
         buffer_duration = window_duration + hop_duration
         self.buffer_size = int(buffer_duration * sample_rate)
 
-        # Ring buffer for audio history
-        self.ring_buffer = deque(maxlen=self.buffer_size)
+        # Audio history buffer; newest samples are kept at the end so the
+        # inference window is always a contiguous view
+        self.ring_buffer = np.zeros(self.buffer_size, dtype=np.float32)
+        self.buffered_samples = 0
 
         # Event debouncing for MQTT publishing
         self.last_event_time = {}
@@ -82,6 +83,21 @@ class StreamRecognizer:
 
         return db
 
+    def _append_to_buffer(self, audio_chunk: np.ndarray) -> None:
+        """Append samples to the history buffer, dropping the oldest ones.
+
+        Args:
+            audio_chunk: Audio samples (1D numpy array).
+        """
+        chunk = np.asarray(audio_chunk, dtype=np.float32).reshape(-1)
+        n = len(chunk)
+        if n >= self.buffer_size:
+            self.ring_buffer[:] = chunk[-self.buffer_size:]
+        elif n > 0:
+            self.ring_buffer[:-n] = self.ring_buffer[n:]
+            self.ring_buffer[-n:] = chunk
+        self.buffered_samples = min(self.buffered_samples + n, self.buffer_size)
+
     def process_chunk(self, audio_chunk: np.ndarray) -> List[Dict]:
         """Process an audio chunk and detect events.
 
@@ -94,14 +110,14 @@ class StreamRecognizer:
         self.total_chunks += 1
 
         # Add chunk to ring buffer
-        self.ring_buffer.extend(audio_chunk)
+        self._append_to_buffer(audio_chunk)
 
         # Check if buffer is full enough for inference
-        if len(self.ring_buffer) < self.window_size:
+        if self.buffered_samples < self.window_size:
             return []
 
-        # Extract window from buffer
-        window = np.array(list(self.ring_buffer)[-self.window_size:], dtype=np.float32)
+        # Extract window from buffer (view, no copy)
+        window = self.ring_buffer[-self.window_size:]
 
         # Check audio energy - skip if too quiet
         energy_db = self._calculate_energy_db(window)
@@ -223,13 +239,14 @@ class StreamRecognizer:
             'skipped_silent_chunks': self.skipped_silent_chunks,
             'total_detections': self.total_detections,
             'skipped_mqtt_publishes': self.skipped_mqtt_publishes,
-            'buffer_size': len(self.ring_buffer),
-            'buffer_full': len(self.ring_buffer) >= self.window_size
+            'buffer_size': self.buffered_samples,
+            'buffer_full': self.buffered_samples >= self.window_size
         }
 
     def reset(self):
         """Reset recognizer state."""
-        self.ring_buffer.clear()
+        self.ring_buffer.fill(0.0)
+        self.buffered_samples = 0
         self.last_event_time.clear()
         self.last_published_song = None
         self.total_chunks = 0
@@ -299,9 +316,12 @@ def start_listening(device,
                     # Record chunk
                     audio_chunk = recorder.record(numframes=chunk_size)
 
-                    # Flatten to 1D if needed
+                    # Flatten to 1D if needed (column view for mono, no float64 upcast)
                     if audio_chunk.ndim > 1:
-                        audio_chunk = audio_chunk.mean(axis=1)
+                        if audio_chunk.shape[1] == 1:
+                            audio_chunk = audio_chunk[:, 0]
+                        else:
+                            audio_chunk = audio_chunk.mean(axis=1, dtype=np.float32)
 
                     # Process chunk
                     detections = stream_recognizer.process_chunk(audio_chunk)
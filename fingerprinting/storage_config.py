@@ -2,7 +2,7 @@
 
 import os
 from enum import Enum
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import yaml
 
@@ -41,18 +41,26 @@ def get_database_config(db_type: DatabaseType = DatabaseType.MEMORY,
         raise ValueError(f"Unsupported database type: {db_type}")
 
 
-def get_memory_config() -> Dict:
+def get_memory_config(indexed_fields: Optional[List[str]] = None,
+                      sqlite_path: Optional[str] = None) -> Dict:
     """Get in-memory database configuration.
 
     Note: Not persistent, data lost on restart.
     Good for development/testing.
 
+    Args:
+        indexed_fields: Metadata fields (dot-notation) to index for
+            query_by_field lookups.
+        sqlite_path: File for the SQLite metadata database (default: in-memory).
+
     Returns:
         Dejavu configuration dictionary.
     """
     return {
         "database_type": "memory",
-        "database": {}
+        "database": {},
+        "indexed_fields": list(indexed_fields or []),
+        "sqlite_path": sqlite_path or ":memory:"
     }
 
 
@@ -181,7 +189,8 @@ def load_config_from_file(config_path: str) -> Optional[Dict]:
     db_type_str = db_config.get('type', 'memory').lower()
 
     if db_type_str == 'memory':
-        return get_memory_config()
+        return get_memory_config(indexed_fields=db_config.get('indexed_fields'),
+                                 sqlite_path=db_config.get('sqlite_path'))
     elif db_type_str in ['postgresql', 'postgres']:
         return {
             "database_type": "postgres",
@@ -8,12 +8,58 @@ import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from fingerprinting.engine import FingerprintEngine
 from fingerprinting.storage_config import DatabaseType
 
 
+# Imported songs whose metadata is buffered before it is written in one batch
+METADATA_BATCH_SIZE = 100
+
+
+def store_pending_metadata(engine: FingerprintEngine,
+                           pending_metadata: List[Tuple[str, Dict, str]],
+                           pending_results: List[Dict]) -> None:
+    """Write buffered metadata and settle the status of the buffered songs.
+
+    The batch is written with bulk_copy_metadata(). If that fails, each song
+    is retried with insert_metadata(); songs whose metadata still can't be
+    stored are marked as errors (their fingerprints are already stored, so
+    a rerun would skip them). Both buffers are emptied.
+
+    Args:
+        engine: FingerprintEngine instance.
+        pending_metadata: (song_name, metadata, source_file) tuples collected
+            by import_fingerprint_file().
+        pending_results: Result dictionaries ('pending' status) matching
+            pending_metadata entry for entry.
+    """
+    if not pending_metadata:
+        return
+
+    print(f"\nStoring metadata for {len(pending_metadata)} song(s)...")
+    try:
+        try:
+            engine.metadata_db.bulk_copy_metadata(pending_metadata)
+        except Exception as e:
+            print(f"  Batch write failed ({e}), storing songs one by one...")
+            for (song_name, metadata, source_file), result in zip(pending_metadata, pending_results):
+                try:
+                    engine.metadata_db.insert_metadata(song_name, metadata, source_file)
+                    result['status'] = 'success'
+                except Exception as row_error:
+                    result['status'] = 'error'
+                    result['error'] = f"Fingerprints stored but metadata failed: {row_error}"
+                    print(f"  ✗ {song_name}: {result['error']}")
+        else:
+            for result in pending_results:
+                result['status'] = 'success'
+    finally:
+        pending_metadata.clear()
+        pending_results.clear()
+
+
 def print_progress_bar(iteration: int, total: int, prefix: str = '', suffix: str = '',
                        length: int = 40, fill: str = '█', end: str = '\r'):
     """Print a progress bar to terminal.
@@ -42,12 +88,19 @@ def print_progress_bar(iteration: int, total: int, prefix: str = '', suffix: str
         print()
 
 
-def import_fingerprint_file(json_path: Path, engine: FingerprintEngine) -> Dict:
+def import_fingerprint_file(json_path: Path,
+                            engine: FingerprintEngine,
+                            pending_metadata: Optional[List[Tuple[str, Dict, str]]] = None) -> Dict:
     """Import single fingerprint file into database.
 
     Args:
         json_path: Path to fingerprint JSON file.
         engine: FingerprintEngine instance.
+        pending_metadata: If given, metadata is appended here as
+            (song_name, metadata, source_file) for a later
+            store_pending_metadata() call instead of being stored
+            immediately, and a successful import has status 'pending'
+            until then.
 
     Returns:
         Result dictionary with status.
@@ -130,18 +183,21 @@ def import_fingerprint_file(json_path: Path, engine: FingerprintEngine) -> Dict:
         metadata_to_store = dict(metadata)
         metadata_to_store['debounce_seconds'] = debounce_seconds
 
-        engine.metadata_db.insert_metadata(
-            song_name=song_name,
-            metadata=metadata_to_store,
-            source_file=source_file or ''
-        )
+        if pending_metadata is not None:
+            pending_metadata.append((song_name, metadata_to_store, source_file or ''))
+        else:
+            engine.metadata_db.insert_metadata(
+                song_name=song_name,
+                metadata=metadata_to_store,
+                source_file=source_file or ''
+            )
 
         return {
             'file': str(json_path),
             'song_name': song_name,
             'fingerprint_count': len(fingerprints),
             'metadata_fields': list(metadata.keys()) if metadata else [],
-            'status': 'success'
+            'status': 'pending' if pending_metadata is not None else 'success'
         }
 
     except Exception as e:
@@ -259,24 +315,43 @@ Notes:
 
     # Process each JSON file
     results = []
+    pending_metadata = []
     total_files = len(json_files)
 
-    for idx, json_file in enumerate(json_files, start=1):
-        # File progress header
-        print(f"\n[{idx}/{total_files}] Processing: {json_file.name}")
-
-        result = import_fingerprint_file(json_file, engine)
-        results.append(result)
+    # Songs count as imported once their metadata is stored, which happens
+    # every METADATA_BATCH_SIZE songs and for whatever is still buffered
+    # when the import ends or is interrupted
+    pending_results = []
+    try:
+        for idx, json_file in enumerate(json_files, start=1):
+            # File progress header
+            print(f"\n[{idx}/{total_files}] Processing: {json_file.name}")
+
+            result = import_fingerprint_file(json_file, engine, pending_metadata)
+            results.append(result)
+
+            if result['status'] == 'pending':
+                pending_results.append(result)
+                print(f"  ✓ Stored fingerprints: {result['song_name']}")
+                print(f"    Fingerprints: {result.get('fingerprint_count', 0):,}")
+                if result.get('metadata_fields'):
+                    print(f"    Metadata fields: {', '.join(result['metadata_fields'])}")
+            elif result['status'] == 'skipped':
+                print(f"  → Skipped: {result['song_name']} ({result['reason']})")
+            else:
+                print(f"  ✗ Error: {result['error']}")
+
+            if len(pending_metadata) >= METADATA_BATCH_SIZE:
+                store_pending_metadata(engine, pending_metadata, pending_results)
+    except BaseException:
+        # Store what is buffered without masking the original error
+        try:
+            store_pending_metadata(engine, pending_metadata, pending_results)
+        except Exception as e:
+            print(f"Error storing pending metadata: {e}")
+        raise
 
-        if result['status'] == 'success':
-            print(f"  ✓ Imported: {result['song_name']}")
-            print(f"    Fingerprints: {result.get('fingerprint_count', 0):,}")
-            if result.get('metadata_fields'):
-                print(f"    Metadata fields: {', '.join(result['metadata_fields'])}")
-        elif result['status'] == 'skipped':
-            print(f"  → Skipped: {result['song_name']} ({result['reason']})")
-        else:
-            print(f"  ✗ Error: {result['error']}")
+    store_pending_metadata(engine, pending_metadata, pending_results)
 
     # Summary
     success_count = sum(1 for r in results if r['status'] == 'success')
@@ -179,6 +179,8 @@ Note: Register audio first using:
             print("Or remove --microphone flag to use loopback device.")
         sys.exit(1)
 
+    print(f"\nSelected device: {device.name}")
+
     # Initialize fingerprint engine
     print("\nMethod: Fingerprinting (Dejavu)")
 
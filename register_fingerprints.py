@@ -84,6 +84,13 @@ Note: Make sure database is running before registering (if using PostgreSQL/MySQ
         help='Comma-separated list of file extensions (default: .wav,.mp3,.m4a,.ogg,.flac)'
     )
 
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Number of parallel fingerprinting processes (default: CPU count)'
+    )
+
     args = parser.parse_args()
 
     # Parse database type
@@ -165,7 +172,8 @@ Note: Make sure database is running before registering (if using PostgreSQL/MySQ
             print("Mode: By-class registration (training/class_name/*.wav)")
             results_by_class = engine.register_directory_by_class(
                 args.directory,
-                extensions=extensions
+                extensions=extensions,
+                max_workers=args.jobs
             )
 
             # Print results
@@ -198,7 +206,8 @@ Note: Make sure database is running before registering (if using PostgreSQL/MySQ
             results = engine.register_directory(
                 args.directory,
                 extensions=extensions,
-                recursive=True
+                recursive=True,
+                max_workers=args.jobs
             )
 
             # Print results
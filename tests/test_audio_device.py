@@ -0,0 +1,128 @@
+"""Tests for audio_device module."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+import audio_device
+
+
+def _make_mic(name, channels=2, isloopback=False):
+    """Create a fake soundcard microphone."""
+    mic = MagicMock()
+    mic.name = name
+    mic.channels = channels
+    mic.isloopback = isloopback
+    return mic
+
+
+@pytest.fixture
+def fake_microphones(monkeypatch):
+    """Patch soundcard enumeration with a fixed device list."""
+    mics = [
+        _make_mic('Built-in Microphone'),
+        _make_mic('BlackHole 2ch'),
+        _make_mic('USB Audio Interface'),
+    ]
+    all_microphones = MagicMock(return_value=mics)
+    monkeypatch.setattr(audio_device.sc, 'all_microphones', all_microphones)
+    audio_device._enumeration_cache.clear()
+    yield mics, all_microphones
+    audio_device._enumeration_cache.clear()
+
+
+def test_select_device_enumerates_once(fake_microphones):
+    """Test that device selection queries soundcard only once."""
+    mics, all_microphones = fake_microphones
+
+    selected = audio_device.select_device(device_name='blackhole')
+
+    assert selected is mics[1]
+    assert all_microphones.call_count == 1
+
+
+def test_enumeration_is_cached(fake_microphones):
+    """Test that repeated lookups reuse the cached enumeration."""
+    mics, all_microphones = fake_microphones
+
+    audio_device.list_audio_devices()
+    audio_device.select_device(device_id=2)
+    audio_device.select_device(prefer_microphone=True)
+
+    assert all_microphones.call_count == 1
+
+
+def test_enumeration_refresh(fake_microphones):
+    """Test that refresh=True bypasses the enumeration cache."""
+    mics, all_microphones = fake_microphones
+
+    audio_device.list_audio_devices()
+    audio_device.list_audio_devices(refresh=True)
+
+    assert all_microphones.call_count == 2
+
+
+def test_select_device_id_out_of_range(fake_microphones):
+    """Test that an invalid device ID returns None."""
+    assert audio_device.select_device(device_id=10) is None
+
+
+def test_device_list_includes_lowercase_name(fake_microphones):
+    """Test that device dictionaries carry a precomputed lowercase name."""
+    devices = {d['id']: d for d in audio_device.list_audio_devices()}
+
+    assert devices[1]['name'] == 'BlackHole 2ch'
+    assert devices[1]['name_lower'] == 'blackhole 2ch'
+
+
+def test_find_loopback_device_by_name_pattern():
+    """Test loopback detection by name when no device is flagged."""
+    devices = [
+        {'id': 0, 'name': 'Built-in Microphone', 'channels': 1, 'is_loopback': False},
+        {'id': 1, 'name': 'Monitor of Built-in Audio', 'channels': 2, 'is_loopback': False},
+    ]
+
+    assert audio_device.find_loopback_device(devices)['id'] == 1
+
+
+def test_find_microphone_device_by_name_pattern():
+    """Test microphone detection skips flagged loopback devices."""
+    devices = [
+        {'id': 0, 'name': 'Mic Loopback', 'channels': 2, 'is_loopback': True},
+        {'id': 1, 'name': 'HDMI Output', 'channels': 2, 'is_loopback': False},
+        {'id': 2, 'name': 'USB MICROPHONE', 'channels': 1, 'is_loopback': False},
+    ]
+
+    assert audio_device.find_microphone_device(devices)['id'] == 2
+
+
+def test_select_device_prefers_exact_name(monkeypatch):
+    """Test that an exact name match wins over an earlier substring match."""
+    mics = [_make_mic('Speakers (Realtek)'), _make_mic('Speakers')]
+    monkeypatch.setattr(audio_device.sc, 'all_microphones', MagicMock(return_value=mics))
+    audio_device._enumeration_cache.clear()
+
+    assert audio_device.select_device(device_name='SPEAKERS') is mics[1]
+    assert audio_device.select_device(device_name='realtek') is mics[0]
+
+    audio_device._enumeration_cache.clear()
+
+
+def test_list_audio_devices_enumeration_order(monkeypatch):
+    """Test that devices keep enumeration order and loopback detection prefers flagged devices."""
+    mics = [
+        _make_mic('Built-in Microphone'),
+        _make_mic('Monitor of Built-in Audio'),
+        _make_mic('Loopback Device', isloopback=True),
+    ]
+    monkeypatch.setattr(audio_device.sc, 'all_microphones', MagicMock(return_value=mics))
+    audio_device._enumeration_cache.clear()
+
+    devices = audio_device.list_audio_devices()
+
+    assert [d['id'] for d in devices] == [0, 1, 2]
+    assert audio_device.find_loopback_device(devices)['id'] == 2
+    assert audio_device.find_microphone_device(devices)['id'] == 0
+    assert audio_device.select_device(device_name='built-in') is mics[0]
+
+    audio_device._enumeration_cache.clear()
@@ -1,9 +1,14 @@
 """Tests for audio_utils module."""
 
+import os
+
 import pytest
 from pathlib import Path
 
+import audio_device
+import audio_utils
 from audio_utils import (
+    batch_convert_directory,
     get_audio_info,
     needs_conversion,
     create_yaml_scaffold,
@@ -14,6 +19,15 @@ from audio_utils import (
 )
 
 
+@pytest.fixture(autouse=True)
+def isolated_probe_cache(tmp_path, monkeypatch):
+    """Keep the persistent probe cache out of the user's home directory."""
+    monkeypatch.setattr(audio_utils, 'PROBE_CACHE_PATH', tmp_path / 'cache' / 'probe.json')
+    monkeypatch.setattr(audio_utils, '_probe_cache', None)
+    monkeypatch.setattr(audio_utils, '_probe_cache_dirty', False)
+    monkeypatch.setattr(audio_utils, '_probe_memo', {})
+
+
 def test_get_audio_info(sample_audio_file):
     """Test getting audio file information."""
     info = get_audio_info(sample_audio_file)
@@ -227,3 +241,678 @@ def test_find_audio_files_empty_directory(temp_dir):
     files = find_audio_files(empty_dir, recursive=True)
 
     assert len(files) == 0
+
+
+def test_batch_convert_directory_reports_in_order(temp_dir, monkeypatch, capsys):
+    """Test that batch conversion reports results in file order."""
+    for name in ("b.mp3", "a.mp3", "c.wav"):
+        (temp_dir / name).write_text("")
+
+    monkeypatch.setattr(audio_utils, 'needs_conversion',
+                        lambda path, info=None: (path.suffix != '.wav', "needs work" if path.suffix != '.wav' else "Already optimal"))
+    monkeypatch.setattr(audio_utils, 'convert_to_fingerprint_format',
+                        lambda inp, out, **kwargs: (inp.name != 'b.mp3', f"Converted: {out.name}"))
+
+    stats = batch_convert_directory(temp_dir, recursive=False, max_workers=1)
+
+    assert stats['total'] == 3
+    assert stats['converted'] == 1
+    assert stats['failed'] == 1
+    assert stats['skipped'] == 1
+
+    out = capsys.readouterr().out
+    assert out.index("CONVERTING: a.mp3") < out.index("CONVERTING: b.mp3")
+
+
+def test_get_audio_info_is_cached(sample_audio_file, monkeypatch):
+    """Test that unchanged files are only probed once."""
+    calls = []
+
+    def fake_probe(path, size, mtime_ns):
+        calls.append(path)
+        return {'sample_rate': 44100, 'channels': 1, 'codec': 'pcm_s16le', 'duration': 1.0}
+
+    monkeypatch.setattr(audio_utils, '_read_audio_info', fake_probe)
+
+    first = get_audio_info(sample_audio_file)
+    first['sample_rate'] = 0  # Mutating a result must not affect the cache
+    second = get_audio_info(sample_audio_file)
+
+    assert len(calls) == 1
+    assert second['sample_rate'] == 44100
+
+
+def test_get_audio_info_reads_flac_header(temp_dir):
+    """Test that FLAC headers are read with ffprobe-style codec names."""
+    soundfile = pytest.importorskip('soundfile')
+    import numpy as np
+
+    flac_path = temp_dir / "stereo.flac"
+    soundfile.write(str(flac_path), np.zeros((16000, 2), dtype=np.int16), 16000)
+
+    info = get_audio_info(flac_path)
+
+    assert info == {'sample_rate': 16000, 'channels': 2, 'codec': 'flac', 'duration': 1.0}
+
+
+def _use_fake_ffmpeg(monkeypatch, *args, **kwargs):
+    """Route conversions through a fake ffmpeg, bypassing the in-process path."""
+    monkeypatch.setattr(audio_utils, 'IN_PROCESS_EXTENSIONS', frozenset())
+    monkeypatch.setattr(audio_utils.subprocess, 'Popen', _fake_ffmpeg(*args, **kwargs))
+
+
+def _fake_ffmpeg(returncode, stderr=b"", stdout=b""):
+    """Build a Popen stand-in that writes the output file like ffmpeg."""
+    class FakePopen:
+        def __init__(self, cmd, **kwargs):
+            self.cmd = cmd
+            self.returncode = returncode
+
+        def communicate(self, timeout=None):
+            if self.cmd[-1] == 'pipe:1':
+                return stdout, stderr
+            if self.returncode == 0:
+                Path(self.cmd[-1]).write_bytes(b"converted")
+            return None, stderr
+
+    return FakePopen
+
+
+def test_convert_in_place_replaces_file_via_temp(temp_dir, sample_audio_file, monkeypatch):
+    """Test that in-place conversion swaps in a temp file and leaves no leftovers."""
+    from audio_utils import convert_to_fingerprint_format
+
+    _use_fake_ffmpeg(monkeypatch, 0)
+    monkeypatch.setattr(audio_utils, 'MEMORY_CONVERSION_LIMIT', 0)
+
+    os.chmod(sample_audio_file, 0o644)
+
+    success, _ = convert_to_fingerprint_format(sample_audio_file, sample_audio_file, overwrite=True)
+
+    assert success
+    assert sample_audio_file.read_bytes() == b"converted"
+    assert sample_audio_file.stat().st_mode & 0o777 == 0o644
+    assert [p.name for p in temp_dir.iterdir()] == [sample_audio_file.name]
+
+
+def test_convert_in_place_small_file_via_pipe(temp_dir, sample_audio_file, monkeypatch):
+    """Test that small in-place conversions are piped and get valid WAV sizes."""
+    import struct
+    import wave
+    from audio_utils import convert_to_fingerprint_format
+
+    # Streamed WAV as ffmpeg writes it to a pipe: LIST chunk, unknown sizes
+    frames = b"\x01\x00" * 100
+    streamed = (b"RIFF" + b"\xff\xff\xff\xff" + b"WAVE"
+                + b"fmt " + struct.pack('<IHHIIHH', 16, 1, 1, 44100, 88200, 2, 16)
+                + b"LIST" + struct.pack('<I', 5) + b"INFOx\x00"
+                + b"data" + b"\xff\xff\xff\xff" + frames)
+    _use_fake_ffmpeg(monkeypatch, 0, stdout=streamed)
+
+    success, _ = convert_to_fingerprint_format(sample_audio_file, sample_audio_file, overwrite=True,
+                                               duration=1.0)
+
+    assert success
+    assert [p.name for p in temp_dir.iterdir()] == [sample_audio_file.name]
+    with wave.open(str(sample_audio_file)) as wav:
+        assert wav.getnframes() == 100
+        assert wav.readframes(100) == frames
+
+
+class _FakeRecorder:
+    """Recorder yielding a constant signal, stopping after a number of chunks."""
+
+    def __init__(self, channels, max_chunks, value=0.25):
+        self.channels = channels
+        self.max_chunks = max_chunks
+        self.value = value
+        self.count = 0
+        self.frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, numframes):
+        import numpy as np
+        self.count += 1
+        self.frames += numframes
+        if self.count >= self.max_chunks:
+            audio_utils._recording_active = False
+        return np.full((numframes, self.channels), self.value, dtype=np.float32)
+
+
+def test_record_audio_grows_buffer(temp_dir, monkeypatch):
+    """Test that unbounded recordings grow past the initial buffer."""
+    import wave
+    from unittest.mock import MagicMock
+
+    device = MagicMock()
+    device.name = 'Fake Loopback'
+    device.channels = 2
+    recorder = _FakeRecorder(channels=2, max_chunks=150)
+    device.recorder.return_value = recorder
+    monkeypatch.setattr(audio_device, 'select_device', lambda **kwargs: device)
+
+    output_path = temp_dir / "recording.wav"
+    success, message = audio_utils.record_audio(output_path, sample_rate=1000)
+
+    assert success, message
+    with wave.open(str(output_path)) as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getframerate() == 1000
+        assert wav_file.getnframes() == recorder.frames
+
+
+def test_record_audio_clips_to_int16(temp_dir, monkeypatch):
+    """Test that out-of-range samples are clipped instead of wrapping around."""
+    import wave
+    import numpy as np
+    from unittest.mock import MagicMock
+
+    device = MagicMock()
+    device.name = 'Fake Loopback'
+    device.channels = 2
+    device.recorder.return_value = _FakeRecorder(channels=2, max_chunks=1, value=1.5)
+    monkeypatch.setattr(audio_device, 'select_device', lambda **kwargs: device)
+
+    output_path = temp_dir / "clipped.wav"
+    success, message = audio_utils.record_audio(output_path, sample_rate=1000)
+
+    assert success, message
+    with wave.open(str(output_path)) as wav_file:
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+    assert samples.min() == 32767
+
+
+def test_parse_ffprobe_output():
+    """Test parsing ffprobe key=value output independent of field order."""
+    from audio_utils import _parse_ffprobe_output
+
+    output = b"codec_name=mp3\nsample_rate=48000\nchannels=2\nduration=N/A\n"
+
+    assert _parse_ffprobe_output(output) == {
+        'sample_rate': 48000,
+        'channels': 2,
+        'codec': 'mp3',
+        'duration': 0.0
+    }
+    assert _parse_ffprobe_output(b"") is None
+
+
+def test_find_audio_files_mixed_case_extension(temp_dir):
+    """Test that extension matching ignores case."""
+    (temp_dir / "upper.WAV").write_text("")
+    (temp_dir / "mixed.Mp3").write_text("")
+    (temp_dir / "notes.TXT").write_text("")
+
+    files = find_audio_files(temp_dir, recursive=False)
+
+    assert [f.name for f in files] == ["mixed.Mp3", "upper.WAV"]
+
+
+def test_convert_reports_last_ffmpeg_error_line(temp_dir, sample_audio_file, monkeypatch):
+    """Test that a failed conversion reports ffmpeg's last stderr line."""
+    from audio_utils import convert_to_fingerprint_format
+
+    stderr = b"noise\nInvalid data found when processing input\n\n"
+    _use_fake_ffmpeg(monkeypatch, 1, stderr)
+
+    success, message = convert_to_fingerprint_format(sample_audio_file, temp_dir / "out.wav")
+
+    assert not success
+    assert message == "ffmpeg error: Invalid data found when processing input"
+
+
+def test_batch_create_yaml_scaffolds(temp_dir, capsys):
+    """Test batch YAML creation skips existing files and reports in order."""
+    from audio_utils import batch_create_yaml_scaffolds
+
+    for name in ("b.wav", "a.wav", "c.wav"):
+        (temp_dir / name).write_text("")
+    (temp_dir / "c.yaml").write_text("existing: true\n")
+
+    stats = batch_create_yaml_scaffolds(temp_dir, recursive=False)
+
+    assert stats['created'] == 2
+    assert stats['skipped'] == 1
+    assert (temp_dir / "a.yaml").exists()
+    assert (temp_dir / "c.yaml").read_text() == "existing: true\n"
+
+    out = capsys.readouterr().out
+    assert out.index("a.yaml") < out.index("b.yaml") < out.index("SKIP: c.wav")
+
+
+def test_has_valid_header(temp_dir, sample_audio_file):
+    """Test magic-byte validation of audio file headers."""
+    from audio_utils import has_valid_header
+
+    stub = temp_dir / "stub.mp3"
+    stub.write_bytes(b"not really audio")
+    mp3 = temp_dir / "tagged.mp3"
+    mp3.write_bytes(b"ID3\x04\x00" + bytes(11))
+    unknown = temp_dir / "notes.txt"
+    unknown.write_text("")
+
+    assert has_valid_header(sample_audio_file)
+    assert has_valid_header(mp3)
+    assert not has_valid_header(stub)
+    assert has_valid_header(unknown)
+
+
+def test_needs_conversion_invalid_header(temp_dir):
+    """Test that files with a bogus header that also fail to probe are flagged invalid."""
+    stub = temp_dir / "stub.wav"
+    stub.write_bytes(b"garbage" * 4)
+
+    needs_conv, reason = needs_conversion(stub)
+
+    assert needs_conv is True
+    assert reason == audio_utils.INVALID_HEADER_REASON
+
+
+def test_needs_conversion_bad_header_but_probes(temp_dir, monkeypatch):
+    """Test that a file ffprobe can read is not rejected for its header."""
+    padded = temp_dir / "padded.mp3"
+    padded.write_bytes(b"\x00" * 64)
+    monkeypatch.setattr(audio_utils, 'get_audio_info',
+                        lambda path: {'sample_rate': 44100, 'channels': 2, 'codec': 'mp3', 'duration': 1.0})
+
+    needs_conv, reason = needs_conversion(padded)
+
+    assert needs_conv is True
+    assert reason == "2ch → 1ch, .mp3 → .wav"
+
+
+def test_batch_convert_include_optimal_probes_bad_headers(temp_dir, monkeypatch):
+    """Test that converting everything still tries files whose header check fails but probe succeeds."""
+    (temp_dir / "padded.mp3").write_bytes(b"\x00" * 64)
+    (temp_dir / "broken.mp3").write_bytes(b"\x00" * 64)
+    monkeypatch.setattr(audio_utils, 'get_audio_info',
+                        lambda path: None if path.name == 'broken.mp3' else
+                        {'sample_rate': 44100, 'channels': 1, 'codec': 'mp3', 'duration': 1.0})
+    converted = []
+    monkeypatch.setattr(audio_utils, '_convert_worker',
+                        lambda task: converted.append(task[0].name) or (True, "Converted"))
+
+    stats = batch_convert_directory(temp_dir, output_dir=temp_dir / "out", recursive=False,
+                                    skip_optimal=False, max_workers=1)
+
+    assert converted == ['padded.mp3']
+    assert stats['converted'] == 1
+    assert stats['failed'] == 1
+
+
+def test_find_audio_files_requires_extension(temp_dir):
+    """Test that files named like an extension without a dot are ignored."""
+    (temp_dir / "wav").write_text("")
+    (temp_dir / "track.flac").write_text("")
+
+    files = find_audio_files(temp_dir, recursive=False)
+
+    assert [f.name for f in files] == ["track.flac"]
+
+
+def test_batch_convert_include_optimal_skips_probe(temp_dir, monkeypatch):
+    """Test that converting everything does not probe files first."""
+    (temp_dir / "a.wav").write_bytes(b"RIFF\x00\x00\x00\x00WAVEfmt ")
+
+    def fail_probe(path, info=None):
+        raise AssertionError("files should not be probed")
+
+    monkeypatch.setattr(audio_utils, 'needs_conversion', fail_probe)
+    monkeypatch.setattr(audio_utils, 'get_audio_info', fail_probe)
+    monkeypatch.setattr(audio_utils, 'convert_to_fingerprint_format',
+                        lambda inp, out, **kwargs: (True, f"Converted: {out.name}"))
+
+    stats = batch_convert_directory(temp_dir, output_dir=temp_dir / "out", recursive=False,
+                                    skip_optimal=False, max_workers=1)
+
+    assert stats['converted'] == 1
+
+
+@pytest.mark.parametrize('name', ['mario_dies_002', 'Song (Live)', 'true', '007', 'a: b', '#1', 'café'])
+@pytest.mark.parametrize('metadata,debounce', [(None, None), ({'game': 'Zelda', 'level': 3}, 5.0)])
+def test_render_yaml_scaffold_matches_yaml_dump(name, metadata, debounce):
+    """Test that the templated scaffold is identical to PyYAML's output."""
+    import yaml
+
+    scaffold = {'source': f"{name}.wav", 'metadata': {'song': name}}
+    if metadata:
+        scaffold['metadata'].update(metadata)
+    if debounce is not None:
+        scaffold['debounce_seconds'] = debounce
+
+    expected = yaml.dump(scaffold, default_flow_style=False, sort_keys=False)
+
+    assert audio_utils._render_yaml_scaffold(scaffold, metadata, debounce) == expected
+
+
+def test_get_audio_info_batch(sample_audio_file, sample_audio_file_16khz, temp_dir):
+    """Test probing several files at once."""
+    missing = temp_dir / "missing.wav"
+
+    infos = audio_utils.get_audio_info_batch([sample_audio_file, sample_audio_file_16khz, missing])
+
+    assert infos[sample_audio_file]['sample_rate'] == 44100
+    assert infos[sample_audio_file_16khz]['sample_rate'] == 16000
+    assert infos[missing] is None
+
+
+def test_needs_conversion_uses_given_info(sample_audio_file, monkeypatch):
+    """Test that preloaded audio info is not probed again."""
+    monkeypatch.setattr(audio_utils, 'get_audio_info', lambda path: pytest.fail("probed again"))
+    info = {'sample_rate': 16000, 'channels': 1, 'codec': 'pcm_s16le', 'duration': 1.0}
+
+    needs_conv, reason = needs_conversion(sample_audio_file, info=info)
+
+    assert needs_conv is True
+    assert "16000Hz" in reason
+
+
+def test_probe_cache_persists_ffprobe_results(temp_dir, monkeypatch):
+    """Test that ffprobe results survive a restart via the disk cache."""
+    audio_path = temp_dir / "song.mp3"
+    audio_path.write_bytes(b"ID3" + b"\x00" * 64)
+    calls = []
+
+    class Result:
+        returncode = 0
+        stdout = b"codec_name=mp3\nsample_rate=44100\nchannels=2\nduration=3.5\n"
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return Result()
+
+    monkeypatch.setattr(audio_utils.subprocess, 'run', fake_run)
+    first = get_audio_info(audio_path)
+    audio_utils._save_probe_cache()
+
+    # Simulate a new process: empty in-memory caches, cache file on disk
+    monkeypatch.setattr(audio_utils, '_probe_memo', {})
+    monkeypatch.setattr(audio_utils, '_probe_cache', None)
+    second = get_audio_info(audio_path)
+
+    assert audio_utils.PROBE_CACHE_PATH.exists()
+    assert len(calls) == 1
+    assert first == second == {'sample_rate': 44100, 'channels': 2, 'codec': 'mp3', 'duration': 3.5}
+
+    # A modified file is probed again
+    audio_path.write_bytes(b"ID3" + b"\x00" * 128)
+    get_audio_info(audio_path)
+    assert len(calls) == 2
+
+
+def test_failed_probe_is_not_cached(sample_audio_file, monkeypatch):
+    """Test that a failed probe is retried on the next lookup."""
+    results = [None, {'sample_rate': 44100, 'channels': 1, 'codec': 'pcm_s16le', 'duration': 1.0}]
+    monkeypatch.setattr(audio_utils, '_read_audio_info', lambda path, size, mtime_ns: results.pop(0))
+
+    assert get_audio_info(sample_audio_file) is None
+    assert get_audio_info(sample_audio_file)['sample_rate'] == 44100
+    assert results == []
+
+
+@pytest.mark.parametrize("content", ['[1, 2, 3]', '"oops"', '{"song.mp3": 42}'])
+def test_malformed_probe_cache_is_ignored(temp_dir, content, monkeypatch):
+    """Test that a corrupted cache file is treated as an empty cache."""
+    audio_utils.PROBE_CACHE_PATH.parent.mkdir(parents=True)
+    audio_utils.PROBE_CACHE_PATH.write_text(content)
+    audio_path = temp_dir / "song.mp3"
+    audio_path.write_bytes(b"ID3" + b"\x00" * 64)
+
+    class Result:
+        returncode = 0
+        stdout = b"codec_name=mp3\nsample_rate=44100\nchannels=2\nduration=3.5\n"
+
+    monkeypatch.setattr(audio_utils.subprocess, 'run', lambda cmd, **kwargs: Result())
+
+    assert get_audio_info(audio_path)['codec'] == 'mp3'
+
+
+def test_convert_timeout_scales_with_duration(temp_dir, sample_audio_file, monkeypatch):
+    """Test that long inputs get a longer ffmpeg timeout."""
+    from audio_utils import convert_to_fingerprint_format
+
+    timeouts = []
+    fake = _fake_ffmpeg(0)
+
+    class RecordingPopen(fake):
+        def communicate(self, timeout=None):
+            timeouts.append(timeout)
+            return super().communicate(timeout)
+
+    monkeypatch.setattr(audio_utils, 'IN_PROCESS_EXTENSIONS', frozenset())
+    monkeypatch.setattr(audio_utils.subprocess, 'Popen', RecordingPopen)
+    monkeypatch.setattr(audio_utils, 'get_audio_info', lambda path: pytest.fail("probed again"))
+
+    success, _ = convert_to_fingerprint_format(sample_audio_file, temp_dir / "long.wav",
+                                               duration=3 * 3600.0)
+    assert success
+    # Unknown duration: fixed timeout, still without probing
+    success, _ = convert_to_fingerprint_format(sample_audio_file, temp_dir / "short.wav")
+
+    assert success
+    assert timeouts == [3 * 3600.0 / audio_utils.CONVERSION_MIN_SPEED, audio_utils.CONVERSION_TIMEOUT]
+
+
+def test_convert_in_process_resamples_and_downmixes(temp_dir, monkeypatch):
+    """Test that WAV/FLAC inputs are converted without spawning ffmpeg."""
+    soundfile = pytest.importorskip('soundfile')
+    import numpy as np
+    from audio_utils import convert_to_fingerprint_format
+
+    monkeypatch.setattr(audio_utils.subprocess, 'Popen', lambda *a, **k: pytest.fail("ffmpeg spawned"))
+
+    input_path = temp_dir / "stereo48k.flac"
+    t = np.arange(48000) / 48000
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    soundfile.write(str(input_path), np.column_stack([tone, tone]), 48000)
+
+    success, _ = convert_to_fingerprint_format(input_path, duration=1.0)
+
+    assert success
+    data, sample_rate = soundfile.read(str(temp_dir / "stereo48k.wav"), dtype='float32')
+    assert sample_rate == OPTIMAL_SAMPLE_RATE
+    assert data.ndim == 1
+    assert len(data) == OPTIMAL_SAMPLE_RATE
+    assert abs(np.abs(data).max() - 0.5) < 0.01
+    assert soundfile.info(str(temp_dir / "stereo48k.wav")).subtype == 'PCM_16'
+
+
+@pytest.mark.parametrize('subtype,channels,sample_rate', [
+    ('PCM_16', 1, 44100), ('PCM_24', 2, 48000), ('PCM_U8', 1, 8000), ('FLOAT', 2, 22050),
+])
+def test_read_wav_header_fast_matches_soundfile(temp_dir, subtype, channels, sample_rate):
+    """Test that the struct-based WAV header parser agrees with libsndfile."""
+    soundfile = pytest.importorskip('soundfile')
+    import numpy as np
+
+    wav_path = temp_dir / "header.wav"
+    soundfile.write(str(wav_path), np.zeros((sample_rate // 2, channels)), sample_rate, subtype=subtype)
+
+    info = audio_utils._read_wav_header_fast(str(wav_path))
+
+    assert info is not None
+    assert info == audio_utils._soundfile_audio_info(str(wav_path))
+
+
+def test_read_wav_header_fast_rejects_streamed_wav(temp_dir):
+    """Test that WAVs with unknown data size are left to the other probes."""
+    import struct
+
+    wav_path = temp_dir / "streamed.wav"
+    wav_path.write_bytes(b"RIFF" + b"\xff" * 4 + b"WAVE"
+                         + b"fmt " + struct.pack('<IHHIIHH', 16, 1, 1, 44100, 88200, 2, 16)
+                         + b"data" + b"\xff" * 4 + b"\x00" * 100)
+
+    assert audio_utils._read_wav_header_fast(str(wav_path)) is None
+
+
+def test_batch_convert_creates_output_dirs_once(temp_dir, monkeypatch):
+    """Test that output directories are created once and not during dry runs."""
+    source = temp_dir / "src"
+    (source / "sub").mkdir(parents=True)
+    for name in ("a.mp3", "b.mp3", "sub/c.mp3"):
+        (source / name).write_bytes(b"ID3" + b"\x00" * 16)
+
+    monkeypatch.setattr(audio_utils, 'needs_conversion', lambda path, info=None: (True, "48000Hz → 44100Hz"))
+    monkeypatch.setattr(audio_utils, '_convert_worker', lambda task: (True, f"Converted: {task[1].name}"))
+    monkeypatch.setattr(audio_utils, 'get_audio_info', lambda path: None)
+
+    batch_convert_directory(source, output_dir=temp_dir / "out", dry_run=True)
+    assert not (temp_dir / "out").exists()
+
+    mkdirs = []
+    original_mkdir = Path.mkdir
+
+    def counting_mkdir(self, *args, **kwargs):
+        mkdirs.append(self)
+        return original_mkdir(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'mkdir', counting_mkdir)
+    stats = batch_convert_directory(source, output_dir=temp_dir / "out", max_workers=1)
+
+    assert stats['converted'] == 3
+    assert sorted(mkdirs) == [temp_dir / "out", temp_dir / "out" / "sub"]
+
+
+def test_batch_convert_passes_probed_duration(temp_dir, monkeypatch):
+    """Test that conversion workers get the duration from the batch probe."""
+    (temp_dir / "a.mp3").write_bytes(b"ID3" + b"\x00" * 16)
+    probes = []
+
+    def fake_info(path):
+        probes.append(path)
+        return {'sample_rate': 48000, 'channels': 2, 'codec': 'mp3', 'duration': 12.5}
+
+    tasks = []
+    monkeypatch.setattr(audio_utils, 'get_audio_info', fake_info)
+    monkeypatch.setattr(audio_utils, '_convert_worker', lambda task: tasks.append(task) or (True, "Converted"))
+
+    batch_convert_directory(temp_dir, output_dir=temp_dir / "out", recursive=False, max_workers=1)
+
+    assert len(probes) == 1
+    assert tasks[0][-1] == 12.5
+
+
+def test_batch_convert_skips_colliding_outputs(temp_dir, monkeypatch, capsys):
+    """Test that inputs mapping to the same output are converted only once."""
+    for name in ("song.flac", "song.mp3"):
+        (temp_dir / name).write_bytes(b"ID3" + b"\x00" * 16)
+
+    tasks = []
+    monkeypatch.setattr(audio_utils, 'get_audio_info', lambda path: None)
+    monkeypatch.setattr(audio_utils, 'needs_conversion', lambda path, info=None: (True, "48000Hz → 44100Hz"))
+    monkeypatch.setattr(audio_utils, '_convert_worker', lambda task: tasks.append(task) or (True, "Converted"))
+
+    stats = batch_convert_directory(temp_dir, output_dir=temp_dir / "out", recursive=False, max_workers=1)
+
+    assert [task[0].name for task in tasks] == ["song.flac"]
+    assert stats['converted'] == 1
+    assert stats['skipped'] == 1
+    assert "song.wav already produced by song.flac" in capsys.readouterr().out
+
+
+def test_batch_convert_reports_broken_pool(temp_dir, monkeypatch, capsys):
+    """Test that a crashed worker pool is reported per file, not raised."""
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    for name in ("a.mp3", "b.mp3"):
+        (temp_dir / name).write_bytes(b"ID3" + b"\x00" * 16)
+
+    class BrokenExecutor:
+        def __init__(self, max_workers=None):
+            pass
+
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        def shutdown(self, wait=True):
+            pass
+
+    monkeypatch.setattr(audio_utils, 'ProcessPoolExecutor', BrokenExecutor)
+    monkeypatch.setattr(audio_utils, 'get_audio_info', lambda path: None)
+    monkeypatch.setattr(audio_utils, 'needs_conversion', lambda path, info=None: (True, "48000Hz → 44100Hz"))
+
+    stats = batch_convert_directory(temp_dir, output_dir=temp_dir / "out", recursive=False, max_workers=2)
+
+    assert stats['failed'] == 2
+    assert "Conversion Summary" in capsys.readouterr().out
+
+
+def test_convert_in_process_large_input_uses_ffmpeg(temp_dir, monkeypatch):
+    """Test that inputs too large to decode in memory are left to ffmpeg."""
+    soundfile = pytest.importorskip('soundfile')
+    import numpy as np
+    from audio_utils import convert_to_fingerprint_format
+
+    input_path = temp_dir / "stereo.flac"
+    soundfile.write(str(input_path), np.zeros((1000, 2)), 48000)
+    spawned = []
+    fake = _fake_ffmpeg(0)
+    monkeypatch.setattr(audio_utils.subprocess, 'Popen', lambda *a, **k: spawned.append(a) or fake(*a, **k))
+    # Output estimate would fit, but the decoded float input does not
+    monkeypatch.setattr(audio_utils, 'MEMORY_CONVERSION_LIMIT', 1000 * 2 * 8 - 1)
+
+    success, _ = convert_to_fingerprint_format(input_path, duration=1000 / 48000)
+
+    assert success
+    assert len(spawned) == 1
+
+
+def test_convert_in_process_in_place_keeps_original_on_write_error(temp_dir, monkeypatch):
+    """Test that in-place in-process conversions never truncate the source."""
+    soundfile = pytest.importorskip('soundfile')
+    import numpy as np
+    from audio_utils import convert_to_fingerprint_format
+
+    input_path = temp_dir / "tone.wav"
+    soundfile.write(str(input_path), np.zeros((1000, 2)), 48000)
+    original = input_path.read_bytes()
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(audio_utils.os, 'replace', failing_replace)
+
+    success, message = convert_to_fingerprint_format(input_path, input_path, overwrite=True)
+
+    assert not success and "disk full" in message
+    assert input_path.read_bytes() == original
+    assert [p.name for p in temp_dir.iterdir()] == ["tone.wav"]
+
+
+def test_convert_in_process_output_mode(temp_dir):
+    """Test that converted files get umask-based permissions, not the temp file's 0600."""
+    soundfile = pytest.importorskip('soundfile')
+    import numpy as np
+    from audio_utils import convert_to_fingerprint_format
+
+    input_path = temp_dir / "tone.flac"
+    soundfile.write(str(input_path), np.zeros((1000, 2)), 48000)
+
+    old_umask = os.umask(0o022)
+    audio_utils._umask.cache_clear()
+    try:
+        success, _ = convert_to_fingerprint_format(input_path)
+    finally:
+        os.umask(old_umask)
+        audio_utils._umask.cache_clear()
+
+    assert success
+    assert (temp_dir / "tone.wav").stat().st_mode & 0o777 == 0o644
+
+    # In-place conversions keep the original file's mode
+    wav_path = temp_dir / "tone.wav"
+    os.chmod(wav_path, 0o640)
+    soundfile.write(str(wav_path), np.zeros((1000, 2)), 48000)
+    success, _ = convert_to_fingerprint_format(wav_path, wav_path, overwrite=True)
+
+    assert success
+    assert wav_path.stat().st_mode & 0o777 == 0o640
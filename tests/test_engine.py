@@ -0,0 +1,216 @@
+"""Tests for engine module."""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyaudio')  # Imported by dejavu.recognize
+
+from dejavu import fingerprint
+
+from fingerprinting.engine import FingerprintEngine
+
+
+@pytest.fixture
+def engine():
+    """Provide an in-memory engine with one registered song."""
+    engine = FingerprintEngine()
+
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(44100 * 5) * 8000).astype(np.int16)
+
+    db = engine.dejavu.db
+    song_id = db.insert_song('mario_dies', 'sha1')
+    db.insert_hashes(song_id, fingerprint.fingerprint(audio, Fs=44100))
+    db.set_song_fingerprinted(song_id)
+
+    yield engine, audio
+    engine.close()
+
+
+def test_recognize_audio_without_temp_file(engine, monkeypatch):
+    """Test that in-memory samples are matched without a WAV round-trip."""
+    import tempfile
+
+    engine, audio = engine
+    monkeypatch.setattr(tempfile, 'NamedTemporaryFile', lambda *a, **k: pytest.fail("temp file used"))
+
+    result = engine.recognize_audio(audio[44100:3 * 44100], sample_rate=44100)
+
+    assert result is not None
+    assert result['song_name'] == 'mario_dies'
+    assert result['offset'] == pytest.approx(1.0, abs=0.1)
+
+
+def test_register_directory_parallel(tmp_path):
+    """Test that a directory is fingerprinted by worker processes and stored once."""
+    sf = pytest.importorskip('soundfile')
+
+    rng = np.random.default_rng(1)
+    for name in ('doorbell', 'microwave'):
+        audio = (rng.standard_normal(44100 * 2) * 8000).astype(np.int16)
+        sf.write(tmp_path / f"{name}.wav", audio, 44100, subtype='PCM_16')
+    (tmp_path / 'broken.wav').write_bytes(b'not audio')
+
+    engine = FingerprintEngine()
+    try:
+        results = engine.register_directory(str(tmp_path), extensions=['.wav'], max_workers=2)
+        by_name = {r['song_name']: r for r in results}
+
+        assert by_name['doorbell']['status'] == 'registered'
+        assert by_name['microwave']['status'] == 'registered'
+        assert by_name['broken']['status'] == 'error'
+        assert engine.dejavu.db.get_num_songs() == 2
+
+        # Already fingerprinted files are not inserted again
+        engine.register_directory(str(tmp_path), extensions=['.wav'], max_workers=2)
+        assert engine.dejavu.db.get_num_songs() == 2
+    finally:
+        engine.close()
+
+
+def test_iter_audio_files_single_scan(tmp_path):
+    """Test that audio files are found for all extensions in one walk."""
+    from fingerprinting.engine import _iter_audio_files
+
+    (tmp_path / 'sub').mkdir()
+    for name in ('a.wav', 'b.MP3', 'sub/c.flac', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'')
+
+    found = sorted(os.path.relpath(p, tmp_path) for p in _iter_audio_files(str(tmp_path), ['.wav', '.mp3', '.flac']))
+    assert found == ['a.wav', 'b.MP3', os.path.join('sub', 'c.flac')]
+
+    flat = list(_iter_audio_files(str(tmp_path), ['.flac'], recursive=False))
+    assert flat == []
+
+
+def test_delete_songs_looks_up_names_once(engine, monkeypatch):
+    """Test that deleting several songs reads the song list once."""
+    engine, _ = engine
+    db = engine.dejavu.db
+    db.set_song_fingerprinted(db.insert_song('doorbell', 'sha2'))
+
+    deleted = []
+    monkeypatch.setattr(db, 'delete_unfingerprinted_song', deleted.append, raising=False)
+    get_songs = db.get_songs
+    calls = []
+    monkeypatch.setattr(db, 'get_songs', lambda: calls.append(1) or get_songs())
+
+    assert engine.delete_songs(['doorbell', 'unknown', 'mario_dies']) == 2
+    assert deleted == [2, 1]
+    assert len(calls) == 1
+
+
+def test_export_song_fingerprints_by_name(engine):
+    """Test that exports resolve the song ID from the song list."""
+    engine, _ = engine
+
+    assert engine.export_song_fingerprints('mario_dies')['song_id'] == 1
+    assert engine.export_song_fingerprints('unknown') is None
+
+
+def test_recognize_audio_caches_repeated_input(engine, monkeypatch):
+    """Test that identical samples are matched once and cached."""
+    engine, audio = engine
+    find_matches = engine._find_matches
+    calls = []
+    monkeypatch.setattr(engine, '_find_matches',
+                        lambda *a, **k: calls.append(1) or find_matches(*a, **k))
+
+    clip = audio[44100:3 * 44100]
+    first = engine.recognize_audio(clip, sample_rate=44100)
+    second = engine.recognize_audio(clip.copy(), sample_rate=44100)
+
+    assert len(calls) == 1
+    assert second == first
+    assert second is not first
+
+    # Changing the song set invalidates cached matches
+    engine.delete_songs(['unknown'])
+    engine.recognize_audio(clip, sample_rate=44100)
+    assert len(calls) == 2
+
+
+def test_recognize_audio_does_not_cache_misses(engine, monkeypatch):
+    """Test that inputs without a match are matched again next time."""
+    engine, _ = engine
+    calls = []
+    monkeypatch.setattr(engine, '_find_matches', lambda *a, **k: calls.append(1) or [])
+    monkeypatch.setattr(engine, '_align_matches', lambda matches: None)
+
+    silence = np.zeros(2 * 44100, dtype=np.int16)
+    assert engine.recognize_audio(silence, sample_rate=44100) is None
+    assert engine.recognize_audio(silence, sample_rate=44100) is None
+
+    assert len(calls) == 2
+
+
+def test_recognize_audio_downmix(engine, monkeypatch):
+    """Test that stereo input is downmixed to int16 mono in its own scale."""
+    engine, _ = engine
+    seen = []
+    monkeypatch.setattr(engine, '_find_matches', lambda samples, Fs: seen.append(samples) or [])
+
+    stereo = np.array([[1000, 3000], [-32768, -32768], [32767, 32767]], dtype=np.int16)
+    engine.recognize_audio(stereo, sample_rate=44100)
+    engine.recognize_audio(np.array([[0.5, 0.5], [-1.0, 0.0]], dtype=np.float32), sample_rate=44100)
+
+    assert seen[0].dtype == np.int16
+    assert seen[0].tolist() == [2000, -32768, 32767]
+    assert seen[1].dtype == np.int16
+    assert seen[1].tolist() == [16383, -16383]
+
+
+def test_register_directory_serial_fast_path(tmp_path, monkeypatch):
+    """Test that single-worker registration bypasses register_file."""
+    sf = pytest.importorskip('soundfile')
+
+    audio = (np.random.default_rng(2).standard_normal(44100) * 8000).astype(np.int16)
+    sf.write(tmp_path / 'kettle.wav', audio, 44100, subtype='PCM_16')
+
+    engine = FingerprintEngine()
+    try:
+        monkeypatch.setattr(engine, 'register_file', lambda *a, **k: pytest.fail("register_file used"))
+        results = engine.register_directory(str(tmp_path), extensions=['.wav'], max_workers=1)
+
+        assert [r['status'] for r in results] == ['registered']
+        assert engine.get_song_count() == 1
+        assert engine.get_songs()[0]['name'] == 'kettle'
+    finally:
+        engine.close()
+
+
+def test_file_sha1_matches_dejavu_hash(tmp_path):
+    """Test that the file hash matches Dejavu's chunked SHA-1 digest."""
+    import hashlib
+
+    from fingerprinting.engine import _file_sha1
+
+    path = tmp_path / 'data.bin'
+    path.write_bytes(bytes(range(256)) * 5000)
+
+    assert _file_sha1(str(path)) == hashlib.sha1(path.read_bytes()).hexdigest().upper()
+
+
+def test_engine_import_leaves_dejavu_decoder_unpatched():
+    """Test that importing the engine does not replace Dejavu's file hash function."""
+    from dejavu import decoder
+
+    from fingerprinting import engine
+
+    assert decoder.unique_hash is not engine._file_sha1
+    assert decoder.unique_hash.__module__ == decoder.__name__
+
+
+def test_song_row_adapter_row_formats():
+    """Test that song rows convert from dict rows and positional rows."""
+    from fingerprinting.engine import _song_row_adapter
+    from fingerprinting.memory_db import MemoryDatabase
+    from fingerprinting.postgres_db import PostgreSQLDatabase
+
+    to_dict = _song_row_adapter(MemoryDatabase())
+    assert to_dict({'song_id': 3, 'song_name': 'doorbell', 'file_sha1': 'x'}) == {'id': 3, 'name': 'doorbell'}
+
+    to_dict = _song_row_adapter(PostgreSQLDatabase.__new__(PostgreSQLDatabase))
+    assert to_dict([4, 'kettle', 'y']) == {'id': 4, 'name': 'kettle'}
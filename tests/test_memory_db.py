@@ -0,0 +1,174 @@
+"""Tests for memory_db module."""
+
+import pytest
+
+from fingerprinting.memory_db import MemoryDatabase
+
+
+@pytest.fixture
+def db():
+    """Provide a database with two fingerprinted songs and one pending."""
+    db = MemoryDatabase()
+    first = db.insert_song('first', 'sha1-first')
+    db.insert_hashes(first, [('aaa', 10), ('bbb', 20), ('ccc', 30)])
+    db.set_song_fingerprinted(first)
+
+    second = db.insert_song('second', 'sha1-second')
+    db.insert_hashes(second, [('bbb', 5), ('ddd', 7)])
+    db.set_song_fingerprinted(second)
+
+    pending = db.insert_song('pending', 'sha1-pending')
+    db.insert_hashes(pending, [('aaa', 1)])
+    return db
+
+
+def test_counts(db):
+    """Test fingerprint and song counts."""
+    assert db.get_num_fingerprints() == 6
+    assert db.get_num_songs() == 2
+    assert db.get_song_fingerprint_count(1) == 3
+    assert db.get_song_fingerprint_count(2) == 2
+    assert db.get_song_fingerprint_count(99) == 0
+
+
+def test_query(db):
+    """Test querying by hash and querying everything."""
+    assert sorted(db.query('bbb')) == [(1, 20), (2, 5)]
+    assert list(db.query('zzz')) == []
+    assert len(list(db.query(None))) == 6
+
+
+def test_query_all_arrays(db):
+    """Test that query_all returns live song IDs and offsets as arrays."""
+    db.delete_unfingerprinted_songs()
+    sids, offsets = db.query_all()
+
+    assert sids.tolist() == [1, 1, 1, 2, 2]
+    assert offsets.tolist() == [10, 20, 30, 5, 7]
+    assert list(db.query(None)) == list(zip(sids.tolist(), offsets.tolist()))
+
+
+def test_return_matches(db):
+    """Test that matches report song IDs with offset differences."""
+    matches = sorted(db.return_matches([('bbb', 2), ('ccc', 4), ('zzz', 0)]))
+
+    assert matches == [(1, 18), (1, 26), (2, 3)]
+
+
+def test_get_song_hashes(db):
+    """Test retrieving the hashes of a single song."""
+    assert db.get_song_hashes(2) == [('bbb', 5), ('ddd', 7)]
+    assert db.get_song_hashes(99) == []
+
+
+def test_delete_unfingerprinted_songs(db):
+    """Test that pending songs and their fingerprints are removed."""
+    db.delete_unfingerprinted_songs()
+
+    assert db.get_num_fingerprints() == 5
+    assert db.get_song_by_id(3) is None
+    assert db.get_song_fingerprint_count(3) == 0
+    assert list(db.return_matches([('aaa', 0)])) == [(1, 10)]
+    assert list(db.query('aaa')) == [(1, 10)]
+    assert sorted(db.get_iterable_kv_pairs()) == [
+        ('aaa', 1, 10), ('bbb', 1, 20), ('bbb', 2, 5), ('ccc', 1, 30), ('ddd', 2, 7)
+    ]
+
+
+def test_num_songs_counter(db):
+    """Test that the fingerprinted-song counter tracks state transitions."""
+    db.set_song_fingerprinted(1)  # Already fingerprinted
+    db.set_song_fingerprinted(99)  # Unknown song
+    assert db.get_num_songs() == 2
+
+    db.set_song_fingerprinted(3)
+    assert db.get_num_songs() == 3
+
+    db.delete_unfingerprinted_songs()
+    assert db.get_num_songs() == 3
+
+
+def test_delete_compacts_tombstones(db):
+    """Test that rows of deleted songs are reclaimed once they dominate."""
+    big = db.insert_song('big', 'sha1-big')
+    db.insert_hashes(big, [(f'{i:03x}', i) for i in range(10)])
+    db.insert('eee', 2, 9)  # Second range for song 2
+
+    db.delete_unfingerprinted_songs()
+
+    assert db._n == 6 and db._num_tombstones == 0
+    assert db.get_num_fingerprints() == 6
+    assert db.get_song_fingerprint_count(2) == 3
+    assert db.get_song_hashes(2) == [('bbb', 5), ('ddd', 7), ('eee', 9)]
+    assert db.get_song_hashes(3) == []
+    assert sorted(db.return_matches([('aaa', 0), ('005', 0)])) == [(1, 10)]
+
+
+def test_empty(db):
+    """Test clearing the database."""
+    db.empty()
+
+    assert db.get_num_fingerprints() == 0
+    assert db.get_num_songs() == 0
+    assert list(db.query(None)) == []
+    assert list(db.return_matches([('aaa', 0)])) == []
+
+
+def test_storage_grows_past_initial_capacity():
+    """Test inserting more fingerprints than the initial array capacity."""
+    from fingerprinting import memory_db
+
+    db = MemoryDatabase()
+    sid = db.insert_song('long', 'sha1-long')
+    count = memory_db.INITIAL_CAPACITY * 2 + 3
+    db.insert_hashes(sid, [(f"{i:020x}", i) for i in range(count - 1)])
+    db.insert(f"{count:020x}", sid, count)
+
+    assert db.get_num_fingerprints() == count
+    assert list(db.query(f"{5:020x}")) == [(sid, 5)]
+    assert db.get_song_hashes(sid)[-1] == (f"{count:020x}", count)
+
+
+def test_insert_rejects_overlong_hash():
+    """Test that hashes wider than the storage are not silently truncated."""
+    db = MemoryDatabase()
+
+    with pytest.raises(ValueError):
+        db.insert("f" * 21, 1, 0)
+    with pytest.raises(ValueError):
+        db.insert_hashes(1, [("f" * 21, 0)])
+
+
+def test_return_matches_after_more_inserts(db):
+    """Test that lookups see fingerprints added after a previous lookup."""
+    assert sorted(db.return_matches([('ddd', 0)])) == [(2, 7)]
+
+    db.insert('ddd', 1, 40)
+
+    assert sorted(db.return_matches([('ddd', 0), ('aaa', 0)])) == [(1, 10), (1, 40), (2, 7), (3, 1)]
+    assert sorted(db.query('ddd')) == [(1, 40), (2, 7)]
+
+
+def test_return_matches_ignores_overlong_query_hash(db):
+    """Test that hashes longer than the storage width never match."""
+    assert list(db.return_matches([('aaa' + 'x' * 30, 0)])) == []
+
+
+def test_expand_matches_numpy():
+    """Test expanding sorted-view ranges into song IDs and offset differences."""
+    import numpy as np
+    from fingerprinting import _match_kernel
+
+    order = np.array([2, 0, 1, 3])
+    sids = np.array([1, 1, 2, 3], dtype=np.int32)
+    offsets = np.array([10, 20, 30, 40], dtype=np.int32)
+    lo = np.array([0, 2, 3])
+    counts = np.array([2, 0, 1])
+    query_offsets = np.array([5, 7, 9])
+
+    out_sids, diffs = _match_kernel._expand_matches_numpy(order, sids, offsets, lo, counts, query_offsets)
+
+    assert out_sids.tolist() == [2, 1, 3]
+    assert diffs.tolist() == [25, 5, 31]
+    assert [a.tolist() for a in _match_kernel.expand_matches(
+        order, sids, offsets, lo, counts, query_offsets)] == [[2, 1, 3], [25, 5, 31]]
@@ -0,0 +1,416 @@
+"""Tests for metadata_db module."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from fingerprinting import metadata_db
+from fingerprinting.metadata_db import MetadataDB
+from fingerprinting.storage_config import DatabaseType
+
+
+@pytest.fixture
+def sqlite_db():
+    """Provide an in-memory SQLite metadata database."""
+    db = MetadataDB({'database_type': 'memory'})
+    yield db
+    db.close()
+
+
+def _mock_db(db_type):
+    """Create a MetadataDB of the given type on a mock connection."""
+    db = MetadataDB.__new__(MetadataDB)
+    db.db_config = {}
+    db.db_type = db_type
+    db.conn = MagicMock()
+    db._prepare_statements()
+    return db, db.conn.cursor.return_value
+
+
+@pytest.fixture
+def mysqldb(monkeypatch):
+    """Stand in for the MySQLdb driver module."""
+    monkeypatch.setattr(metadata_db, 'MySQLdb', MagicMock(), raising=False)
+
+
+def test_insert_metadata_many_sqlite(sqlite_db):
+    """Test that a batch insert stores every song, last duplicate winning."""
+    sqlite_db.insert_metadata('kettle', {'game': 'Old'})
+    sqlite_db.insert_metadata_many([
+        ('kettle', {'game': 'New'}, 'kettle.wav'),
+        ('doorbell', {'game': 'Home'}, None),
+        ('doorbell', {'game': 'Home', 'debounce_seconds': 2.0}, 'doorbell.wav'),
+    ])
+
+    assert sqlite_db.count_metadata() == 2
+    assert sqlite_db.get_metadata('kettle') == {'metadata': {'game': 'New'}, 'source_file': 'kettle.wav'}
+    assert sqlite_db.get_metadata('doorbell')['metadata']['debounce_seconds'] == 2.0
+
+
+def test_insert_metadata_many_empty(sqlite_db):
+    """Test that an empty batch is a no-op."""
+    sqlite_db.insert_metadata_many([])
+    assert sqlite_db.count_metadata() == 0
+
+
+def test_insert_metadata_many_mysql_pages(mysqldb):
+    """Test that MySQL rows are sent as multi-row INSERTs of page_size rows."""
+    db, cursor = _mock_db(DatabaseType.MYSQL)
+
+    db.insert_metadata_many([(f'song{i}', {'n': i}, None) for i in range(5)], page_size=2)
+
+    statements = cursor.execute.call_args_list
+    assert len(statements) == 3
+    assert statements[0][0][0].count('(%s, %s, %s)') == 2
+    song_name, metadata, source_file = statements[2][0][1][:3]
+    assert (song_name, json.loads(metadata), source_file) == ('song4', {'n': 4}, None)
+
+
+def test_insert_metadata_many_postgres(monkeypatch):
+    """Test that PostgreSQL rows are sent through execute_values."""
+    pytest.importorskip('psycopg2')
+    db, cursor = _mock_db(DatabaseType.POSTGRESQL)
+    execute_values = MagicMock()
+    monkeypatch.setattr(metadata_db.psycopg2.extras, 'execute_values', execute_values)
+
+    db.insert_metadata_many([('kettle', {'game': 'Home'}, 'kettle.wav')], page_size=500)
+
+    args, kwargs = execute_values.call_args
+    assert args[0] is cursor
+    [row] = args[2]
+    assert row[0] == 'kettle' and row[2] == 'kettle.wav'
+    assert isinstance(row[1], metadata_db.psycopg2.extras.Json)
+    assert row[1].adapted == {'game': 'Home'}
+    assert '::jsonb' not in kwargs['template']
+    assert kwargs['page_size'] == 500
+
+
+def test_insert_metadata_postgres_binds_json():
+    """Test that single PostgreSQL inserts bind metadata through the Json adapter."""
+    pytest.importorskip('psycopg2')
+    db, cursor = _mock_db(DatabaseType.POSTGRESQL)
+
+    db.insert_metadata('kettle', {'game': 'Home'})
+
+    sql, params = cursor.execute.call_args[0]
+    assert '::jsonb' not in sql
+    assert params[1].adapted == {'game': 'Home'}
+
+
+def test_bulk_copy_metadata_postgres():
+    """Test that PostgreSQL bulk loads stream escaped rows through COPY."""
+    db, cursor = _mock_db(DatabaseType.POSTGRESQL)
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(buffer.read())
+
+    db.bulk_copy_metadata([('tab\tname', {'note': 'a\\b'}, None), ('kettle', {}, 'x.wav')])
+
+    lines = copied[0].splitlines()
+    song_name, metadata, source_file = lines[0].split('\t')[:3]
+    assert (song_name, source_file) == ('tab\\tname', '\\N')
+    # Backslashes in the JSON text are doubled for COPY
+    assert json.loads(metadata.replace('\\\\', '\\')) == {'note': 'a\\b'}
+    assert lines[1].split('\t')[:3] == ['kettle', '{}', 'x.wav']
+
+    statements = [c[0][0].split()[0] for c in cursor.execute.call_args_list]
+    assert statements == ['BEGIN', 'CREATE', 'INSERT', 'COMMIT']
+
+
+def test_bulk_copy_metadata_falls_back(sqlite_db):
+    """Test that non-PostgreSQL backends use the batched insert."""
+    sqlite_db.bulk_copy_metadata([('kettle', {'game': 'Home'}, None)])
+
+    assert sqlite_db.get_metadata('kettle')['metadata'] == {'game': 'Home'}
+
+
+def test_bulk_copy_metadata_mysql_large_pages(mysqldb):
+    """Test that MySQL bulk loads use MYSQL_BULK_PAGE_SIZE-row INSERTs."""
+    db, cursor = _mock_db(DatabaseType.MYSQL)
+    count = metadata_db.MYSQL_BULK_PAGE_SIZE + 1
+
+    db.bulk_copy_metadata([(f'song{i}', {}, None) for i in range(count)])
+
+    statements = cursor.execute.call_args_list
+    assert len(statements) == 2
+    assert statements[0][0][0].count('(%s, %s, %s)') == metadata_db.MYSQL_BULK_PAGE_SIZE
+
+
+def test_date_added_filled_by_database(sqlite_db):
+    """Test that date_added comes from the column default on insert and upsert."""
+    sqlite_db.insert_metadata('kettle', {})
+    sqlite_db.insert_metadata_many([('doorbell', {}, None), ('kettle', {'game': 'Home'}, None)])
+
+    rows = sqlite_db.conn.execute("SELECT date_added FROM song_metadata").fetchall()
+    assert len(rows) == 2
+    assert all(row[0] is not None for row in rows)
+
+
+def test_single_row_operations_sqlite(sqlite_db):
+    """Test insert, get, delete and count through the prepared statements."""
+    sqlite_db.insert_metadata('kettle', {'game': 'Home'}, 'kettle.wav')
+    sqlite_db.insert_metadata('doorbell', {'game': 'Home'})
+
+    assert sqlite_db.count_metadata() == 2
+    assert sqlite_db.get_metadata('kettle') == {'metadata': {'game': 'Home'}, 'source_file': 'kettle.wav'}
+    assert sqlite_db.get_metadata('unknown') is None
+    assert sqlite_db.delete_metadata('kettle') is True
+    assert sqlite_db.delete_metadata('kettle') is False
+    assert [m['song_name'] for m in sqlite_db.get_all_metadata()] == ['doorbell']
+
+    sqlite_db.clear_all_metadata()
+    assert sqlite_db.count_metadata() == 0
+
+
+def test_shared_cursor_reopened(sqlite_db):
+    """Test that a closed shared cursor is replaced transparently."""
+    sqlite_db.insert_metadata('kettle', {})
+    sqlite_db._cursor.close()
+
+    assert sqlite_db.count_metadata() == 1
+
+
+def test_sqlite_operational_error_not_retried():
+    """Test that SQLite errors such as a locked database are not re-executed."""
+    import sqlite3
+
+    db, cursor = _mock_db(DatabaseType.MEMORY)
+    cursor.execute.side_effect = sqlite3.OperationalError('database is locked')
+
+    with pytest.raises(sqlite3.OperationalError):
+        db.count_metadata()
+
+    cursor.execute.assert_called_once()
+
+
+def test_postgres_retries_only_lost_connections(monkeypatch):
+    """Test that PostgreSQL statements are retried only after a reconnect."""
+    psycopg2 = pytest.importorskip('psycopg2')
+    db, cursor = _mock_db(DatabaseType.POSTGRESQL)
+    cursor.execute.side_effect = psycopg2.OperationalError('canceling statement due to lock timeout')
+    db.conn.closed = 0
+
+    with pytest.raises(psycopg2.OperationalError):
+        db.delete_metadata('kettle')
+    cursor.execute.assert_called_once()
+
+    # A dropped connection is re-established and the statement run again
+    new_conn = MagicMock()
+    db.conn.closed = 2
+    monkeypatch.setattr(db, '_init_connection', lambda: setattr(db, 'conn', new_conn))
+    new_conn.cursor.return_value.fetchone.return_value = (3,)
+
+    assert db.count_metadata() == 3
+    new_conn.cursor.return_value.execute.assert_called_once()
+
+
+@pytest.mark.parametrize('field_path, value, expected', [
+    ('game', 'Super Mario', {'game': 'Super Mario'}),
+    ('artist.name', 'Koji Kondo', {'artist': {'name': 'Koji Kondo'}}),
+    ('track', 5, {'track': 5}),
+])
+def test_query_by_field_postgres_containment(field_path, value, expected):
+    """Test that PostgreSQL field queries use one JSONB containment query."""
+    db, cursor = _mock_db(DatabaseType.POSTGRESQL)
+    cursor.fetchall.return_value = [('mario_dies', {'game': 'Super Mario'}, 'x.wav')]
+
+    results = db.query_by_field(field_path, value)
+
+    cursor.execute.assert_called_once()
+    sql, params = cursor.execute.call_args[0]
+    assert 'metadata @> %s::jsonb' in sql
+    assert json.loads(params[0]) == expected
+    assert results == [{'song_name': 'mario_dies', 'metadata': {'game': 'Super Mario'}, 'source_file': 'x.wav'}]
+
+
+@pytest.mark.parametrize('field_path, value, expected', [
+    ('game', 'Super Mario', ['mario_dies', 'mario_jump']),
+    ('artist.name', 'Koji Kondo', ['mario_dies']),
+    ('track', 3, ['mario_jump']),
+    ('loop', True, ['mario_jump']),
+    ('artist', {'name': 'Koji Kondo'}, ['mario_dies']),
+    ('track', None, ['mario_dies']),
+])
+def test_query_by_field_sqlite(field_path, value, expected):
+    """Test SQLite field queries pushed into json_extract."""
+    db = MetadataDB({'database_type': 'memory', 'indexed_fields': ['game', 'artist.name']})
+    db.insert_metadata('mario_dies', {'game': 'Super Mario', 'artist': {'name': 'Koji Kondo'}})
+    db.insert_metadata('mario_jump', {'game': 'Super Mario', 'track': 3, 'loop': True})
+    db.insert_metadata('zelda', {'game': "Link's Awakening", 'track': 4})
+
+    assert sorted(r['song_name'] for r in db.query_by_field(field_path, value)) == expected
+    db.close()
+
+
+def test_query_by_field_sqlite_uses_index():
+    """Test that configured fields get an expression index the planner uses."""
+    db = MetadataDB({'database_type': 'memory', 'indexed_fields': ['game']})
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT song_name FROM song_metadata "
+        "WHERE json_extract(metadata, '$.\"game\"') IS ?", ('x',)
+    ).fetchall()
+
+    assert 'idx_md_game_' in str([tuple(row) for row in plan])
+    db.close()
+
+
+def test_sqlite_indexes_distinct_for_similar_paths():
+    """Test that field paths differing only in punctuation get separate indexes."""
+    db = MetadataDB({'database_type': 'memory', 'indexed_fields': ['a.b', 'a_b']})
+    names = [row[0] for row in db.conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_md_%'")]
+
+    assert len(names) == 2
+    db.close()
+
+
+def test_sqlite_json_path_rejects_quotes():
+    """Test that double quotes in field paths are rejected rather than inlined."""
+    with pytest.raises(ValueError):
+        metadata_db._sqlite_json_path('artist"name')
+
+
+def test_sqlite_field_queries_cached():
+    """Test that query_by_field statements are built once per field path."""
+    scalar_sql, container_sql = metadata_db._sqlite_field_queries('artist.name')
+
+    assert metadata_db._sqlite_field_queries('artist.name')[0] is scalar_sql
+    assert """json_extract(metadata, '$."artist"."name"') IS ?""" in scalar_sql
+    assert "json_type(metadata, '$.\"artist\".\"name\"')" in container_sql
+
+
+def test_sqlite_writes_visible_to_other_connections(tmp_path):
+    """Test that single-row SQLite writes are committed without close()."""
+    import sqlite3
+
+    path = tmp_path / 'metadata.db'
+    db = MetadataDB({'database_type': 'memory', 'sqlite_path': str(path)})
+    other = sqlite3.connect(str(path), timeout=0)
+
+    db.insert_metadata('kettle', {'game': 'Home'})
+    db.insert_metadata('doorbell', {'game': 'Home'})
+    assert other.execute("SELECT COUNT(*) FROM song_metadata").fetchone()[0] == 2
+
+    db.delete_metadata('kettle')
+    assert other.execute("SELECT COUNT(*) FROM song_metadata").fetchone()[0] == 1
+
+    db.clear_all_metadata()
+    assert other.execute("SELECT COUNT(*) FROM song_metadata").fetchone()[0] == 0
+
+    other.close()
+    db.close()
+
+
+def test_sqlite_file_backed_wal(tmp_path):
+    """Test that a file-backed SQLite database uses WAL and persists on close."""
+    path = tmp_path / 'metadata.db'
+    db = MetadataDB({'database_type': 'memory', 'sqlite_path': str(path)})
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+    db.insert_metadata('kettle', {'game': 'Home'})
+    db.close()
+
+    db = MetadataDB({'database_type': 'memory', 'sqlite_path': str(path)})
+    assert db.get_metadata('kettle')['metadata'] == {'game': 'Home'}
+    db.close()
+
+
+def test_iter_all_metadata_sqlite_batches(sqlite_db):
+    """Test that iterating metadata yields every row across batches."""
+    sqlite_db.insert_metadata_many([(f'song{i}', {'n': i}, None) for i in range(5)])
+
+    rows = sqlite_db.iter_all_metadata(batch=2)
+    first = next(rows)
+    # The shared cursor stays usable while the scan is in progress
+    assert sqlite_db.count_metadata() == 5
+
+    assert [first] + list(rows) == sqlite_db.get_all_metadata()
+    assert sorted(m['metadata']['n'] for m in sqlite_db.get_all_metadata()) == [0, 1, 2, 3, 4]
+
+
+def _scan_connection(db, monkeypatch):
+    """Make a mock MetadataDB open a mock connection for scans."""
+    conn = MagicMock()
+    monkeypatch.setattr(db, '_connect_server', lambda: conn)
+    return conn, conn.cursor.return_value
+
+
+def test_iter_all_metadata_postgres_named_cursor(monkeypatch):
+    """Test that PostgreSQL scans stream through a server-side cursor."""
+    db, _ = _mock_db(DatabaseType.POSTGRESQL)
+    conn, cursor = _scan_connection(db, monkeypatch)
+    cursor.fetchmany.side_effect = [[('kettle', {'game': 'Home'}, None)], []]
+
+    assert list(db.iter_all_metadata(batch=500)) == [
+        {'song_name': 'kettle', 'metadata': {'game': 'Home'}, 'source_file': None}
+    ]
+    name = conn.cursor.call_args.kwargs['name']
+    assert name.startswith('md_scan_')
+    # WITH HOLD would materialize the result, so the scan runs in a transaction
+    assert 'withhold' not in conn.cursor.call_args.kwargs
+    assert conn.autocommit is False
+    assert cursor.itersize == 500
+    cursor.close.assert_called_once()
+    conn.close.assert_called_once()
+    db.conn.cursor.return_value.execute.assert_not_called()
+
+    # Each scan declares its own server-side cursor
+    cursor.fetchmany.side_effect = [[]]
+    list(db.iter_all_metadata())
+    assert conn.cursor.call_args.kwargs['name'] != name
+
+
+def test_iter_all_metadata_mysql_unbuffered(mysqldb, monkeypatch):
+    """Test that MySQL scans use an unbuffered cursor on their own connection."""
+    db, _ = _mock_db(DatabaseType.MYSQL)
+    conn, cursor = _scan_connection(db, monkeypatch)
+    cursor.fetchmany.side_effect = [[('kettle', '{"game": "Home"}', None)], []]
+
+    assert list(db.iter_all_metadata())[0]['metadata'] == {'game': 'Home'}
+    conn.cursor.assert_called_once_with(metadata_db.MySQLdb.cursors.SSCursor)
+    conn.close.assert_called_once()
+
+
+def test_iter_all_metadata_closes_abandoned_scan(monkeypatch):
+    """Test that a scan closed before it is exhausted closes its cursor."""
+    db, _ = _mock_db(DatabaseType.POSTGRESQL)
+    conn, cursor = _scan_connection(db, monkeypatch)
+    cursor.fetchmany.return_value = [('kettle', {}, None)]
+
+    rows = db.iter_all_metadata()
+    next(rows)
+    rows.close()
+
+    cursor.close.assert_called_once()
+    conn.close.assert_called_once()
+
+
+def test_postgres_registers_jsonb_loader(monkeypatch):
+    """Test that PostgreSQL connections decode JSONB with the shared loader."""
+    pytest.importorskip('psycopg2')
+    conn = MagicMock()
+    monkeypatch.setattr(metadata_db.psycopg2, 'connect', MagicMock(return_value=conn))
+    register = MagicMock()
+    monkeypatch.setattr(metadata_db.psycopg2.extras, 'register_default_jsonb', register)
+
+    db = MetadataDB.__new__(MetadataDB)
+    db.db_type = DatabaseType.POSTGRESQL
+    db.db_config = {'database': {'host': 'localhost', 'port': 5432, 'database': 'dejavu',
+                                 'user': 'postgres', 'password': 'secret'}}
+    db._init_connection()
+    db._prepare_statements()
+
+    register.assert_called_once_with(conn_or_curs=conn, loads=metadata_db.loads)
+    db._cursor.fetchone.return_value = ({'game': 'Home'}, None)
+    assert db.get_metadata('kettle') == {'metadata': {'game': 'Home'}, 'source_file': None}
+
+
+@pytest.mark.parametrize('column', [{'game': 'Home'}, '{"game": "Home"}', b'{"game": "Home"}'])
+def test_mysql_reads_decoded_text_or_bytes_json(mysqldb, column):
+    """Test that MySQL JSON columns are accepted as dict, str or bytes."""
+    db, cursor = _mock_db(DatabaseType.MYSQL)
+    cursor.fetchone.return_value = (column, None)
+    cursor.fetchall.return_value = [('kettle', column, None)]
+
+    assert db.get_metadata('kettle')['metadata'] == {'game': 'Home'}
+    assert db.query_by_field('game', 'Home')[0]['metadata'] == {'game': 'Home'}
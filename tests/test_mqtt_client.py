@@ -235,7 +235,7 @@ def test_connect_waits_for_connection():
 
         mock_client.connect.side_effect = connect_side_effect
 
-        with patch('time.sleep'):  # Speed up test by mocking sleep
+        with patch('fingerprinting.mqtt_client.CONNECT_TIMEOUT', 0.01):  # Speed up test
             # Simulate connection succeeds after first check
             publisher.connected = False
             with patch.object(publisher, 'connected', False):
@@ -244,6 +244,24 @@ def test_connect_waits_for_connection():
                 assert result == False
 
 
+def test_connect_returns_when_broker_answers():
+    """Test that connect() wakes up on the connect callback instead of polling."""
+    with patch('fingerprinting.mqtt_client.mqtt.Client') as mock_client_class:
+        mock_client = MagicMock()
+        mock_client_class.return_value = mock_client
+
+        publisher = MQTTPublisher(broker='localhost', port=1883, topic_prefix='test')
+
+        # Broker accepts: callback fires from the network loop
+        mock_client.loop_start.side_effect = lambda: publisher._on_connect(mock_client, None, {}, 0)
+        assert publisher.connect() == True
+
+        # Broker refuses: connect() returns at once rather than waiting out the timeout
+        mock_client.loop_start.side_effect = lambda: publisher._on_connect(mock_client, None, {}, 5)
+        with patch('fingerprinting.mqtt_client.CONNECT_TIMEOUT', 60):
+            assert publisher.connect() == False
+
+
 def test_disconnect(mqtt_publisher):
     """Test disconnect stops loop and disconnects client."""
     with patch.object(mqtt_publisher.client, 'loop_stop') as mock_loop_stop, \
@@ -253,3 +271,56 @@ def test_disconnect(mqtt_publisher):
 
         mock_loop_stop.assert_called_once()
         mock_disconnect.assert_called_once()
+
+
+def test_publish_event_payload_utf8_bytes(mqtt_publisher):
+    """Test that event payloads are UTF-8 JSON bytes and accept NumPy scalars."""
+    import numpy as np
+
+    event = {
+        'song_name': 'café_theme',
+        'confidence': 0.9,
+        'metadata': {'song': 'Café'},
+        'offset': np.float64(1.5),
+    }
+
+    with patch.object(mqtt_publisher.client, 'publish') as mock_publish:
+        mock_publish.return_value = Mock(rc=0)
+
+        assert mqtt_publisher.publish_event(event) == True
+
+        payload = mock_publish.call_args_list[0].kwargs['payload']
+        assert isinstance(payload, bytes)
+        assert 'Café'.encode('utf-8') in payload
+        assert json.loads(payload)['offset'] == 1.5
+
+
+def test_publish_event_payload_fields(mqtt_publisher):
+    """Test that the templated event payload has all fields, escaped, in order."""
+    event = {
+        'song_name': 'say "hi"\n',
+        'confidence': 0.5,
+        'timestamp': None,
+        'metadata': {'nested': {'a': [1, 2]}},
+        'offset': 3,
+        'hashes_matched_in_input': 10,
+        'input_total_hashes': 20
+    }
+
+    with patch.object(mqtt_publisher.client, 'publish') as mock_publish:
+        mock_publish.return_value = Mock(rc=0)
+
+        mqtt_publisher.publish_event(event)
+
+        payload = json.loads(mock_publish.call_args_list[0].kwargs['payload'])
+        assert list(payload) == ['song_name', 'confidence', 'timestamp', 'metadata',
+                                 'offset', 'hashes_matched', 'total_hashes']
+        assert payload == {
+            'song_name': 'say "hi"\n',
+            'confidence': 0.5,
+            'timestamp': None,
+            'metadata': {'nested': {'a': [1, 2]}},
+            'offset': 3,
+            'hashes_matched': 10,
+            'total_hashes': 20
+        }
@@ -0,0 +1,41 @@
+"""Tests for postgres_db module."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from fingerprinting.postgres_db import PostgreSQLDatabase
+
+
+@pytest.fixture
+def db():
+    """Provide a database on a mock connection; set cursor.rows to stub results."""
+    db = PostgreSQLDatabase.__new__(PostgreSQLDatabase)
+    db.connection = MagicMock()
+    cursor = db.connection.cursor.return_value
+    cursor.rows = []
+    cursor.__iter__ = lambda self: iter(self.rows)
+    return db, cursor
+
+
+def test_return_matches_accepts_generator(db):
+    """Test that matches are found when hashes arrive as a generator."""
+    db, cursor = db
+    cursor.rows = [(memoryview(bytes.fromhex('aa01')), 1, 4), (b'\xbb\x02', 2, 1), ('cc03', 3, 0)]
+
+    hashes = ((h, offset) for h, offset in [('aa01', 10), ('bb02', 3), ('aa01', 12)])
+    matches = db.return_matches(hashes)
+
+    assert matches == [(1, 8), (2, 2)]
+    # Duplicate query hashes are sent once
+    assert cursor.execute.call_args[0][1] == ['aa01', 'bb02']
+
+
+def test_return_matches_empty(db):
+    """Test that an empty query skips the database."""
+    db, cursor = db
+
+    assert db.return_matches(iter(())) == []
+    cursor.execute.assert_not_called()
@@ -0,0 +1,52 @@
+"""Tests for recognizer module."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from fingerprinting.recognizer import StreamRecognizer
+
+
+def _make_recognizer(**kwargs):
+    """Create a StreamRecognizer with a mocked engine."""
+    engine = MagicMock()
+    engine.recognize_audio.return_value = None
+    return StreamRecognizer(engine, sample_rate=100, window_duration=1.0,
+                            hop_duration=0.5, **kwargs), engine
+
+
+def test_buffer_waits_for_full_window():
+    """Test that recognition only runs once a full window is buffered."""
+    recognizer, engine = _make_recognizer()
+
+    recognizer.process_chunk(np.full(50, 0.5, dtype=np.float32))
+    assert engine.recognize_audio.call_count == 0
+
+    recognizer.process_chunk(np.full(50, 0.5, dtype=np.float32))
+    assert engine.recognize_audio.call_count == 1
+
+
+def test_window_contains_latest_samples():
+    """Test that the inference window holds the most recent samples in order."""
+    recognizer, engine = _make_recognizer()
+
+    for i in range(4):
+        recognizer.process_chunk(np.full(50, 0.1 * (i + 1), dtype=np.float32))
+
+    window = engine.recognize_audio.call_args[0][0]
+    assert len(window) == 100
+    np.testing.assert_allclose(window[:50], 0.3, rtol=1e-6)
+    np.testing.assert_allclose(window[50:], 0.4, rtol=1e-6)
+
+
+def test_reset_clears_buffer():
+    """Test that reset empties the audio history."""
+    recognizer, _ = _make_recognizer()
+    recognizer.process_chunk(np.full(200, 0.5, dtype=np.float32))
+
+    assert recognizer.get_stats()['buffer_full'] is True
+
+    recognizer.reset()
+    stats = recognizer.get_stats()
+    assert stats['buffer_size'] == 0
+    assert stats['buffer_full'] is False